@@ -0,0 +1,9 @@
+"""
+Microbenchmarks for the blockchain hot paths.
+
+Run all of them and write the results as JSON:
+
+    python -m benchmarks.run --output benchmarks.json
+
+Each suite module exposes `cases(quick)`, yielding Case objects.
+"""
@@ -0,0 +1,40 @@
+"""Block hashing and proof-of-work mining"""
+from datetime import datetime, timezone
+
+from blockchain.models import Block
+
+from .harness import Case
+
+# Fixed contents, so every run mines to the same nonce and does the same work
+TIMESTAMP = datetime(2024, 1, 1, tzinfo=timezone.utc)
+VOTE_DATA = {
+    'election_id': 'BENCH-2024',
+    'constituency_id': 1,
+    'candidate_id': 7,
+    'timestamp': '2024-01-01T00:00:00',
+}
+
+
+def make_block():
+    return Block(index=1, timestamp=TIMESTAMP, data=dict(VOTE_DATA), previous_hash='0' * 64, nonce=0)
+
+
+def mine(difficulty):
+    block = make_block()
+    block.hash = block.calculate_hash()
+    block.mine_block(difficulty)
+    return block
+
+
+def cases(quick):
+    block = make_block()
+    yield Case('Block.calculate_hash', block.calculate_hash)
+
+    for difficulty in range(1, 4 if quick else 6):
+        nonce = mine(difficulty).nonce
+        yield Case(
+            'Block.mine_block', lambda difficulty=difficulty: mine(difficulty),
+            params={'difficulty': difficulty},
+            repeat=3 if difficulty >= 4 else 5,
+            info={'nonce': nonce}
+        )
@@ -0,0 +1,24 @@
+"""RSA signatures and Fernet encryption"""
+from blockchain.utils import CryptographyUtils
+
+from .harness import Case
+
+VOTE_DATA = {
+    'election_id': 'BENCH-2024',
+    'constituency_id': 1,
+    'candidate_id': 7,
+    'timestamp': '2024-01-01T00:00:00',
+}
+
+
+def cases(quick):
+    private_pem, public_pem = CryptographyUtils.generate_rsa_keypair()
+    signature = CryptographyUtils.sign_data(VOTE_DATA, private_pem)
+    yield Case('CryptographyUtils.sign_data', lambda: CryptographyUtils.sign_data(VOTE_DATA, private_pem))
+    yield Case('CryptographyUtils.verify_signature',
+               lambda: CryptographyUtils.verify_signature(VOTE_DATA, signature, public_pem))
+
+    key = CryptographyUtils.generate_key()
+    token = CryptographyUtils.encrypt_data(VOTE_DATA, key)
+    yield Case('CryptographyUtils.encrypt_data', lambda: CryptographyUtils.encrypt_data(VOTE_DATA, key))
+    yield Case('CryptographyUtils.decrypt_data', lambda: CryptographyUtils.decrypt_data(token, key))
@@ -0,0 +1,45 @@
+"""
+Password verification at different hasher costs.
+
+Checking the password dominates a login, so ops_per_s of each case is roughly
+the logins per second one core can sustain with those settings.
+"""
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.test import override_settings
+
+from india_blockchain_voting.lazy import is_available
+from users.hashers import TunableArgon2PasswordHasher, TunableScryptPasswordHasher
+
+from .harness import Case
+
+PASSWORD = 'polling-day-0900'
+SALT = 'benchmarksalt0000000000'
+
+
+def _case(hasher, params, settings_overrides):
+    with override_settings(**settings_overrides):
+        encoded = hasher.encode(PASSWORD, SALT)
+    # verify() takes the cost from the encoded hash, so no override is needed while timing
+    return Case(f'{type(hasher).__name__}.verify', lambda: hasher.verify(PASSWORD, encoded), params, repeat=3)
+
+
+def cases(quick):
+    pbkdf2 = PBKDF2PasswordHasher()
+    yield _case(pbkdf2, {'iterations': pbkdf2.iterations}, {})
+
+    scrypt = TunableScryptPasswordHasher()
+    for work_factor in (2 ** 12, 2 ** 13, 2 ** 14) + (() if quick else (2 ** 15,)):
+        for parallelism in (1, 5):
+            yield _case(
+                scrypt, {'work_factor': work_factor, 'block_size': 8, 'parallelism': parallelism},
+                {'PASSWORD_SCRYPT_WORK_FACTOR': work_factor, 'PASSWORD_SCRYPT_PARALLELISM': parallelism}
+            )
+
+    if is_available('argon2'):
+        argon2 = TunableArgon2PasswordHasher()
+        for time_cost, memory_cost in ((1, 19456), (2, 65536), (2, 102400)):
+            yield _case(
+                argon2, {'time_cost': time_cost, 'memory_cost_kib': memory_cost, 'parallelism': 1},
+                {'PASSWORD_ARGON2_TIME_COST': time_cost, 'PASSWORD_ARGON2_MEMORY_COST': memory_cost,
+                 'PASSWORD_ARGON2_PARALLELISM': 1}
+            )
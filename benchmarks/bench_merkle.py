@@ -0,0 +1,35 @@
+"""Merkle roots and inclusion proofs"""
+import hashlib
+
+from blockchain.network.consensus import ConsensusManager
+from blockchain.utils import HashUtils, MerkleTree
+
+from .harness import Case
+
+LEAF_COUNTS = (1, 10, 100, 1000, 10000)
+QUICK_LEAF_COUNTS = (1, 10, 100, 1000)
+
+
+def leaves(count):
+    return [hashlib.sha256(f"tx-{n}".encode()).hexdigest() for n in range(count)]
+
+
+def cases(quick):
+    for count in QUICK_LEAF_COUNTS if quick else LEAF_COUNTS:
+        hashes = leaves(count)
+        target = hashes[count // 2]
+        root = ConsensusManager.generate_merkle_root(list(hashes))
+        proof = ConsensusManager.generate_merkle_proof(list(hashes), target)
+        tree = MerkleTree(hashes)
+        params = {'leaves': count}
+
+        # generate_merkle_root pads its argument in place, so each call gets a copy
+        yield Case('ConsensusManager.generate_merkle_root',
+                   lambda hashes=hashes: ConsensusManager.generate_merkle_root(list(hashes)), params)
+        yield Case('ConsensusManager.generate_merkle_proof',
+                   lambda hashes=hashes, target=target: ConsensusManager.generate_merkle_proof(hashes, target), params)
+        yield Case('ConsensusManager.verify_merkle_proof',
+                   lambda target=target, proof=proof, root=root: ConsensusManager.verify_merkle_proof(target, proof, root), params)
+        yield Case('HashUtils.merkle_root', lambda hashes=hashes: HashUtils.merkle_root(hashes), params)
+        yield Case('MerkleTree.__init__', lambda hashes=hashes: MerkleTree(hashes), params)
+        yield Case('MerkleTree.get_proof', lambda tree=tree, target=target: tree.get_proof(target), params)
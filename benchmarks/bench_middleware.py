@@ -0,0 +1,53 @@
+"""
+Per-request cost of the session, auth and login middleware.
+
+Each case sends a request carrying a session cookie through
+SessionMiddleware, AuthenticationMiddleware, LoginRequiredMiddleware and
+SecurityHeadersMiddleware to a view that does nothing. 'no middleware' is the
+same request without middleware, so the overhead of a case is its time minus
+that. A page path loads the session from the session store (a database
+query with the default backend); static and peer paths must not.
+"""
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from .harness import Case
+
+MIDDLEWARE = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.LoginRequiredMiddleware',
+    'users.security_middleware.SecurityHeadersMiddleware',
+)
+
+# Unknown to the session store, so loading it costs one lookup and finds nothing
+SESSION_KEY = 'benchmarksession0000000000000000'
+
+
+def view(request):
+    return HttpResponse('')
+
+
+def _stack():
+    handler = view
+    for path in reversed(MIDDLEWARE):
+        handler = import_string(path)(handler)
+    return handler
+
+
+def _case(name, handler, path):
+    factory = RequestFactory()
+    factory.cookies['sessionid'] = SESSION_KEY
+    return Case(name, lambda: handler(factory.get(path)), {'path': path})
+
+
+def cases(quick):
+    stack = _stack()
+    peer_path = reverse('blockchain:receive_block')
+    yield _case('no middleware', view, peer_path)
+    yield _case('middleware static', stack, '/static/css/style.css')
+    yield _case('middleware peer', stack, peer_path)
+    yield _case('middleware api', stack, reverse('blockchain:api_blocks'))
+    yield _case('middleware page', stack, reverse('users:profile'))
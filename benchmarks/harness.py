@@ -0,0 +1,44 @@
+import statistics
+import timeit
+
+
+class Case:
+    """One benchmark: `func` is called with no arguments and timed"""
+
+    def __init__(self, name, func, params=None, repeat=5, info=None):
+        self.name = name
+        self.func = func
+        self.params = params or {}
+        self.repeat = repeat
+        # Extra facts about the workload (e.g. the nonce a mining run reached)
+        self.info = info or {}
+
+
+def measure(case):
+    """
+    Time a case with timeit: the call count per repeat is picked by
+    autorange (at least 0.2 s per repeat), then the fastest, median and mean
+    time per call over `repeat` repeats are reported
+    """
+    timer = timeit.Timer(case.func)
+    number, _ = timer.autorange()
+    per_call = [total / number for total in timer.repeat(repeat=case.repeat, number=number)]
+
+    median = statistics.median(per_call)
+    return {
+        'name': case.name,
+        'params': case.params,
+        'calls_per_repeat': number,
+        'repeats': case.repeat,
+        'min_s': min(per_call),
+        'median_s': median,
+        'mean_s': statistics.fmean(per_call),
+        'stdev_s': statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        'ops_per_s': 1 / median if median else None,
+        **({'info': case.info} if case.info else {}),
+    }
+
+
+def result_key(result):
+    """Identify a result across runs by name and parameters"""
+    return (result['name'], tuple(sorted(result['params'].items())))
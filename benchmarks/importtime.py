@@ -0,0 +1,110 @@
+"""
+Check the import cost of starting the project against a budget.
+
+Each target is started in a fresh interpreter under `python -X importtime`:
+
+    command  django.setup(), what every manage.py command pays
+    worker   django.setup() plus the WSGI application and URLconf, what a
+             web worker pays before its first request
+
+The total is the sum of the self times reported by -X importtime (the best of
+--repeat runs). The script exits with status 1 if any target is over its
+budget, and lists the packages that cost the most.
+
+    python -m benchmarks.importtime [--command-budget 400] [--worker-budget 600] [--output importtime.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+TARGETS = {
+    'command': 'import django; django.setup()',
+    'worker': (
+        'from india_blockchain_voting.wsgi import application; '
+        'from django.urls import get_resolver; get_resolver().url_patterns'
+    ),
+}
+
+# Milliseconds of imports allowed per target
+BUDGETS = {'command': 400, 'worker': 600}
+
+
+def profile(code):
+    """Import times of one cold start as {module: self microseconds}"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='india_blockchain_voting.settings')
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=BASE_DIR, env=env, timeout=120
+    )
+    if completed.returncode:
+        raise RuntimeError(f"Startup failed:\n{completed.stderr[-2000:]}")
+
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+def measure(code, repeat):
+    """Best of `repeat` cold starts: total ms and the costliest top-level packages"""
+    best = None
+    for _ in range(repeat):
+        modules = profile(code)
+        if best is None or sum(modules.values()) < sum(best.values()):
+            best = modules
+
+    by_package = Counter()
+    for name, self_us in best.items():
+        by_package[name.split('.')[0]] += self_us
+    return {
+        'total_ms': round(sum(best.values()) / 1000, 1),
+        'modules': len(best),
+        'top_packages_ms': {name: round(us / 1000, 1) for name, us in by_package.most_common(10)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--command-budget', type=float, default=BUDGETS['command'], help='Milliseconds')
+    parser.add_argument('--worker-budget', type=float, default=BUDGETS['worker'], help='Milliseconds')
+    parser.add_argument('--repeat', type=int, default=3, help='Cold starts per target; the fastest counts')
+    parser.add_argument('--output', help='Write the JSON result to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    budgets = {'command': args.command_budget, 'worker': args.worker_budget}
+    results = {}
+    over = []
+    for name, code in TARGETS.items():
+        result = measure(code, max(1, args.repeat))
+        result['budget_ms'] = budgets[name]
+        results[name] = result
+        status = 'OK' if result['total_ms'] <= budgets[name] else 'OVER BUDGET'
+        if status != 'OK':
+            over.append(name)
+        print(f"{name}: {result['total_ms']} ms of imports (budget {budgets[name]} ms) {status}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if over:
+        print(f"Over budget: {', '.join(over)}. See top_packages_ms for what to defer "
+              f"(india_blockchain_voting.lazy).", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
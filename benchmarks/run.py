@@ -0,0 +1,103 @@
+"""
+Run the blockchain microbenchmarks and emit JSON.
+
+    python -m benchmarks.run [--quick] [--filter merkle] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SUITES = ('bench_blocks', 'bench_merkle', 'bench_crypto', 'bench_login', 'bench_middleware')
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'india_blockchain_voting.settings')
+    sys.path.insert(0, str(BASE_DIR))
+    django.setup()
+
+    # Time the primitives themselves; the instrumentation flusher would also write to the database
+    from reports.instrumentation import metrics
+    metrics.enabled = False
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=BASE_DIR, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print the median time of each benchmark relative to a previous run"""
+    from .harness import result_key
+
+    with open(baseline_path) as f:
+        baseline = {result_key(result): result for result in json.load(f)['results']}
+
+    for result in results:
+        before = baseline.get(result_key(result))
+        if not before:
+            continue
+        ratio = result['median_s'] / before['median_s']
+        params = ', '.join(f"{key}={value}" for key, value in result['params'].items())
+        print(f"{result['name']}({params}): {ratio:.2f}x baseline", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='Skip the slowest parameter values')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--output', help='Write JSON here instead of stdout')
+    parser.add_argument('--compare', help='Previous JSON output to compare median times against')
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from importlib import import_module
+    from .harness import measure
+
+    results = []
+    for suite in SUITES:
+        module = import_module(f'benchmarks.{suite}')
+        for case in module.cases(args.quick):
+            if args.filter.lower() not in case.name.lower():
+                continue
+            print(f"{case.name} {case.params or ''}".strip(), file=sys.stderr)
+            results.append(measure(case))
+
+    output = json.dumps({
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'django': django.get_version(),
+            'quick': args.quick,
+        },
+        'results': results,
+    }, indent=2)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
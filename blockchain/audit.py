@@ -0,0 +1,240 @@
+"""
+Write-behind sink for BlockchainAuditLog.
+
+Writing an audit row inside every vote transaction holds the chain lock for
+one more INSERT. Instead, entries are queued once the surrounding transaction
+commits, appended to a per-process spool file and written with bulk_create
+when the buffer reaches AUDIT_LOG_BUFFER_SIZE entries or is older than
+AUDIT_LOG_FLUSH_INTERVAL seconds.
+
+The buffer is flushed at interpreter exit. If the process dies before that,
+its spool file stays on disk and is picked up by the next process that logs.
+Spool files are named by pid and a per-process token, so a restarted worker
+that gets the same pid (PID 1 in a container) still recovers its
+predecessor's file. Appends only reach the OS page cache, which survives a
+crashed process; the flusher thread fsyncs them every SPOOL_SYNC_INTERVAL
+seconds so requests never wait on the disk.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+SPOOL_PREFIX = 'audit-spool-'
+SPOOL_SYNC_INTERVAL = 1.0
+
+
+def _pid_alive(pid):
+    """Whether a process with this pid is still running"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AuditLogSink:
+    """Buffers audit entries and flushes them to the database in bulk"""
+
+    def __init__(self, buffer_size=100, flush_interval=5.0, spool_dir=None):
+        self.buffer_size = max(1, int(buffer_size))
+        self.flush_interval = flush_interval
+        self.spool_dir = spool_dir
+        self._buffer = []
+        self._lock = threading.RLock()
+        self._started = False
+        self._stop = threading.Event()
+        self._spool_token = secrets.token_hex(4)
+        self._spool_dirty = False
+
+    @property
+    def spool_path(self):
+        if not self.spool_dir:
+            return None
+        return os.path.join(self.spool_dir, f"{SPOOL_PREFIX}{os.getpid()}-{self._spool_token}.jsonl")
+
+    def record(self, action, blockchain, actor_type, actor_id, details,
+               block=None, success=True, error_message="", execution_time=0.0):
+        """Queue an audit entry; it is buffered only if the current transaction commits"""
+        entry = {
+            'action': action,
+            'blockchain_id': getattr(blockchain, 'pk', blockchain),
+            'block_id': getattr(block, 'pk', block),
+            'actor_type': actor_type,
+            'actor_id': actor_id,
+            'details': details,
+            'success': success,
+            'error_message': error_message,
+            'execution_time': execution_time,
+            'timestamp': timezone.now().isoformat(),
+        }
+        transaction.on_commit(lambda: self._enqueue(entry))
+
+    def _enqueue(self, entry):
+        with self._lock:
+            self._start()
+            self._buffer.append(entry)
+            self._spool([entry])
+            full = len(self._buffer) >= self.buffer_size
+        if full:
+            self.flush()
+
+    def _start(self):
+        """Recover orphaned spool files and start the periodic flusher once per process"""
+        if self._started:
+            return
+        self._started = True
+        self._recover_orphans()
+        atexit.register(self.close)
+        if self.buffer_size > 1 and self.flush_interval:
+            threading.Thread(target=self._run, name='audit-log-flusher', daemon=True).start()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while not self._stop.wait(min(SPOOL_SYNC_INTERVAL, self.flush_interval)):
+            self._sync_spool()
+            if time.monotonic() - last_flush < self.flush_interval:
+                continue
+            last_flush = time.monotonic()
+            try:
+                self.flush()
+            finally:
+                # This thread owns its own connection; don't leave it open between flushes
+                connection.close()
+
+    def _spool(self, entries, sync=False):
+        """Append entries to the spool file; fsynced now if `sync`, else by the flusher thread"""
+        path = self.spool_path
+        if not path:
+            return
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+                else:
+                    self._spool_dirty = True
+        except OSError as e:
+            logger.error(f"Could not spool audit entries: {str(e)}")
+
+    def _sync_spool(self):
+        """fsync entries appended since the last sync"""
+        with self._lock:
+            if not self._spool_dirty:
+                return
+            self._spool_dirty = False
+            try:
+                fd = os.open(self.spool_path, os.O_RDONLY)
+            except OSError:
+                # Flushed and removed in the meantime
+                return
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                logger.error(f"Could not sync audit spool: {str(e)}")
+            finally:
+                os.close(fd)
+
+    def _recover_orphans(self):
+        """Adopt spool files left behind by processes that exited without flushing"""
+        if not self.spool_dir:
+            return
+        for path in glob.glob(os.path.join(self.spool_dir, f'{SPOOL_PREFIX}*.jsonl')):
+            # audit-spool-<pid>-<token>.jsonl (or audit-spool-<pid>.jsonl from older versions)
+            try:
+                pid = int(os.path.basename(path)[len(SPOOL_PREFIX):-len('.jsonl')].split('-')[0])
+            except ValueError:
+                continue
+            # A file with our pid but not our token was left by an earlier process that had the same pid
+            if path == self.spool_path or (pid != os.getpid() and _pid_alive(pid)):
+                continue
+
+            # Claim the file atomically so two processes never replay it twice
+            claimed = f"{path}.{os.getpid()}.recovering"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+
+            with open(claimed, encoding='utf-8') as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+            self._buffer.extend(entries)
+            self._spool(entries, sync=True)
+            os.remove(claimed)
+            logger.info(f"Recovered {len(entries)} audit entries from {path}")
+
+    def flush(self):
+        """Write all buffered entries with one bulk_create; keeps them on failure"""
+        from .models import BlockchainAuditLog
+
+        with self._lock:
+            if not self._buffer:
+                return 0
+            entries = self._buffer
+            rows = [
+                BlockchainAuditLog(**dict(entry, timestamp=parse_datetime(entry['timestamp'])))
+                for entry in entries
+            ]
+            try:
+                BlockchainAuditLog.objects.bulk_create(rows)
+            except IntegrityError:
+                # One entry points at a block or chain that no longer exists (e.g. replaced
+                # by conflict resolution); save the rest one by one instead of retrying forever
+                self._save_individually(rows)
+            except Exception as e:
+                logger.error(f"Error flushing {len(entries)} audit entries: {str(e)}")
+                return 0
+
+            self._buffer = []
+            self._spool_dirty = False
+            if self.spool_path and os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+
+        self._rollup([row.timestamp for row in rows])
+        return len(entries)
+
+    def _rollup(self, timestamps):
+        """Refresh the hourly AuditLogBucket rows touched by a flush"""
+        from .utils import AuditUtils
+
+        try:
+            AuditUtils.rollup_audit_buckets(min(timestamps), max(timestamps))
+        except Exception as e:
+            # Raw rows are already stored; `manage.py rollup_audit_log` can rebuild buckets
+            logger.error(f"Error rolling up audit buckets: {str(e)}")
+
+    def _save_individually(self, rows):
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    row.save(force_insert=True)
+            except IntegrityError as e:
+                logger.error(f"Dropping audit entry {row.action} for blockchain {row.blockchain_id}: {str(e)}")
+
+    def close(self):
+        """Stop the periodic flusher and write whatever is still buffered"""
+        self._stop.set()
+        self.flush()
+
+
+audit_log = AuditLogSink(
+    buffer_size=getattr(settings, 'AUDIT_LOG_BUFFER_SIZE', 100),
+    flush_interval=getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 5.0),
+    spool_dir=getattr(settings, 'AUDIT_LOG_SPOOL_DIR', None),
+)
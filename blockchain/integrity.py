@@ -0,0 +1,174 @@
+"""
+Blockchain integrity checks.
+
+Every block's validity is stored in Block.is_valid when it is mined or
+received, and refreshed by Blockchain.is_chain_valid. The quick check only
+aggregates those stored flags. A full scan re-hashes every block. It runs as
+a background job that streams header tuples from the database and hashes
+them in a process pool. Its result is cached per chain tip (latest_hash),
+so it stays valid until the chain grows or is replaced.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from reports.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+SCAN_FIELDS = ('id', 'index', 'timestamp', 'data', 'previous_hash', 'nonce', 'merkle_root', 'hash')
+CHUNK_SIZE = 2000
+
+
+def _hash_chunk(rows):
+    """
+    Recompute block hashes exactly like Block.calculate_hash.
+    Runs in worker processes, so it only touches plain tuples.
+    """
+    invalid = []
+    for block_id, index, timestamp, data, previous_hash, nonce, merkle_root, stored_hash in rows:
+        block_string = json.dumps({
+            'index': index,
+            'timestamp': timestamp,
+            'data': data,
+            'previous_hash': previous_hash,
+            'nonce': nonce,
+            'merkle_root': merkle_root
+        }, sort_keys=True)
+        if hashlib.sha256(block_string.encode()).hexdigest() != stored_hash:
+            invalid.append(block_id)
+    return invalid
+
+
+def stored_integrity(blockchain_id=None):
+    """Integrity summary from the stored per-block validity flags (one query)"""
+    from django.db.models import Count, Q
+    from .models import Block
+
+    blocks = Block.objects.all()
+    if blockchain_id is not None:
+        blocks = blocks.filter(blockchain_id=blockchain_id)
+    counts = blocks.aggregate(total=Count('id'), valid=Count('id', filter=Q(is_valid=True)))
+
+    total_blocks = counts['total']
+    valid_blocks = counts['valid']
+    integrity_percentage = (valid_blocks / total_blocks * 100) if total_blocks > 0 else 100
+    return {
+        'total_blocks': total_blocks,
+        'valid_blocks': valid_blocks,
+        'integrity_percentage': round(integrity_percentage, 2),
+        'status': 'HEALTHY' if integrity_percentage > 99 else 'WARNING'
+    }
+
+
+def _result_key(blockchain):
+    return f"integrity_scan:{blockchain.id}:{blockchain.latest_hash}"
+
+
+def _lock_key(blockchain):
+    return f"integrity_scan:{blockchain.id}:running"
+
+
+def scan_result(blockchain):
+    """Cached full-scan result for the chain's current tip, or None"""
+    return cache.get(_result_key(blockchain))
+
+
+def full_scan(blockchain, workers=None):
+    """Re-hash and re-link every block of a chain, then cache the result for its tip"""
+    from .models import Block
+    from .pagination import invalidate_block_pages
+
+    workers = workers or getattr(settings, 'INTEGRITY_SCAN_WORKERS', None) or os.cpu_count()
+    start_time = time.perf_counter()
+    rows = Block.objects.filter(blockchain=blockchain).order_by('index').values_list(
+        *SCAN_FIELDS
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    total_blocks = 0
+    broken_links = []
+    bad_hashes = []
+    pending = set()
+    previous_hash = None
+    chunk = []
+
+    def submit(pool, chunk):
+        # At most two chunks per worker are held at a time, so memory does not grow with the chain
+        nonlocal pending
+        if len(pending) >= workers * 2:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            bad_hashes.extend(block_id for job in done for block_id in job.result())
+        pending.add(pool.submit(_hash_chunk, chunk))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for block_id, index, timestamp, data, prev_hash, nonce, merkle_root, block_hash in rows:
+            total_blocks += 1
+            # Linkage is sequential, so it is checked here while hashing fans out
+            if previous_hash is not None and prev_hash != previous_hash:
+                broken_links.append(block_id)
+            previous_hash = block_hash
+
+            chunk.append((block_id, index, timestamp.isoformat(), data, prev_hash, nonce, merkle_root, block_hash))
+            if len(chunk) >= CHUNK_SIZE:
+                submit(pool, chunk)
+                chunk = []
+        if chunk:
+            submit(pool, chunk)
+
+        bad_hashes.extend(block_id for job in pending for block_id in job.result())
+
+    invalid_ids = set(bad_hashes) | set(broken_links)
+
+    # Bring the stored validity flags back in line with the scan
+    stale_valid = Block.objects.filter(blockchain=blockchain, id__in=invalid_ids, is_valid=True)
+    stale_invalid = Block.objects.filter(blockchain=blockchain, is_valid=False).exclude(id__in=invalid_ids)
+    if stale_valid.update(is_valid=False) + stale_invalid.update(is_valid=True):
+        invalidate_block_pages(blockchain.id)
+
+    result = {
+        'status': 'HEALTHY' if not invalid_ids else 'COMPROMISED',
+        'total_blocks': total_blocks,
+        'valid_blocks': total_blocks - len(invalid_ids),
+        'invalid_hash_block_ids': sorted(bad_hashes)[:100],
+        'broken_link_block_ids': sorted(broken_links)[:100],
+        'chain_tip': blockchain.latest_hash,
+        'finished_at': timezone.now().isoformat(),
+    }
+    metrics.observe('BLOCKCHAIN_VALIDATION_TIME', time.perf_counter() - start_time, scan='full')
+    cache.set(_result_key(blockchain), result, None)
+    return result
+
+
+def start_full_scan(blockchain):
+    """
+    Run a full scan in the background unless one is cached for this tip or
+    already running. Returns the cached result, or a status dict.
+    """
+    result = scan_result(blockchain)
+    if result is not None:
+        return result
+
+    # One scan per chain at a time; the lock expires if a scan dies
+    if not cache.add(_lock_key(blockchain), True, 3600):
+        return {'status': 'RUNNING', 'chain_tip': blockchain.latest_hash}
+
+    def run():
+        try:
+            full_scan(blockchain)
+        except Exception as e:
+            logger.error(f"Integrity scan of blockchain {blockchain.id} failed: {str(e)}")
+        finally:
+            cache.delete(_lock_key(blockchain))
+            connection.close()
+
+    threading.Thread(target=run, name=f'integrity-scan-{blockchain.id}', daemon=True).start()
+    return {'status': 'RUNNING', 'chain_tip': blockchain.latest_hash}
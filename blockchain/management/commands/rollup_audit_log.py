@@ -0,0 +1,33 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from django.utils import timezone
+from blockchain.models import BlockchainAuditLog
+from blockchain.utils import AuditUtils
+
+class Command(BaseCommand):
+    help = 'Rebuilds the hourly audit log buckets used by audit reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Only rebuild the last N days (default: everything)')
+
+    def handle(self, *args, **options):
+        logs = BlockchainAuditLog.objects.all()
+        if options['days']:
+            logs = logs.filter(timestamp__gte=timezone.now() - timedelta(days=options['days']))
+
+        span = logs.aggregate(start=Min('timestamp'), end=Max('timestamp'))
+        if span['start'] is None:
+            self.stdout.write(self.style.WARNING('No audit log entries to roll up'))
+            return
+
+        # Rebuild one day at a time to keep each transaction small
+        day_start = span['start']
+        while day_start <= span['end']:
+            day_end = min(day_start + timedelta(days=1), span['end'])
+            AuditUtils.rollup_audit_buckets(day_start, day_end)
+            day_start = day_end + timedelta(hours=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up audit log from {span["start"]:%Y-%m-%d %H:00} to {span["end"]:%Y-%m-%d %H:00}'
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0004_votetransaction_digital_receipt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='block',
+            name='blockchain',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='blockchain.blockchain'),
+        ),
+        migrations.AddIndex(
+            model_name='block',
+            index=models.Index(fields=['blockchain', 'index'], name='blockchain__blockch_57aed0_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0005_block_blockchain'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='votetransaction',
+            index=models.Index(fields=['timestamp', 'id'], name='blockchain__timesta_d1c328_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0006_votetransaction_blockchain__timesta_d1c328_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blockchainauditlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0007_alter_blockchainauditlog_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLogBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('action', models.CharField(max_length=20)),
+                ('actor_type', models.CharField(max_length=50)),
+                ('success', models.BooleanField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_execution_time', models.FloatField(default=0.0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='blockchainauditlog',
+            index=models.Index(fields=['blockchain', 'timestamp'], name='blockchain__blockch_a4d21a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blockchainauditlog',
+            index=models.Index(fields=['timestamp', 'id'], name='blockchain__timesta_43feb9_idx'),
+        ),
+        migrations.AddField(
+            model_name='auditlogbucket',
+            name='blockchain',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audit_buckets', to='blockchain.blockchain'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogbucket',
+            index=models.Index(fields=['bucket_start'], name='blockchain__bucket__df39f6_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='auditlogbucket',
+            unique_together={('blockchain', 'bucket_start', 'action', 'actor_type', 'success')},
+        ),
+    ]
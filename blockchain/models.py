@@ -1,16 +1,22 @@
 import hashlib
 import json
+import time
 from datetime import datetime
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.exceptions import PermissionDenied
 from django.conf import settings
-from cryptography.fernet import Fernet
+from django.utils import timezone
+from blockchain.utils import CryptographyUtils
 from blockchain.network.consensus import ConsensusManager
+from blockchain.pagination import invalidate_block_pages
+from blockchain.audit import audit_log
+from reports.instrumentation import metrics
 
 
 class Block(models.Model):
     """Individual block in the blockchain"""
+    blockchain = models.ForeignKey('Blockchain', on_delete=models.CASCADE, related_name='blocks', null=True, blank=True)
     index = models.IntegerField()
     timestamp = models.DateTimeField(default=datetime.now)
     data = models.JSONField()  # Contains vote information
@@ -19,7 +25,7 @@ class Block(models.Model):
     hash = models.CharField(max_length=64, unique=True)
     merkle_root = models.CharField(max_length=64, blank=True)
     
-    # Validation fields
+    # Validation fields (computed at append time and by chain validation, not per request)
     is_valid = models.BooleanField(default=True)
     validator_signature = models.TextField(blank=True)
     
@@ -29,6 +35,9 @@ class Block(models.Model):
     class Meta:
         ordering = ['index']
         unique_together = ['index', 'hash']
+        indexes = [
+            models.Index(fields=['blockchain', 'index']),
+        ]
     
     def __str__(self):
         return f"Block #{self.index} - {self.hash[:10]}..."
@@ -54,9 +63,10 @@ class Block(models.Model):
             transaction_hashes = [tx['hash'] for tx in self.data['transactions']]
             self.merkle_root = ConsensusManager.generate_merkle_root(transaction_hashes)
         
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        with metrics.timer('BLOCKCHAIN_BLOCK_TIME', difficulty=difficulty):
+            while self.hash[:difficulty] != target:
+                self.nonce += 1
+                self.hash = self.calculate_hash()
     
     def is_hash_valid(self):
         """Verify that the stored hash matches calculated hash"""
@@ -128,14 +138,17 @@ class Blockchain(models.Model):
             data["transaction_hash"] = transaction_hash
         
         new_block = Block(
+            blockchain=self,
             index=self.total_blocks + 1,
             data=data,
             previous_hash=latest_block.hash if latest_block else "0",
-            timestamp=datetime.now()
+            timestamp=timezone.now()
         )
         
         # Mine the block using proof of work
+        start_time = time.perf_counter()
         new_block.mine_block(self.difficulty)
+        new_block.is_valid = new_block.is_hash_valid()
         new_block.save()
         
         # Update blockchain
@@ -153,7 +166,7 @@ class Blockchain(models.Model):
             )
         
         # Log this action for transparency
-        BlockchainAuditLog.objects.create(
+        audit_log.record(
             action="ADD_BLOCK",
             block=new_block,
             blockchain=self,
@@ -161,7 +174,7 @@ class Blockchain(models.Model):
             actor_id=voter_id[:8] if voter_id else "system",
             details={"transaction_type": "vote" if voter_id else "system"},
             success=True,
-            execution_time=0.0
+            execution_time=time.perf_counter() - start_time
         )
         
         # Broadcast this block to all peers in the network
@@ -175,19 +188,32 @@ class Blockchain(models.Model):
         return new_block
     
     def is_chain_valid(self):
-        """Validate the entire blockchain"""
-        blocks = Block.objects.filter(blockchain=self).order_by('index')
+        """Validate the entire blockchain and store each block's validity"""
+        start_time = time.perf_counter()
+        chain_valid = True
+        previous_hash = None
+        changed_blocks = []
         
-        for i, block in enumerate(blocks):
-            # Check if hash is valid
-            if not block.is_hash_valid():
-                return False
+        for block in self.blocks.order_by('index').iterator():
+            # Check the stored hash and the link to the previous block
+            block_valid = block.is_hash_valid() and (
+                previous_hash is None or block.previous_hash == previous_hash
+            )
+            if block_valid != block.is_valid:
+                block.is_valid = block_valid
+                changed_blocks.append(block)
             
-            # Check if previous hash matches
-            if i > 0 and block.previous_hash != blocks[i-1].hash:
-                return False
+            chain_valid = chain_valid and block_valid
+            previous_hash = block.hash
+        
+        # Persist flags so explorer listings never need to re-hash
+        if changed_blocks:
+            Block.objects.bulk_update(changed_blocks, ['is_valid'])
+            # Cached explorer pages carry the old validity flags
+            invalidate_block_pages(self.id)
         
-        return True
+        metrics.observe('BLOCKCHAIN_VALIDATION_TIME', time.perf_counter() - start_time, scan='incremental')
+        return chain_valid
 
 
 class VoteTransaction(models.Model):
@@ -218,21 +244,21 @@ class VoteTransaction(models.Model):
     class Meta:
         ordering = ['-timestamp']
         unique_together = ['voter_id', 'block']
+        indexes = [
+            # Keyset pagination of the transaction admin listing
+            models.Index(fields=['timestamp', 'id']),
+        ]
     
     def __str__(self):
         return f"Vote Transaction {self.transaction_hash[:10]}..."
     
     def encrypt_vote_data(self, vote_data, key):
         """Encrypt vote data"""
-        f = Fernet(key)
-        encrypted_data = f.encrypt(json.dumps(vote_data).encode())
-        self.encrypted_vote_data = encrypted_data.decode()
+        self.encrypted_vote_data = CryptographyUtils.encrypt_data(vote_data, key)
     
     def decrypt_vote_data(self, key):
         """Decrypt vote data"""
-        f = Fernet(key)
-        decrypted_data = f.decrypt(self.encrypted_vote_data.encode())
-        return json.loads(decrypted_data.decode())
+        return CryptographyUtils.decrypt_data(self.encrypted_vote_data, key)
 
 
 class BlockchainAuditLog(models.Model):
@@ -260,15 +286,41 @@ class BlockchainAuditLog(models.Model):
     
     # Timing
     execution_time = models.FloatField(help_text="Execution time in seconds")
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the action happens, not when the buffered entry is flushed
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['blockchain', 'timestamp']),
+            models.Index(fields=['timestamp', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.action} by {self.actor_type} at {self.timestamp}"
 
 
+class AuditLogBucket(models.Model):
+    """Hourly rollup of BlockchainAuditLog, so audit summaries don't scan raw rows"""
+    blockchain = models.ForeignKey(Blockchain, on_delete=models.CASCADE, related_name='audit_buckets')
+    bucket_start = models.DateTimeField()
+    action = models.CharField(max_length=20)
+    actor_type = models.CharField(max_length=50)
+    success = models.BooleanField()
+    
+    count = models.PositiveIntegerField(default=0)
+    total_execution_time = models.FloatField(default=0.0)
+    
+    class Meta:
+        unique_together = ['blockchain', 'bucket_start', 'action', 'actor_type', 'success']
+        indexes = [
+            models.Index(fields=['bucket_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} x{self.count} at {self.bucket_start}"
+
+
 class GenesisBlock(models.Model):
     """Special model for genesis block configuration"""
     blockchain = models.OneToOneField(Blockchain, on_delete=models.CASCADE)
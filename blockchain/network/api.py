@@ -8,6 +8,7 @@ import logging
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from blockchain.models import Block, Blockchain, VoteTransaction
 from blockchain.network.node import BlockchainNode
@@ -22,8 +23,13 @@ known_nodes = getattr(settings, 'BLOCKCHAIN_KNOWN_NODES', [])
 
 blockchain_node = BlockchainNode(node_id, node_url, known_nodes)
 
+# Nodes authenticate with tokens only: session authentication would load a session
+# on every peer call (see users.middleware.sessionless_paths)
+PEER_AUTHENTICATION_CLASSES = [JWTAuthentication]
+
 class NodeRegisterView(APIView):
     """API endpoint to register a new node in the network"""
+    authentication_classes = PEER_AUTHENTICATION_CLASSES
     
     def post(self, request):
         try:
@@ -58,6 +64,7 @@ class NodeRegisterView(APIView):
 
 class NodeListView(APIView):
     """API endpoint to list all known nodes"""
+    authentication_classes = PEER_AUTHENTICATION_CLASSES
     
     def get(self, request):
         return Response({
@@ -69,6 +76,7 @@ class NodeListView(APIView):
 
 class BlockchainConsensusView(APIView):
     """API endpoint to trigger consensus resolution"""
+    authentication_classes = PEER_AUTHENTICATION_CLASSES
     
     def get(self, request):
         try:
@@ -94,6 +102,7 @@ class BlockchainConsensusView(APIView):
 
 class ChainView(APIView):
     """API endpoint to get the full blockchain"""
+    authentication_classes = PEER_AUTHENTICATION_CLASSES
     
     def get(self, request, blockchain_id):
         try:
@@ -117,6 +126,7 @@ class ChainView(APIView):
 @method_decorator(csrf_exempt, name='dispatch')
 class ReceiveBlockView(APIView):
     """API endpoint to receive a new block from another node"""
+    authentication_classes = PEER_AUTHENTICATION_CLASSES
     
     def post(self, request):
         try:
@@ -150,6 +160,7 @@ class ReceiveBlockView(APIView):
 
 class NodeStatusView(APIView):
     """API endpoint to get the node status"""
+    authentication_classes = PEER_AUTHENTICATION_CLASSES
     
     def get(self, request):
         # Get basic blockchain statistics
@@ -42,14 +42,14 @@ class ConsensusManager:
         if not transaction_hashes:
             return hashlib.sha256("empty_tree".encode()).hexdigest()
             
-        # If odd number of transactions, duplicate the last one
-        if len(transaction_hashes) % 2 != 0:
-            transaction_hashes.append(transaction_hashes[-1])
-            
         # Base case: if only one hash, return it
         if len(transaction_hashes) == 1:
             return transaction_hashes[0]
             
+        # If odd number of transactions, duplicate the last one
+        if len(transaction_hashes) % 2 != 0:
+            transaction_hashes.append(transaction_hashes[-1])
+            
         # Recursively hash pairs of transactions
         new_hashes = []
         for i in range(0, len(transaction_hashes), 2):
@@ -68,10 +68,6 @@ class ConsensusManager:
         """
         if not transaction_hashes:
             return []
-            
-        # If odd number of transactions, duplicate the last one
-        if len(transaction_hashes) % 2 != 0:
-            transaction_hashes.append(transaction_hashes[-1])
         
         # Find the index of the target hash
         target_index = None
@@ -88,6 +84,10 @@ class ConsensusManager:
         current_index = target_index
         
         while len(transaction_hashes) > 1:
+            # If odd number of hashes on this level, duplicate the last one (as generate_merkle_root does)
+            if len(transaction_hashes) % 2 != 0:
+                transaction_hashes = transaction_hashes + [transaction_hashes[-1]]
+            
             # Determine if current_index is left or right in its pair
             is_left = current_index % 2 == 0
             
@@ -1,15 +1,20 @@
 import json
 import logging
 import hashlib
-import requests
 import time
 import threading
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 
-from blockchain.models import Block, Blockchain, VoteTransaction, BlockchainAuditLog
+from blockchain.models import Block, Blockchain, VoteTransaction
+from blockchain.audit import audit_log
 from blockchain.utils import ProofOfWork, HashUtils
+from blockchain.pagination import invalidate_block_pages, invalidate_pages
+from india_blockchain_voting.lazy import lazy_import
+
+# Only needed when talking to peers
+requests = lazy_import('requests')
 
 logger = logging.getLogger(__name__)
 
@@ -159,6 +164,7 @@ class BlockchainNode:
                 return False, "Invalid proof of work"
                 
             # The block is valid, add it to the chain
+            start_time = time.perf_counter()
             with transaction.atomic():
                 new_block = Block.objects.create(
                     index=block_data['index'],
@@ -177,7 +183,7 @@ class BlockchainNode:
                 blockchain.save()
                 
                 # Log this action
-                BlockchainAuditLog.objects.create(
+                audit_log.record(
                     action="RECEIVE_BLOCK",
                     block=new_block,
                     blockchain=blockchain,
@@ -185,7 +191,7 @@ class BlockchainNode:
                     actor_id=self.node_id,
                     details={"source": "p2p_network"},
                     success=True,
-                    execution_time=0.0
+                    execution_time=time.perf_counter() - start_time
                 )
                 
             return True, "Block added successfully"
@@ -233,6 +239,7 @@ class BlockchainNode:
                     
         # Replace our chain if a longer valid one was found
         if new_chain and max_length > 0:
+            start_time = time.perf_counter()
             with transaction.atomic():
                 # Delete all existing blocks
                 Block.objects.filter(blockchain=target_blockchain).delete()
@@ -255,15 +262,20 @@ class BlockchainNode:
                 target_blockchain.latest_hash = new_chain[-1]['hash']
                 target_blockchain.save()
                 
+                # Replaced blocks (and their transactions) invalidate cached listing pages
+                chain_id = target_blockchain.id
+                transaction.on_commit(lambda: invalidate_block_pages(chain_id))
+                transaction.on_commit(lambda: invalidate_pages('transactions'))
+                
                 # Log this action
-                BlockchainAuditLog.objects.create(
+                audit_log.record(
                     action="RESOLVE_CONFLICTS",
                     blockchain=target_blockchain,
                     actor_type="node",
                     actor_id=self.node_id,
                     details={"replaced_blocks": max_length},
                     success=True,
-                    execution_time=0.0
+                    execution_time=time.perf_counter() - start_time
                 )
                 
             return True
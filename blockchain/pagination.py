@@ -0,0 +1,166 @@
+"""
+Keyset (cursor) pagination for append-only blockchain tables.
+
+Offset slicing makes the database walk and discard every earlier row, so deep
+pages of a long chain get slower and slower. Keyset pagination seeks straight
+to the last row of the previous page using an index on the ordering columns.
+
+Because blocks and vote transactions are append-only, a page whose rows can no
+longer change ("sealed") is cached by cursor. Anything that does rewrite
+history (chain validation flags, conflict resolution) bumps the page namespace
+version instead of deleting keys one by one. Sealed pages still expire after
+KEYSET_PAGE_CACHE_TTL seconds: that bounds the cache, since cursors and limits
+come from clients, and bounds how long a row committed out of key order
+(concurrent writers, peer sync) can be missing from a cached page. Only
+cursors that point at an existing row are cached, so made-up cursors never
+reach the cache.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that cannot be decoded"""
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by a unique, descending or ascending key.
+
+    `keys` are ordering expressions such as ('-index', '-id'); all keys must
+    share one direction and together identify a row uniquely.
+    """
+
+    def __init__(self, queryset, keys, limit=100, max_limit=500):
+        self.queryset = queryset
+        self.keys = [key.lstrip('-') for key in keys]
+        self.descending = keys[0].startswith('-')
+        self.ordering = list(keys)
+        self.limit = max(1, min(int(limit), max_limit))
+
+    def encode_cursor(self, row):
+        """Encode the key values of a row (model instance or dict) as an opaque cursor"""
+        values = [
+            row[key] if isinstance(row, dict) else getattr(row, key)
+            for key in self.keys
+        ]
+        raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Decode a cursor back into typed key values"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if len(values) != len(self.keys):
+                raise ValueError("cursor key count mismatch")
+            return [
+                self._key_field(key).to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except Exception as e:
+            raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+    def cursor_row_exists(self, cursor):
+        """Whether a cursor points at a row that exists, rather than one a client made up"""
+        values = self.decode_cursor(cursor)
+        return self.queryset.filter(**dict(zip(self.keys, values))).exists()
+
+    def _key_field(self, key):
+        """Model field behind a key: an annotation, a field or a related field path"""
+        annotation = self.queryset.query.annotations.get(key)
+        if annotation is not None:
+            return annotation.output_field
+        model = self.queryset.model
+        *path, name = key.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        return model._meta.get_field(name)
+
+    def _after(self, values):
+        """Build the row-value comparison (k1, k2, ...) < / > (v1, v2, ...)"""
+        lookup = 'lt' if self.descending else 'gt'
+        condition = Q()
+        for i, key in enumerate(self.keys):
+            term = Q(**{f"{key}__{lookup}": values[i]})
+            for prev_key, prev_value in zip(self.keys[:i], values[:i]):
+                term &= Q(**{prev_key: prev_value})
+            condition |= term
+        return condition
+
+    def page(self, cursor=None):
+        """
+        Return one page as a dict with `items`, `next_cursor` and `has_next`.
+        Fetches one extra row to learn whether a next page exists.
+        """
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+
+        rows = list(queryset[:self.limit + 1])
+        has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+
+        return {
+            'items': rows,
+            'has_next': has_next,
+            'next_cursor': self.encode_cursor(rows[-1]) if has_next else None,
+        }
+
+    def is_sealed(self, cursor, page):
+        """
+        Whether a page can never change again as rows are appended.
+        Newest-first pages are sealed once they start from a cursor (new rows
+        only land on the head page); oldest-first pages are sealed once a
+        later page exists.
+        """
+        if self.descending:
+            return cursor is not None
+        return page['has_next']
+
+
+def _version_key(namespace):
+    return f"keyset:{namespace}:version"
+
+
+def invalidate_pages(namespace):
+    """Drop every cached page of a namespace by moving to a new version"""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 1, None)
+
+
+def cached_page(paginator, cursor, namespace, serialize, sealable=True):
+    """
+    Return a serialized page, served from cache when it is sealed.
+    `serialize` turns one queryset row into a cacheable dict. Pass
+    sealable=False when rows are not appended in key order (e.g. blocks of
+    several chains ordered by index), so no page is ever sealed.
+    """
+    version = cache.get_or_set(_version_key(namespace), 1, None)
+    key = f"keyset:{namespace}:v{version}:{paginator.limit}:{cursor or 'head'}"
+
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    page = paginator.page(cursor)
+    result = {
+        'items': [serialize(row) for row in page['items']],
+        'has_next': page['has_next'],
+        'next_cursor': page['next_cursor'],
+    }
+    if sealable and paginator.is_sealed(cursor, page) and (cursor is None or paginator.cursor_row_exists(cursor)):
+        cache.set(key, result, getattr(settings, 'KEYSET_PAGE_CACHE_TTL', 300))
+    return result
+
+
+def invalidate_block_pages(blockchain_id):
+    """Drop cached explorer pages after a chain's existing blocks were rewritten"""
+    for namespace in (f"blocks:{blockchain_id}:asc", f"blocks:{blockchain_id}:desc"):
+        invalidate_pages(namespace)
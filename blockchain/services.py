@@ -9,7 +9,9 @@ from django.db import transaction
 from django.core.exceptions import PermissionDenied
 from django.utils import timezone
 
-from .models import Blockchain, Block, VoteTransaction, BlockchainAuditLog
+from .models import Blockchain, Block, VoteTransaction
+from .audit import audit_log
+from reports.instrumentation import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -34,8 +36,9 @@ class BlockchainVotingService:
             )
             
             # Create genesis block
-            start_time = time.time()
+            start_time = time.perf_counter()
             genesis_block = Block.objects.create(
+                blockchain=blockchain,
                 index=0,
                 data={"type": "genesis", "election_id": election.election_id, "created_at": timezone.now().isoformat()},
                 previous_hash="0",
@@ -43,10 +46,10 @@ class BlockchainVotingService:
                 nonce=0,
                 is_valid=True
             )
-            end_time = time.time()
+            end_time = time.perf_counter()
             
             # Log the action
-            BlockchainAuditLog.objects.create(
+            audit_log.record(
                 action="CREATE_BLOCK",
                 block=genesis_block,
                 blockchain=blockchain,
@@ -70,7 +73,10 @@ class BlockchainVotingService:
         
         with transaction.atomic():
             # Start timing
-            start_time = time.time()
+            start_time = time.perf_counter()
+            
+            # Re-read the chain head under lock so concurrent votes append in order
+            blockchain = Blockchain.objects.select_for_update().get(pk=blockchain.pk)
             
             # Get latest block
             latest_block = blockchain.get_latest_block()
@@ -79,6 +85,7 @@ class BlockchainVotingService:
             
             # Create new block
             new_block = Block(
+                blockchain=blockchain,
                 index=blockchain.total_blocks + 1,
                 data=vote_data,
                 previous_hash=latest_block.hash,
@@ -88,7 +95,13 @@ class BlockchainVotingService:
             
             # Mine the block
             new_block.mine_block(blockchain.difficulty)
+            new_block.is_valid = new_block.is_hash_valid()
             new_block.save()
+            
+            # Advance the chain head
+            blockchain.latest_hash = new_block.hash
+            blockchain.total_blocks += 1
+            blockchain.save(update_fields=['latest_hash', 'total_blocks', 'updated_at'])
 
             # Generate digital receipt (hash of transaction + server secret)
             import hashlib
@@ -98,23 +111,23 @@ class BlockchainVotingService:
             digital_receipt = hashlib.sha256(receipt_source.encode()).hexdigest()
 
             # Create transaction record
-            transaction = VoteTransaction.objects.create(
+            vote_transaction = VoteTransaction.objects.create(
                 block=new_block,
                 voter_id=voter_hash,  # This is a hash, not the actual voter ID
                 transaction_hash=new_block.hash,
                 constituency_code=vote_data.get("constituency_id", ""),
                 is_confirmed=True,
                 ip_address=ip_address,
-                user_agent=user_agent,
+                user_agent=user_agent or "",
                 geolocation=geolocation,
                 digital_receipt=digital_receipt
             )
             
             # End timing
-            end_time = time.time()
+            end_time = time.perf_counter()
             
             # Log the action
-            BlockchainAuditLog.objects.create(
+            audit_log.record(
                 action="ADD_TRANSACTION",
                 block=new_block,
                 blockchain=blockchain,
@@ -124,8 +137,9 @@ class BlockchainVotingService:
                 success=True,
                 execution_time=end_time - start_time
             )
+            metrics.observe('VOTE_PROCESSING_TIME', end_time - start_time)
             
-            return new_block, transaction
+            return new_block, vote_transaction
             
     @staticmethod
     def verify_vote(transaction_hash, voter_hash):
@@ -164,10 +178,12 @@ class BlockchainVotingService:
         """Validate the entire blockchain"""
         try:
             blockchain = Blockchain.objects.get(id=blockchain_id)
+            start_time = time.perf_counter()
             is_valid = blockchain.is_chain_valid()
+            execution_time = time.perf_counter() - start_time
             
             # Log validation attempt
-            BlockchainAuditLog.objects.create(
+            audit_log.record(
                 action="VALIDATE_CHAIN",
                 blockchain=blockchain,
                 actor_type="system",
@@ -175,7 +191,7 @@ class BlockchainVotingService:
                 details={"is_valid": is_valid},
                 success=is_valid,
                 error_message="" if is_valid else "Invalid blockchain",
-                execution_time=0.0
+                execution_time=execution_time
             )
             
             return is_valid
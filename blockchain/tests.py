@@ -1,3 +1,363 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection
+from django.core.cache import cache
+from cryptography.fernet import InvalidToken
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users.tests import create_voter
+
+from . import integrity
+from .audit import AuditLogSink, audit_log
+from .models import Blockchain, Block, VoteTransaction, BlockchainAuditLog, AuditLogBucket
+from . import pagination
+from .pagination import KeysetPaginator, invalidate_block_pages
+from .utils import AuditUtils, CryptographyUtils
+from .services import BlockchainVotingService
+
+
+@unittest.skipUnless(
+    connection.vendor == 'sqlite' and getattr(settings, 'SQLITE_PERFORMANCE_MODE', False),
+    "Run with SQLITE_PERFORMANCE_MODE=True to stress the SQLite performance profile"
+)
+class SQLiteConcurrentVoteStressTest(TransactionTestCase):
+    """Concurrent votes against the WAL profile must neither lock nor fork the chain"""
+    THREADS = 8
+    VOTES_PER_THREAD = 5
+
+    def setUp(self):
+        genesis_hash = hashlib.sha256(b"genesis-stress").hexdigest()
+        self.blockchain = Blockchain.objects.create(
+            name="Stress-Chain",
+            genesis_hash=genesis_hash,
+            latest_hash=genesis_hash,
+            election_id="STRESS",
+            difficulty=1
+        )
+        Block.objects.create(
+            index=0,
+            data={"type": "genesis", "election_id": "STRESS"},
+            previous_hash="0",
+            hash=genesis_hash
+        )
+
+    def test_concurrent_votes(self):
+        errors = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def cast_votes(worker):
+            try:
+                barrier.wait()
+                for n in range(self.VOTES_PER_THREAD):
+                    voter_hash = hashlib.sha256(f"voter-{worker}-{n}".encode()).hexdigest()
+                    BlockchainVotingService.record_vote(
+                        self.blockchain,
+                        voter_hash,
+                        {"election_id": "STRESS", "constituency_id": "1", "candidate_id": worker}
+                    )
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=cast_votes, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+        total_votes = self.THREADS * self.VOTES_PER_THREAD
+        self.blockchain.refresh_from_db()
+        self.assertEqual(self.blockchain.total_blocks, total_votes)
+        self.assertEqual(VoteTransaction.objects.count(), total_votes)
+
+        # Every vote extends the previous head: one linear chain, no forks
+        blocks = list(Block.objects.order_by('index').values_list('index', 'hash', 'previous_hash'))
+        self.assertEqual([index for index, _, _ in blocks], list(range(total_votes + 1)))
+        for (_, previous_hash, _), (_, _, linked_hash) in zip(blocks, blocks[1:]):
+            self.assertEqual(linked_hash, previous_hash)
+
+        # Buffered audit entries land in one flush, each with a measured duration
+        audit_log.flush()
+        audit_rows = BlockchainAuditLog.objects.filter(action="ADD_TRANSACTION")
+        self.assertEqual(audit_rows.count(), total_votes)
+        self.assertFalse(audit_rows.filter(execution_time=0.0).exists())
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+
+
+class BlockListPageCacheTest(TestCase):
+    """Sealed block pages are cached until invalidated, and only for a single chain"""
+
+    def setUp(self):
+        cache.clear()
+        self.chains = [
+            Blockchain.objects.create(
+                name=f"Chain-{n}", genesis_hash=f"{n}" * 64, latest_hash=f"{n}" * 64, election_id=f"E{n}"
+            )
+            for n in range(2)
+        ]
+        self.client.force_login(create_voter())
+
+    def add_blocks(self, chain, indices):
+        for index in indices:
+            Block.objects.create(
+                blockchain=chain, index=index, data={}, previous_hash="0",
+                hash=hashlib.sha256(f"{chain.id}-{index}".encode()).hexdigest()
+            )
+
+    def fetch(self, cursor=None, **params):
+        params = {'limit': 2, **params, **({'cursor': cursor} if cursor else {})}
+        response = self.client.get(reverse('blockchain:api_blocks'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_sealed_page_is_refreshed_after_invalidation(self):
+        chain = self.chains[0]
+        self.add_blocks(chain, range(4))
+        cursor = self.fetch(blockchain_id=chain.id)['next_cursor']
+        self.assertTrue(all(block['is_valid'] for block in self.fetch(cursor, blockchain_id=chain.id)['blocks']))
+
+        Block.objects.filter(blockchain=chain).update(is_valid=False)
+        self.assertTrue(all(block['is_valid'] for block in self.fetch(cursor, blockchain_id=chain.id)['blocks']))
+
+        invalidate_block_pages(chain.id)
+        self.assertFalse(any(block['is_valid'] for block in self.fetch(cursor, blockchain_id=chain.id)['blocks']))
+
+    def sealed_page_writes(self, cursor, chain):
+        with mock.patch.object(pagination.cache, 'set', wraps=pagination.cache.set) as cache_set:
+            self.fetch(cursor, blockchain_id=chain.id)
+        return [call for call in cache_set.call_args_list if ':v' in call.args[0]]
+
+    @override_settings(KEYSET_PAGE_CACHE_TTL=120)
+    def test_sealed_pages_expire(self):
+        chain = self.chains[0]
+        self.add_blocks(chain, range(4))
+        cursor = self.fetch(blockchain_id=chain.id)['next_cursor']
+        [write] = self.sealed_page_writes(cursor, chain)
+        self.assertEqual(write.args[2], 120)
+
+    def test_made_up_cursors_are_not_cached(self):
+        chain = self.chains[0]
+        self.add_blocks(chain, range(4))
+        paginator = KeysetPaginator(Block.objects.all(), ('-index', '-id'))
+        for index in range(1000, 1005):
+            cursor = paginator.encode_cursor({'index': index, 'id': 10 ** 6 + index})
+            self.assertEqual(self.sealed_page_writes(cursor, chain), [])
+
+    def test_all_chains_pages_see_blocks_appended_to_another_chain(self):
+        self.add_blocks(self.chains[0], range(10, 14))
+        cursor = self.fetch()['next_cursor']
+        self.assertEqual([block['index'] for block in self.fetch(cursor)['blocks']], [11, 10])
+
+        # A shorter chain's new head sorts below the first chain's blocks
+        self.add_blocks(self.chains[1], [11])
+        self.assertEqual(
+            [(block['index'], block['hash']) for block in self.fetch(cursor)['blocks']][0],
+            (11, hashlib.sha256(f"{self.chains[1].id}-11".encode()).hexdigest())
+        )
+
+
+class AuditReportRollupTest(TestCase):
+    """Audit summaries from hourly buckets plus raw edges match a count over raw rows"""
+
+    def setUp(self):
+        self.blockchain = Blockchain.objects.create(
+            name="Audit-Chain", genesis_hash="a" * 64, latest_hash="a" * 64, election_id="AUDIT"
+        )
+        self.start = datetime(2026, 3, 1, 8, 0, tzinfo=dt_timezone.utc)
+        # Every 10 minutes over six hours, failing every fourth entry
+        for n in range(36):
+            BlockchainAuditLog.objects.create(
+                action='ADD_TRANSACTION' if n % 3 else 'VALIDATE_CHAIN', blockchain=self.blockchain,
+                actor_type='voter', actor_id=str(n), details={}, success=n % 4 != 0, execution_time=0.5,
+            )
+        for n, log in enumerate(BlockchainAuditLog.objects.order_by('id')):
+            BlockchainAuditLog.objects.filter(id=log.id).update(timestamp=self.start + timedelta(minutes=10 * n + 5))
+        AuditUtils.rollup_audit_buckets(self.start, self.start + timedelta(hours=6))
+
+    def expected(self, start, end):
+        logs = BlockchainAuditLog.objects.filter(timestamp__gte=start, timestamp__lte=end)
+        return {
+            'total_operations': logs.count(),
+            'failed_operations': logs.filter(success=False).count(),
+            'operations_by_type': {
+                action: logs.filter(action=action).count()
+                for action in ('ADD_TRANSACTION', 'VALIDATE_CHAIN') if logs.filter(action=action).exists()
+            },
+        }
+
+    def test_ranges_with_partial_hours_match_raw_counts(self):
+        ranges = [
+            (self.start, self.start + timedelta(hours=6)),
+            (self.start + timedelta(minutes=25), self.start + timedelta(hours=4, minutes=35)),
+            (self.start + timedelta(hours=2, minutes=10), self.start + timedelta(hours=2, minutes=50)),
+        ]
+        for start, end in ranges:
+            report = AuditUtils.generate_audit_report(self.blockchain, start, end)
+            self.assertEqual(
+                {key: report[key] for key in ('total_operations', 'failed_operations', 'operations_by_type')},
+                self.expected(start, end),
+                (start, end)
+            )
+            self.assertEqual(report['total_execution_time'], 0.5 * report['total_operations'])
+
+    def test_rollup_overwrites_buckets_written_by_another_rollup(self):
+        buckets = AuditLogBucket.objects.filter(blockchain=self.blockchain)
+        expected = sorted(buckets.values_list('bucket_start', 'action', 'success', 'count'))
+        # Another process's rollup left a bucket behind with a different count, and one whose logs are gone
+        buckets.filter(pk=buckets.first().pk).update(count=999)
+        AuditLogBucket.objects.create(
+            blockchain=self.blockchain, bucket_start=self.start, action='CREATE_BLOCK',
+            actor_type='system', success=True, count=1,
+        )
+
+        AuditUtils.rollup_audit_buckets(self.start, self.start + timedelta(hours=6))
+        self.assertEqual(sorted(buckets.values_list('bucket_start', 'action', 'success', 'count')), expected)
+
+
+class IntegrityScanTest(TestCase):
+    """A full scan finds tampered blocks and brings the stored validity flags in line"""
+
+    def setUp(self):
+        cache.clear()
+        self.blockchain = Blockchain.objects.create(
+            name="Scan-Chain", genesis_hash="0" * 64, latest_hash="0" * 64, election_id="SCAN"
+        )
+        previous_hash = "0" * 64
+        self.blocks = []
+        for index in range(5):
+            block = Block(
+                blockchain=self.blockchain, index=index, timestamp=timezone.now(),
+                data={'votes': index}, previous_hash=previous_hash
+            )
+            block.hash = previous_hash = block.calculate_hash()
+            block.save()
+            self.blocks.append(block)
+        Blockchain.objects.filter(id=self.blockchain.id).update(latest_hash=previous_hash)
+        self.blockchain.refresh_from_db()
+
+    def test_intact_chain_is_healthy(self):
+        result = integrity.full_scan(self.blockchain, workers=1)
+        self.assertEqual(result['status'], 'HEALTHY')
+        self.assertEqual(result['valid_blocks'], 5)
+        self.assertEqual(integrity.scan_result(self.blockchain), result)
+
+    def test_tampered_block_is_flagged_and_stored(self):
+        Block.objects.filter(id=self.blocks[2].id).update(data={'votes': 999})
+        result = integrity.full_scan(self.blockchain, workers=1)
+
+        self.assertEqual(result['status'], 'COMPROMISED')
+        self.assertEqual(result['invalid_hash_block_ids'], [self.blocks[2].id])
+        self.assertEqual(result['broken_link_block_ids'], [])
+        self.assertEqual(integrity.stored_integrity(self.blockchain.id)['valid_blocks'], 4)
+        self.assertFalse(Block.objects.get(id=self.blocks[2].id).is_valid)
+
+    def test_small_chunks_are_collected_while_reading(self):
+        Block.objects.filter(id__in=[self.blocks[0].id, self.blocks[4].id]).update(nonce=7)
+        with mock.patch.object(integrity, 'CHUNK_SIZE', 1), \
+                mock.patch.object(integrity, 'wait', wraps=integrity.wait) as wait:
+            result = integrity.full_scan(self.blockchain, workers=1)
+        # One worker keeps at most two chunks in flight, so five chunks cannot all be queued at once
+        self.assertTrue(wait.called)
+        self.assertEqual(result['invalid_hash_block_ids'], sorted([self.blocks[0].id, self.blocks[4].id]))
+
+    def test_scan_result_is_keyed_by_chain_tip(self):
+        integrity.full_scan(self.blockchain, workers=1)
+        self.blockchain.latest_hash = "f" * 64
+        self.assertIsNone(integrity.scan_result(self.blockchain))
+
+
+class BatchEncryptionTest(SimpleTestCase):
+    """encrypt_many/decrypt_many round-trip and stay compatible with the single-value helpers"""
+
+    def setUp(self):
+        self.key = CryptographyUtils.generate_key()
+        self.values = [{'candidate_id': n, 'constituency': 'C1'} for n in range(5)] + ['text', 42, None]
+
+    def test_round_trip_with_str_and_bytes_keys(self):
+        tokens = CryptographyUtils.encrypt_many(self.values, self.key)
+        self.assertEqual(CryptographyUtils.decrypt_many(tokens, self.key.decode()), self.values)
+        self.assertEqual([CryptographyUtils.decrypt_data(token, self.key) for token in tokens], self.values)
+
+        single = CryptographyUtils.encrypt_data(self.values[0], self.key.decode())
+        self.assertEqual(CryptographyUtils.decrypt_many([single], self.key), [self.values[0]])
+
+    def test_empty_and_foreign_tokens(self):
+        foreign = CryptographyUtils.encrypt_many(['secret'], CryptographyUtils.generate_key())[0]
+        tokens = ['', CryptographyUtils.encrypt_many(['kept'], self.key)[0], foreign]
+
+        self.assertEqual(CryptographyUtils.decrypt_many(tokens, self.key, strict=False), [None, 'kept', None])
+        with self.assertRaises(InvalidToken):
+            CryptographyUtils.decrypt_many(tokens, self.key)
+
+    def test_rows_use_their_own_keys(self):
+        other_key = CryptographyUtils.generate_key()
+        rows = [
+            (self.key, CryptographyUtils.encrypt_many(['a', 'b'], self.key)),
+            (other_key, CryptographyUtils.encrypt_many(['c'], other_key)),
+        ]
+        self.assertEqual(CryptographyUtils.decrypt_rows(rows), [['a', 'b'], ['c']])
+
+
+class AuditSpoolTest(TestCase):
+    """Spooled audit entries survive a restart that reuses the pid, and are fsynced off the request path"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spool_dir = directory.name
+        self.blockchain = Blockchain.objects.create(
+            name="Spool-Chain", genesis_hash="b" * 64, latest_hash="b" * 64, election_id="SPOOL"
+        )
+        self.sink = AuditLogSink(buffer_size=100, flush_interval=0, spool_dir=self.spool_dir)
+        # Skip _start(): no flusher thread or atexit hook in tests
+        self.sink._started = True
+
+    def entry(self, actor_id):
+        return {
+            'action': 'ADD_TRANSACTION', 'blockchain_id': self.blockchain.id, 'block_id': None,
+            'actor_type': 'voter', 'actor_id': actor_id, 'details': {}, 'success': True,
+            'error_message': '', 'execution_time': 0.1, 'timestamp': timezone.now().isoformat(),
+        }
+
+    def write_orphan(self, name, actor_id):
+        with open(os.path.join(self.spool_dir, name), 'w') as f:
+            f.write(json.dumps(self.entry(actor_id)) + "\n")
+
+    def test_orphan_with_our_pid_is_recovered_not_deleted(self):
+        self.write_orphan(f"audit-spool-{os.getpid()}.jsonl", 'legacy')
+        self.write_orphan(f"audit-spool-{os.getpid()}-0000dead.jsonl", 'previous')
+
+        self.sink._recover_orphans()
+        self.sink._enqueue(self.entry('current'))
+        self.assertEqual(os.listdir(self.spool_dir), [os.path.basename(self.sink.spool_path)])
+
+        self.assertEqual(self.sink.flush(), 3)
+        self.assertEqual(
+            sorted(BlockchainAuditLog.objects.values_list('actor_id', flat=True)), ['current', 'legacy', 'previous']
+        )
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_entries_are_fsynced_by_the_flusher_not_on_enqueue(self):
+        with mock.patch('blockchain.audit.os.fsync') as fsync:
+            self.sink._enqueue(self.entry('one'))
+            self.sink._enqueue(self.entry('two'))
+            fsync.assert_not_called()
+            self.sink._sync_spool()
+            self.sink._sync_spool()
+        self.assertEqual(fsync.call_count, 1)
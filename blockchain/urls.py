@@ -7,17 +7,20 @@ app_name = 'blockchain'
 
 urlpatterns = [
     # Blockchain API endpoints
-    path('api/blocks/', views_new.BlockListView.as_view(), name='api_blocks'),
-    path('api/blocks/<int:block_id>/', views_new.BlockDetailView.as_view(), name='api_block_detail'),
+    path('api/blocks/', views.BlockListView.as_view(), name='api_blocks'),
+    path('api/blocks/<int:block_id>/', views.BlockDetailView.as_view(), name='api_block_detail'),
     path('api/chain/', views_new.ChainView.as_view(), name='api_chain'),
     path('api/validate/', views_new.ValidateChainView.as_view(), name='api_validate'),
+    path('api/integrity/<int:blockchain_id>/', views.IntegrityScanView.as_view(), name='api_integrity'),
     path('api/proof/<str:block_hash>/', views_new.ProofView.as_view(), name='api_proof'),
     
     # Mining endpoints
     path('api/mine/', views_new.MineBlockView.as_view(), name='api_mine'),
     
     # Audit endpoints
-    path('api/audit/', views_new.AuditLogView.as_view(), name='api_audit'),
+    path('api/audit/', views.AuditSummaryView.as_view(), name='api_audit'),
+    path('api/audit/export/', views.AuditLogExportView.as_view(), name='api_audit_export'),
+    path('api/transactions/export/', views.TransactionExportView.as_view(), name='api_transaction_export'),
     
     # P2P Network API endpoints
     path('api/network/nodes/', network_api.NodeListView.as_view(), name='nodes_list'),
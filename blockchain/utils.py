@@ -1,16 +1,31 @@
 import hashlib
 import json
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone as dt_timezone
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import serialization
+from cryptography.fernet import InvalidToken
+from functools import lru_cache
 import secrets
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Fernet objects kept per key (every voter has their own key)
+FERNET_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=FERNET_CACHE_SIZE)
+def _fernet(key):
+    return Fernet(key)
+
+
+def fernet_for(key):
+    """Cached Fernet for a key given as str or bytes"""
+    return _fernet(key.encode() if isinstance(key, str) else key)
+
 
 class CryptographyUtils:
     """Utility class for cryptographic operations"""
@@ -23,16 +38,49 @@ class CryptographyUtils:
     @staticmethod
     def encrypt_data(data, key):
         """Encrypt data using Fernet symmetric encryption"""
-        f = Fernet(key)
+        f = fernet_for(key)
         return f.encrypt(json.dumps(data).encode()).decode()
     
     @staticmethod
     def decrypt_data(encrypted_data, key):
         """Decrypt data using Fernet symmetric encryption"""
-        f = Fernet(key)
+        f = fernet_for(key)
         decrypted_bytes = f.decrypt(encrypted_data.encode())
         return json.loads(decrypted_bytes.decode())
     
+    @staticmethod
+    def encrypt_many(values, key):
+        """Encrypt a list of JSON-serialisable values under one key"""
+        f = fernet_for(key)
+        dumps = json.dumps
+        return [f.encrypt(dumps(value).encode()).decode() for value in values]
+    
+    @staticmethod
+    def decrypt_many(tokens, key, strict=True):
+        """
+        Decrypt a list of tokens made with one key. Empty tokens give None, as
+        do undecryptable ones unless strict.
+        """
+        f = fernet_for(key)
+        loads = json.loads
+        values = []
+        for token in tokens:
+            if not token:
+                values.append(None)
+                continue
+            try:
+                values.append(loads(f.decrypt(token.encode())))
+            except InvalidToken:
+                if strict:
+                    raise
+                values.append(None)
+        return values
+    
+    @staticmethod
+    def decrypt_rows(rows, strict=True):
+        """Decrypt (key, [tokens]) rows, each under its own key, e.g. one row per voter"""
+        return [CryptographyUtils.decrypt_many(tokens, key, strict) for key, tokens in rows]
+    
     @staticmethod
     def generate_rsa_keypair():
         """Generate RSA public/private key pair"""
@@ -340,10 +388,10 @@ class AuditUtils:
     
     @staticmethod
     def log_blockchain_operation(action, blockchain, actor_type, actor_id, details, success=True, execution_time=0.0, error_message=""):
-        """Log blockchain operation for audit"""
-        from .models import BlockchainAuditLog
+        """Log blockchain operation for audit (buffered, see blockchain.audit)"""
+        from .audit import audit_log
         
-        BlockchainAuditLog.objects.create(
+        audit_log.record(
             action=action,
             blockchain=blockchain,
             actor_type=actor_type,
@@ -355,28 +403,144 @@ class AuditUtils:
         )
     
     @staticmethod
-    def generate_audit_report(blockchain, start_date=None, end_date=None):
-        """Generate audit report for blockchain"""
-        from .models import BlockchainAuditLog
+    def summarize_audit_rows(rows):
+        """Fold grouped (action, actor_type, success, count, total_time) rows into a summary"""
+        summary = {
+            'total_operations': 0,
+            'successful_operations': 0,
+            'failed_operations': 0,
+            'operations_by_type': {},
+            'operations_by_actor': {},
+            'total_execution_time': 0.0,
+        }
+        for row in rows:
+            count = row['count']
+            summary['total_operations'] += count
+            summary['successful_operations' if row['success'] else 'failed_operations'] += count
+            summary['operations_by_type'][row['action']] = summary['operations_by_type'].get(row['action'], 0) + count
+            summary['operations_by_actor'][row['actor_type']] = summary['operations_by_actor'].get(row['actor_type'], 0) + count
+            summary['total_execution_time'] += row['total_time'] or 0.0
         
-        logs = BlockchainAuditLog.objects.filter(blockchain=blockchain)
+        total = summary['total_operations']
+        summary['average_execution_time'] = summary['total_execution_time'] / total if total else 0.0
+        return summary
+    
+    @staticmethod
+    def grouped_audit_rows(logs):
+        """One GROUP BY over raw audit logs"""
+        from django.db.models import Count, Sum
         
+        return logs.order_by().values('action', 'actor_type', 'success').annotate(
+            count=Count('id'),
+            total_time=Sum('execution_time')
+        )
+    
+    @staticmethod
+    def utc_hour(value):
+        """
+        Start of the UTC hour containing `value`. Buckets are UTC hours: local
+        hours in a half-hour-offset TIME_ZONE (Asia/Kolkata) would not line
+        up with the whole-hour ranges reports read them by.
+        """
+        from django.utils import timezone
+        
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    
+    @staticmethod
+    def rollup_audit_buckets(start, end, blockchain=None):
+        """
+        Recompute the hourly AuditLogBucket rows covering [start, end].
+        Recomputing whole hours keeps the rollup idempotent. Buckets are
+        upserted rather than deleted and recreated, so rollups running at the
+        same time in other processes cannot collide on the unique key.
+        """
+        from django.db import transaction
+        from django.db.models import Count, Sum
+        from django.db.models.functions import TruncHour
+        from .models import BlockchainAuditLog, AuditLogBucket
+        
+        start = AuditUtils.utc_hour(start)
+        end = AuditUtils.utc_hour(end) + timedelta(hours=1)
+        
+        logs = BlockchainAuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        buckets = AuditLogBucket.objects.filter(bucket_start__gte=start, bucket_start__lt=end)
+        if blockchain is not None:
+            logs = logs.filter(blockchain=blockchain)
+            buckets = buckets.filter(blockchain=blockchain)
+        
+        rows = logs.order_by().annotate(bucket_start=TruncHour('timestamp', tzinfo=dt_timezone.utc)).values(
+            'blockchain_id', 'bucket_start', 'action', 'actor_type', 'success'
+        ).annotate(count=Count('id'), total_execution_time=Sum('execution_time'))
+        rows = list(rows)
+        bucket_key = ('blockchain_id', 'bucket_start', 'action', 'actor_type', 'success')
+        keys = {tuple(row[field] for field in bucket_key) for row in rows}
+        
+        with transaction.atomic():
+            AuditLogBucket.objects.bulk_create(
+                [AuditLogBucket(**row) for row in rows],
+                update_conflicts=True,
+                unique_fields=['blockchain', 'bucket_start', 'action', 'actor_type', 'success'],
+                update_fields=['count', 'total_execution_time'],
+            )
+            # Groups whose logs are gone no longer have a bucket
+            stale = [
+                pk for pk, *key in buckets.values_list('pk', *bucket_key)
+                if tuple(key) not in keys
+            ]
+            if stale:
+                AuditLogBucket.objects.filter(pk__in=stale).delete()
+    
+    @staticmethod
+    def generate_audit_report(blockchain=None, start_date=None, end_date=None):
+        """
+        Generate audit report for a blockchain (or all chains).
+        
+        Whole hours inside the range are read from AuditLogBucket; only the
+        partial hours at either edge are aggregated from raw logs. Individual
+        log rows are not returned; use the streamed audit export for those.
+        Dates must be timezone-aware.
+        """
+        from django.db.models import Q, Sum
+        from .models import BlockchainAuditLog, AuditLogBucket
+        
+        logs = BlockchainAuditLog.objects.all()
+        buckets = AuditLogBucket.objects.all()
+        if blockchain is not None:
+            logs = logs.filter(blockchain=blockchain)
+            buckets = buckets.filter(blockchain=blockchain)
+        
+        # Whole hours [first_hour, last_hour) come from buckets
+        first_hour = last_hour = None
         if start_date:
-            logs = logs.filter(timestamp__gte=start_date)
+            first_hour = AuditUtils.utc_hour(start_date)
+            if first_hour < start_date:
+                first_hour += timedelta(hours=1)
+            buckets = buckets.filter(bucket_start__gte=first_hour)
         if end_date:
-            logs = logs.filter(timestamp__lte=end_date)
+            last_hour = AuditUtils.utc_hour(end_date)
+            buckets = buckets.filter(bucket_start__lt=last_hour)
         
-        return {
-            'total_operations': logs.count(),
-            'successful_operations': logs.filter(success=True).count(),
-            'failed_operations': logs.filter(success=False).count(),
-            'operations_by_type': {
-                action[0]: logs.filter(action=action[0]).count()
-                for action in BlockchainAuditLog.ACTION_CHOICES
-            },
-            'operations_by_actor': {},  # Can be expanded
-            'logs': list(logs.values())
-        }
+        if first_hour and last_hour and first_hour >= last_hour:
+            # Range inside one hour: raw rows only
+            rows = list(AuditUtils.grouped_audit_rows(
+                logs.filter(timestamp__gte=start_date, timestamp__lte=end_date)
+            ))
+        else:
+            rows = list(buckets.order_by().values('action', 'actor_type', 'success').annotate(
+                count=Sum('count'),
+                total_time=Sum('total_execution_time')
+            ))
+            edges = Q()
+            if start_date:
+                edges |= Q(timestamp__gte=start_date, timestamp__lt=first_hour)
+            if end_date:
+                edges |= Q(timestamp__gte=last_hour, timestamp__lte=end_date)
+            if start_date or end_date:
+                rows += list(AuditUtils.grouped_audit_rows(logs.filter(edges)))
+        
+        return AuditUtils.summarize_audit_rows(rows)
 
 
 class MerkleTree:
@@ -1,6 +1,8 @@
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
 from django.views import View
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
@@ -13,7 +15,27 @@ class APIView(View):
         return super().dispatch(request, *args, **kwargs)
 
 from .models import Block, Blockchain, VoteTransaction, BlockchainAuditLog
+from .pagination import KeysetPaginator, InvalidCursor, cached_page
+from .exports import export_response
+from . import integrity
 from .services import BlockchainVotingService
+from .utils import AuditUtils
+
+# Header columns served by the explorer listings; the JSON `data` payload is never loaded
+BLOCK_HEADER_FIELDS = ('id', 'index', 'timestamp', 'hash', 'previous_hash', 'nonce', 'is_valid')
+
+
+def serialize_block_header(block):
+    """Serialize the header columns of a block for explorer listings"""
+    return {
+        'id': block.id,
+        'index': block.index,
+        'timestamp': block.timestamp.isoformat(),
+        'hash': block.hash,
+        'previous_hash': block.previous_hash,
+        'nonce': block.nonce,
+        'is_valid': block.is_valid
+    }
 
 @login_required
 def blockchain_explorer(request):
@@ -42,16 +64,22 @@ def view_blockchain(request, blockchain_id):
     """View a specific blockchain"""
     blockchain = get_object_or_404(Blockchain, id=blockchain_id)
     
-    # Get blocks with pagination
-    blocks = Block.objects.filter(blockchain=blockchain).order_by('index')
-    paginator = Paginator(blocks, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Get block headers with keyset pagination (sealed pages are cached by cursor)
+    blocks = Block.objects.filter(blockchain=blockchain).only(*BLOCK_HEADER_FIELDS)
+    paginator = KeysetPaginator(blocks, ('index', 'id'), limit=20)
+    cursor = request.GET.get('cursor')
+    try:
+        page = cached_page(paginator, cursor, f"blocks:{blockchain.id}:asc", serialize_block_header)
+    except InvalidCursor:
+        cursor = None
+        page = cached_page(paginator, cursor, f"blocks:{blockchain.id}:asc", serialize_block_header)
     
     context = {
         'blockchain': blockchain,
-        'page_obj': page_obj,
-        'total_blocks': blocks.count(),
+        'blocks': page['items'],
+        'cursor': cursor,
+        'next_cursor': page['next_cursor'],
+        'total_blocks': blockchain.total_blocks,
     }
     return render(request, 'blockchain/view_blockchain.html', context)
 
@@ -66,7 +94,7 @@ def view_block(request, block_id):
     context = {
         'block': block,
         'transactions': transactions,
-        'is_valid': block.is_hash_valid(),
+        'is_valid': block.is_valid,
     }
     return render(request, 'blockchain/view_block.html', context)
 
@@ -102,30 +130,33 @@ def validate_blockchain(request, blockchain_id):
 
 # API Views
 class BlockListView(APIView):
-    """Block List API"""
+    """Block List API (newest first, keyset-paginated by index)"""
     def get(self, request):
         blockchain_id = request.GET.get('blockchain_id')
-        limit = int(request.GET.get('limit', 100))
         
-        blocks_query = Block.objects.all().order_by('-index')
+        blocks_query = Block.objects.only(*BLOCK_HEADER_FIELDS)
         if blockchain_id:
             blocks_query = blocks_query.filter(blockchain_id=blockchain_id)
         
-        blocks = blocks_query[:limit]
+        try:
+            paginator = KeysetPaginator(blocks_query, ('-index', '-id'), limit=request.GET.get('limit', 100))
+            # Across chains a new block can sort below existing pages, so only one chain's pages seal
+            page = cached_page(
+                paginator,
+                request.GET.get('cursor'),
+                f"blocks:{blockchain_id or 'all'}:desc",
+                serialize_block_header,
+                sealable=bool(blockchain_id)
+            )
+        except (InvalidCursor, ValueError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
         
-        block_data = [{
-            'id': block.id,
-            'index': block.index,
-            'timestamp': block.timestamp.isoformat(),
-            'hash': block.hash,
-            'previous_hash': block.previous_hash,
-            'nonce': block.nonce,
-            'is_valid': block.is_hash_valid()
-        } for block in blocks]
+        block_data = page['items']
         
         return JsonResponse({
             'blocks': block_data,
-            'count': len(block_data)
+            'count': len(block_data),
+            'next_cursor': page['next_cursor']
         })
 
 class BlockDetailView(APIView):
@@ -135,7 +166,7 @@ class BlockDetailView(APIView):
             block = Block.objects.get(id=block_id)
             
             # Get transactions
-            transactions = VoteTransaction.objects.filter(block=block)
+            transactions = VoteTransaction.objects.filter(block=block).only('id', 'transaction_hash', 'timestamp')
             transaction_data = [{
                 'id': tx.id,
                 'transaction_hash': tx.transaction_hash,
@@ -151,7 +182,7 @@ class BlockDetailView(APIView):
                 'previous_hash': block.previous_hash,
                 'nonce': block.nonce,
                 'merkle_root': block.merkle_root,
-                'is_valid': block.is_hash_valid(),
+                'is_valid': block.is_valid,
                 'transactions': transaction_data
             }
             
@@ -182,3 +213,92 @@ class BlockchainDetailView(APIView):
             return JsonResponse(blockchain_data)
         except Blockchain.DoesNotExist:
             return JsonResponse({'error': 'Blockchain not found'}, status=404)
+
+# Columns written by the audit log export, in order
+AUDIT_EXPORT_FIELDS = (
+    'id', 'timestamp', 'blockchain_id', 'block_id', 'action', 'actor_type',
+    'actor_id', 'success', 'execution_time', 'error_message', 'details'
+)
+
+
+def _audit_range(request):
+    """Read blockchain_id/start/end filters shared by the audit endpoints"""
+    start = request.GET.get('start')
+    end = request.GET.get('end')
+    start = parse_datetime(start) if start else None
+    end = parse_datetime(end) if end else None
+    if start and timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    if end and timezone.is_naive(end):
+        end = timezone.make_aware(end)
+    return request.GET.get('blockchain_id'), start, end
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class AuditSummaryView(APIView):
+    """Audit summary for any time range, served from hourly buckets"""
+    def get(self, request):
+        blockchain_id, start, end = _audit_range(request)
+        blockchain = get_object_or_404(Blockchain, id=blockchain_id) if blockchain_id else None
+        
+        summary = AuditUtils.generate_audit_report(blockchain, start, end)
+        return JsonResponse(summary)
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class AuditLogExportView(APIView):
+    """Stream audit log rows as CSV or NDJSON, oldest first (see blockchain.exports)"""
+    def get(self, request):
+        blockchain_id, start, end = _audit_range(request)
+        
+        logs = BlockchainAuditLog.objects.values(*AUDIT_EXPORT_FIELDS)
+        if blockchain_id:
+            logs = logs.filter(blockchain_id=blockchain_id)
+        if start:
+            logs = logs.filter(timestamp__gte=start)
+        if end:
+            logs = logs.filter(timestamp__lte=end)
+        
+        return export_response(request, logs, AUDIT_EXPORT_FIELDS, 'audit_log', keys=('timestamp', 'id'))
+
+
+# Observer export of vote transactions: no voter ids, IPs, user agents or receipts
+TRANSACTION_EXPORT_FIELDS = (
+    'id', 'transaction_hash', 'block__index', 'block__hash', 'constituency_code',
+    'timestamp', 'is_confirmed', 'confirmation_count'
+)
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class TransactionExportView(APIView):
+    """Stream vote transactions of a chain (or all chains) as CSV or NDJSON, oldest first"""
+    def get(self, request):
+        blockchain_id, start, end = _audit_range(request)
+        
+        transactions = VoteTransaction.objects.values(*TRANSACTION_EXPORT_FIELDS)
+        if blockchain_id:
+            transactions = transactions.filter(block__blockchain_id=blockchain_id)
+        if start:
+            transactions = transactions.filter(timestamp__gte=start)
+        if end:
+            transactions = transactions.filter(timestamp__lte=end)
+        
+        return export_response(
+            request, transactions, TRANSACTION_EXPORT_FIELDS, 'vote_transactions', keys=('timestamp', 'id')
+        )
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class IntegrityScanView(APIView):
+    """Stored integrity of a chain (GET) and background full re-hash scans (POST)"""
+    def get(self, request, blockchain_id):
+        blockchain = get_object_or_404(Blockchain, id=blockchain_id)
+        return JsonResponse({
+            'integrity': integrity.stored_integrity(blockchain.id),
+            'full_scan': integrity.scan_result(blockchain)
+        })
+    
+    def post(self, request, blockchain_id):
+        blockchain = get_object_or_404(Blockchain, id=blockchain_id)
+        result = integrity.start_full_scan(blockchain)
+        return JsonResponse(result, status=202 if result['status'] == 'RUNNING' else 200)
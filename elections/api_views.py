@@ -1,86 +1,123 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Sum, Q, F
-from .models import Election, Party, ElectionResult, CandidateVoteCount
+from django.db.models import CharField, Count, Sum, Q, F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat, MD5, TruncHour
+from django.utils.crypto import salted_hmac
+from blockchain.exports import export_response
+from .models import Election, Party, ElectionResult, CandidateVoteCount, VoteRecord
+
+
+def _results_version_key(election_id):
+    return f"election_results:{election_id}:version"
+
+
+def results_version(election_id):
+    """Current result version of an election; bumped whenever its results change"""
+    return cache.get_or_set(_results_version_key(election_id), 1, None)
+
+
+def bump_results_version(election_id):
+    """Invalidate cached results of an election (see elections.signals)"""
+    try:
+        cache.incr(_results_version_key(election_id))
+    except ValueError:
+        cache.set(_results_version_key(election_id), 1, None)
 
 
 def election_results_api(request, election_id):
     """
-    API endpoint to get results for a specific election
+    API endpoint to get results for a specific election.
+    Built on three queries whatever the number of parties and constituencies,
+    and cached per (election, result version) for at most
+    ELECTION_RESULTS_CACHE_TTL seconds, so a change no signal saw (a bulk
+    update, a raw query) is still picked up.
     """
     election = get_object_or_404(Election, id=election_id)
-    
+
     # Check if the election has results
     if election.status not in ['COUNTING', 'COMPLETED']:
         return JsonResponse({
             'error': 'No results available for this election'
         }, status=400)
-    
-    # Get party results aggregated
-    party_results = []
-    parties = Party.objects.filter(
-        candidate__election=election
-    ).distinct()
-    
-    for party in parties:
-        # Count seats won and leading
-        seats_won = CandidateVoteCount.objects.filter(
-            election_result__election=election,
-            election_result__status='FINAL',
-            candidate__party=party,
-            rank=1
-        ).count()
-        
-        seats_leading = CandidateVoteCount.objects.filter(
-            election_result__election=election,
-            election_result__status='COUNTING',
-            candidate__party=party,
-            rank=1
-        ).count()
-        
-        party_results.append({
-            'name': party.name,
-            'abbreviation': party.abbreviation,
-            'symbol_url': party.symbol_image.url if party.symbol_image else None,
-            'color': party.party_color,
-            'seats_won': seats_won,
-            'seats_leading': seats_leading,
-            'total_seats': seats_won + seats_leading
-        })
-    
+
+    cache_key = f"election_results:{election.id}:v{results_version(election.id)}:{election.status}"
+    response_data = cache.get(cache_key)
+    if response_data is None:
+        response_data = {
+            'election': {
+                'name': election.name,
+                'status': election.get_status_display(),
+                'type': election.get_election_type_display()
+            },
+            'party_results': _party_results(election),
+            'constituency_results': _constituency_results(election)
+        }
+        cache.set(cache_key, response_data, getattr(settings, 'ELECTION_RESULTS_CACHE_TTL', 60))
+
+    return JsonResponse(response_data)
+
+
+def _party_results(election):
+    """Seats won and leading per party, in one grouped query"""
+    # Rank-1 vote counts of this election's candidates, split by result status
+    seat_filter = Q(
+        candidate__candidatevotecount__rank=1,
+        candidate__candidatevotecount__election_result__election=election
+    )
+    parties = Party.objects.filter(candidate__election=election).annotate(
+        seats_won=Count(
+            'candidate__candidatevotecount',
+            filter=seat_filter & Q(candidate__candidatevotecount__election_result__status='FINAL')
+        ),
+        seats_leading=Count(
+            'candidate__candidatevotecount',
+            filter=seat_filter & Q(candidate__candidatevotecount__election_result__status='COUNTING')
+        )
+    )
+
+    party_results = [{
+        'name': party.name,
+        'abbreviation': party.abbreviation,
+        'symbol_url': party.symbol_image.url if party.symbol_image else None,
+        'color': party.party_color,
+        'seats_won': party.seats_won,
+        'seats_leading': party.seats_leading,
+        'total_seats': party.seats_won + party.seats_leading
+    } for party in parties]
+
     # Sort by total seats in descending order
     party_results.sort(key=lambda x: x['total_seats'], reverse=True)
-    
-    # Get constituency-wise results
+    return party_results
+
+
+def _constituency_results(election):
+    """Leader, votes and margin per constituency, in one query"""
+    vote_counts = CandidateVoteCount.objects.filter(election_result=OuterRef('pk'))
+    winner_votes = vote_counts.filter(candidate=OuterRef('winning_candidate')).values('votes_count')[:1]
+    runner_up_votes = vote_counts.filter(rank=2).order_by('-votes_count').values('votes_count')[:1]
+
+    election_results = ElectionResult.objects.filter(election=election).select_related(
+        'constituency', 'winning_candidate', 'winning_party'
+    ).annotate(
+        winner_votes=Subquery(winner_votes),
+        runner_up_votes=Subquery(runner_up_votes)
+    )
+
     constituency_results = []
-    election_results = ElectionResult.objects.filter(election=election).select_related('constituency', 'winning_candidate', 'winning_party')
-    
     for result in election_results:
-        # Get the leading candidate (either winning candidate or currently leading one)
         leading_candidate = result.winning_candidate
         leading_party = result.winning_party
         votes = 0
         margin = 0
-        
-        if leading_candidate:
-            # Get votes count for winner
-            try:
-                winner_votes = CandidateVoteCount.objects.get(
-                    election_result=result,
-                    candidate=leading_candidate
-                ).votes_count
-                
-                # Get runner-up votes
-                runner_up_votes = CandidateVoteCount.objects.filter(
-                    election_result=result,
-                    rank=2
-                ).first()
-                
-                votes = winner_votes
-                margin = winner_votes - runner_up_votes.votes_count if runner_up_votes else 0
-            except CandidateVoteCount.DoesNotExist:
-                pass
-        
+
+        # Without a vote count for the winner, votes and margin stay 0
+        if result.winner_votes is not None:
+            votes = result.winner_votes
+            margin = votes - result.runner_up_votes if result.runner_up_votes is not None else 0
+
         constituency_results.append({
             'name': result.constituency.name,
             'leading_candidate': leading_candidate.name if leading_candidate else "Counting in progress",
@@ -89,16 +126,57 @@ def election_results_api(request, election_id):
             'margin': margin,
             'status': result.status
         })
-    
-    # Prepare response
-    response_data = {
-        'election': {
-            'name': election.name,
-            'status': election.get_status_display(),
-            'type': election.get_election_type_display()
-        },
-        'party_results': party_results,
-        'constituency_results': constituency_results
-    }
-    
-    return JsonResponse(response_data)
+
+    return constituency_results
+
+
+# Anonymized vote records: nothing a receipt shows (vote id, transaction hash)
+# or that orders votes (ids, block index), and cast time truncated to the hour
+VOTE_RECORD_EXPORT_FIELDS = (
+    'constituency__code', 'candidate_id', 'vote_type', 'is_valid', 'hour'
+)
+
+# Rows are grouped by constituency and shuffled within it by a keyed hash of the
+# id, a unique keyset that does not reveal the order votes were cast in. (Keying
+# on the truncated hour too breaks paging on SQLite, whose truncated datetimes
+# are local-time text compared against UTC parameters.)
+VOTE_RECORD_EXPORT_KEYS = ('constituency__code', 'shuffle')
+
+RESULT_EXPORT_FIELDS = (
+    'election_result__constituency__code', 'election_result__constituency__name',
+    'election_result__status', 'candidate__name', 'candidate__party__abbreviation',
+    'votes_count', 'vote_percentage', 'rank', 'round_number'
+)
+
+
+@staff_member_required
+def vote_records_export(request, election_id):
+    """Stream the anonymized vote records of an election as CSV or NDJSON"""
+    election = get_object_or_404(Election, id=election_id)
+
+    salt = salted_hmac('vote_records_export', election.election_id).hexdigest()
+    records = VoteRecord.objects.filter(election=election).annotate(
+        hour=TruncHour('timestamp'),
+        shuffle=MD5(Concat(Cast('id', CharField()), Value(salt)))
+    ).values('shuffle', *VOTE_RECORD_EXPORT_FIELDS)
+
+    return export_response(
+        request, records, VOTE_RECORD_EXPORT_FIELDS, f"vote_records_{election.election_id}",
+        keys=VOTE_RECORD_EXPORT_KEYS
+    )
+
+
+def election_results_export(request, election_id):
+    """Stream per-candidate results of an election as CSV or NDJSON"""
+    election = get_object_or_404(Election, id=election_id)
+
+    if election.status not in ['COUNTING', 'COMPLETED']:
+        return JsonResponse({
+            'error': 'No results available for this election'
+        }, status=400)
+
+    vote_counts = CandidateVoteCount.objects.filter(
+        election_result__election=election
+    ).values('id', *RESULT_EXPORT_FIELDS)
+
+    return export_response(request, vote_counts, RESULT_EXPORT_FIELDS, f"results_{election.election_id}")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ElectionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'elections'
+
+    def ready(self):
+        # Invalidate cached election results when counts change
+        from . import signals  # noqa: F401
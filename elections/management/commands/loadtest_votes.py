@@ -0,0 +1,235 @@
+import json
+import queue
+import random
+import subprocess
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from blockchain.audit import audit_log
+from blockchain.services import BlockchainVotingService
+from elections.models import Election, ElectionConstituency, Candidate, Party, VoteReceipt
+from reports.instrumentation import metrics
+from reports.metrics import distribution
+from reports.middleware import QueryTimer
+from users.models import Voter, State, Constituency
+
+VOTER_ID_PREFIX = 'LDT'
+
+
+class Command(BaseCommand):
+    help = 'Casts votes for N seeded voters concurrently through submit_vote and reports throughput and latency as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=100, help='Number of voters to seed (one vote each)')
+        parser.add_argument('--concurrency', type=int, default=4, help='Voting threads')
+        parser.add_argument('--candidates', type=int, default=3, help='Candidates on the ballot')
+        parser.add_argument('--difficulty', type=int, default=None, help='Mining difficulty (default: the chain default)')
+        parser.add_argument('--output', type=str, help='Write the JSON result to this file instead of stdout')
+        parser.add_argument('--label', type=str, default='', help='Free-form label stored with the result')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded election, voters and chain')
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:6].upper()
+        started_at = timezone.now()
+        self.stderr.write(f"Seeding load test {run_id} with {options['voters']} voters...")
+        election, constituency, voters, candidate_ids = self.seed(run_id, options)
+
+        try:
+            result = self.run(election, voters, candidate_ids, options)
+        finally:
+            if not options['keep']:
+                self.cleanup(election, constituency)
+
+        result.update({
+            'run_id': run_id,
+            'label': options['label'],
+            'started_at': started_at.isoformat(),
+            'git_commit': self.git_commit(),
+            'config': {
+                'voters': options['voters'],
+                'concurrency': options['concurrency'],
+                'candidates': options['candidates'],
+                'difficulty': election.blockchain.difficulty,
+                'database': connection.vendor,
+            },
+        })
+
+        output = json.dumps(result, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def seed(self, run_id, options):
+        """Create an open election with its own constituency, candidates, chain and voters"""
+        now = timezone.now()
+        state, _ = State.objects.get_or_create(code='LT', defaults={'name': 'Load Test'})
+        constituency = Constituency.objects.create(
+            name=f'Load Test {run_id}', code=f'LT{run_id}', constituency_type='LOK_SABHA',
+            state=state, total_voters=options['voters']
+        )
+        election = Election.objects.create(
+            name=f'Load Test {run_id}', election_type='LOK_SABHA', election_id=f'LOADTEST-{run_id}',
+            announcement_date=now, nomination_start_date=now, nomination_end_date=now,
+            voting_start_date=now - timedelta(minutes=1), voting_end_date=now + timedelta(days=1),
+            result_date=now + timedelta(days=1), status='VOTING_OPEN'
+        )
+        ElectionConstituency.objects.create(election=election, constituency=constituency)
+
+        election.blockchain = BlockchainVotingService.create_blockchain_for_election(election)
+        if options['difficulty'] is not None:
+            election.blockchain.difficulty = options['difficulty']
+            election.blockchain.save(update_fields=['difficulty'])
+        election.save(update_fields=['blockchain'])
+
+        party, _ = Party.objects.get_or_create(
+            abbreviation='LTP', defaults={'name': 'Load Test Party', 'symbol': 'Gauge', 'recognition_status': 'UNRECOGNIZED'}
+        )
+        candidates = Candidate.objects.bulk_create([
+            Candidate(
+                name=f'Candidate {n}', father_name='-', date_of_birth='1970-01-01', gender='O',
+                party=party if n == 1 else None, is_independent=n != 1, election=election,
+                constituency=constituency, candidate_number=n, nomination_id=f'LT-{run_id}-{n}',
+                nomination_date=now, nomination_status='ACCEPTED', address='-'
+            ) for n in range(1, options['candidates'] + 1)
+        ])
+
+        # Voter ids must match ABC1234567; continue after any voters left by --keep runs
+        last = Voter.objects.filter(voter_id__startswith=VOTER_ID_PREFIX).order_by('-voter_id').values_list('voter_id', flat=True).first()
+        offset = int(last[len(VOTER_ID_PREFIX):]) + 1 if last else 0
+        unusable_password = make_password(None)
+        voters = Voter.objects.bulk_create([
+            Voter(
+                voter_id=f'{VOTER_ID_PREFIX}{offset + n:07d}', password=unusable_password,
+                email=f'loadtest{offset + n}@example.com', date_of_birth='1990-01-01', gender='O',
+                constituency=constituency, state=state, address_line1='-', city='-',
+                pincode='000000', mobile_number='0000000000', is_verified=True
+            ) for n in range(options['voters'])
+        ], batch_size=500)
+
+        return election, constituency, voters, [candidate.id for candidate in candidates]
+
+    def run(self, election, voters, candidate_ids, options):
+        """Cast one vote per voter from a pool of threads, each with its own client and connection"""
+        url = reverse('elections:submit_vote', args=[election.id])
+        host = next((h for h in settings.ALLOWED_HOSTS if h and not h.startswith(('*', '.'))), 'localhost')
+        pending = queue.Queue()
+        for voter in voters:
+            pending.put(voter)
+
+        latencies = []
+        query_counts = []
+        errors = {}
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        voter = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    # A fresh client per voter, like a separate browser session
+                    client = Client(HTTP_HOST=host)
+                    client.force_login(voter)
+                    queries = QueryTimer()
+                    start = time.perf_counter()
+                    with connection.execute_wrapper(queries):
+                        response = client.post(url, {'candidate_id': random.choice(candidate_ids + ['NOTA'])})
+                    elapsed = time.perf_counter() - start
+
+                    # A recorded vote redirects to its receipt; anything else is a failure
+                    location = response.get('Location', '')
+                    with lock:
+                        if response.status_code == 302 and '/receipt/' in location:
+                            latencies.append(elapsed)
+                            query_counts.append(len(queries.durations))
+                        else:
+                            # submit_vote reports failures through the messages framework
+                            reasons = [str(message) for message in get_messages(response.wsgi_request)]
+                            error = reasons[-1] if reasons else f"{response.status_code} {location}".strip()
+                            errors[error] = errors.get(error, 0) + 1
+            finally:
+                connection.close()
+
+        before = metrics.snapshot()
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, name=f'loadtest-{n}') for n in range(max(1, options['concurrency']))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+        after = metrics.snapshot()
+
+        latency = distribution(np.array(latencies))
+        return {
+            'votes': {
+                'attempted': len(voters),
+                'succeeded': len(latencies),
+                'failed': len(voters) - len(latencies),
+                'errors': errors,
+            },
+            'duration_seconds': round(duration, 4),
+            'throughput_votes_per_second': round(len(latencies) / duration, 2) if duration else 0,
+            'latency_ms': {key: round(value * 1000, 2) if key != 'count' else value for key, value in latency.items()},
+            'db_queries_per_vote': distribution(np.array(query_counts, dtype=np.float64)),
+            'mining': self.timing_delta(before, after, 'BLOCKCHAIN_BLOCK_TIME'),
+            'vote_processing': self.timing_delta(before, after, 'VOTE_PROCESSING_TIME'),
+        }
+
+    @staticmethod
+    def timing_delta(before, after, metric):
+        """Count and time observed for a metric during the run (reports.instrumentation)"""
+        if not metrics.enabled:
+            return None
+        count = 0
+        total = 0.0
+        for key, (_, after_sum, after_count) in after.items():
+            if key[0] != metric:
+                continue
+            _, before_sum, before_count = before.get(key, (None, 0.0, 0))
+            count += after_count - before_count
+            total += after_sum - before_sum
+        return {
+            'count': count,
+            'total_seconds': round(total, 4),
+            'mean_ms': round(total / count * 1000, 2) if count else 0,
+        }
+
+    def cleanup(self, election, constituency):
+        """Remove everything the run created, including receipt QR code files"""
+        # Audit entries of the run must land before their chain is deleted
+        audit_log.flush()
+        for receipt in VoteReceipt.objects.filter(vote_record__election=election).exclude(qr_code=''):
+            receipt.qr_code.delete(save=False)
+
+        blockchain = election.blockchain
+        Voter.objects.filter(constituency=constituency).delete()
+        election.delete()
+        if blockchain:
+            blockchain.delete()
+        constituency.delete()
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, timeout=5
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
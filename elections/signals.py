@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Party, Candidate, ElectionResult, CandidateVoteCount
+from .api_views import bump_results_version
+
+
+@receiver([post_save, post_delete], sender=ElectionResult)
+def election_result_changed(sender, instance, **kwargs):
+    """A changed constituency result is a new result version for its election"""
+    bump_results_version(instance.election_id)
+
+
+@receiver([post_save, post_delete], sender=CandidateVoteCount)
+def candidate_vote_count_changed(sender, instance, **kwargs):
+    """Vote counts feed seats and margins, so they bump the version too"""
+    election_id = ElectionResult.objects.filter(
+        pk=instance.election_result_id
+    ).values_list('election_id', flat=True).first()
+    if election_id is not None:
+        bump_results_version(election_id)
+
+
+@receiver([post_save, post_delete], sender=Candidate)
+def candidate_changed(sender, instance, **kwargs):
+    """Candidate names and parties are shown in the results"""
+    bump_results_version(instance.election_id)
+
+
+@receiver([post_save, post_delete], sender=Party)
+def party_changed(sender, instance, **kwargs):
+    """A party's name, symbol or colour shows in every election it contests"""
+    election_ids = Candidate.objects.filter(party_id=instance.pk).values_list('election_id', flat=True).distinct()
+    for election_id in election_ids:
+        bump_results_version(election_id)
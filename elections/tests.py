@@ -1,3 +1,214 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from users.models import State, Constituency, Voter
+from .api_views import election_results_api, VOTE_RECORD_EXPORT_FIELDS
+from .models import Election, Party, Candidate, ElectionResult, CandidateVoteCount, VoteRecord
+
+
+class ElectionResultsAPIQueryCountTest(TestCase):
+    """election_results_api must not issue queries per party or per constituency"""
+
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.state = State.objects.create(name="Test State", code="TS")
+        self.election = Election.objects.create(
+            name="General Election", election_type='LOK_SABHA', election_id="GE-TEST",
+            state=self.state, announcement_date=now, nomination_start_date=now,
+            nomination_end_date=now, voting_start_date=now, voting_end_date=now,
+            result_date=now + timedelta(days=1), status='COUNTING'
+        )
+        self.parties = [
+            Party.objects.create(name=f"Party {i}", abbreviation=f"P{i}", symbol="symbol",
+                                 recognition_status='NATIONAL')
+            for i in range(3)
+        ]
+
+    def add_constituencies(self, count):
+        for n in range(ElectionResult.objects.count(), ElectionResult.objects.count() + count):
+            constituency = Constituency.objects.create(
+                name=f"Constituency {n}", code=f"C{n}", constituency_type='LOK_SABHA',
+                state=self.state, total_voters=1000
+            )
+            candidates = [
+                Candidate.objects.create(
+                    name=f"Candidate {n}-{i}", father_name="Father", date_of_birth="1970-01-01",
+                    gender='M', party=party, election=self.election, constituency=constituency,
+                    candidate_number=i + 1, nomination_id=f"NOM-{n}-{i}",
+                    nomination_date=timezone.now(), address="Address"
+                )
+                for i, party in enumerate(self.parties)
+            ]
+            result = ElectionResult.objects.create(
+                election=self.election, constituency=constituency, total_voters=1000,
+                total_votes_cast=600, total_valid_votes=600, total_invalid_votes=0,
+                voter_turnout_percentage=60.0, winning_candidate=candidates[n % 3],
+                winning_party=candidates[n % 3].party, winning_margin=100,
+                victory_margin_percentage=16.7, status='FINAL' if n % 2 else 'COUNTING'
+            )
+            for rank, candidate in enumerate(candidates[n % 3:] + candidates[:n % 3], start=1):
+                CandidateVoteCount.objects.create(
+                    election_result=result, candidate=candidate,
+                    votes_count=400 - rank * 100, vote_percentage=0.0, rank=rank
+                )
+
+    def fetch_results(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = election_results_api(None, self.election.id)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_is_constant(self):
+        self.add_constituencies(2)
+        small, _ = self.fetch_results()
+
+        cache.clear()
+        self.add_constituencies(10)
+        large, response = self.fetch_results()
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 3)
+        self.assertContains(response, '"margin": 100')
+        party_results = json.loads(response.content)['party_results']
+        self.assertEqual(sum(party['total_seats'] for party in party_results), 12)
+        self.assertEqual(sum(party['seats_won'] for party in party_results), 6)
+
+    def test_results_are_cached_until_counts_change(self):
+        self.add_constituencies(4)
+        first, response = self.fetch_results()
+        cached, _ = self.fetch_results()
+        self.assertLess(cached, first)
+
+        # A new vote count is a new result version
+        vote_count = CandidateVoteCount.objects.filter(rank=1).first()
+        vote_count.votes_count += 50
+        vote_count.save()
+        _, updated = self.fetch_results()
+        self.assertNotEqual(response.content, updated.content)
+
+    def test_party_and_candidate_edits_are_new_result_versions(self):
+        self.add_constituencies(2)
+        self.fetch_results()
+
+        party = self.parties[0]
+        party.name = "Renamed Party"
+        party.save()
+        _, response = self.fetch_results()
+        self.assertContains(response, "Renamed Party")
+
+        candidate = ElectionResult.objects.first().winning_candidate
+        candidate.name = "Renamed Candidate"
+        candidate.save()
+        _, response = self.fetch_results()
+        self.assertContains(response, "Renamed Candidate")
+
+    @override_settings(ELECTION_RESULTS_CACHE_TTL=45)
+    def test_results_are_cached_for_a_bounded_time(self):
+        self.add_constituencies(1)
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.fetch_results()
+        timeouts = [call.args[2] for call in cache_set.call_args_list if call.args[0].endswith(':COUNTING')]
+        self.assertEqual(timeouts, [45])
+
+    def test_declaring_a_result_moves_its_seat_to_won(self):
+        self.add_constituencies(2)
+        _, response = self.fetch_results()
+        self.assertEqual(sum(party['seats_won'] for party in json.loads(response.content)['party_results']), 1)
+
+        for result in ElectionResult.objects.filter(status='COUNTING'):
+            result.status = 'FINAL'
+            result.save()
+        _, response = self.fetch_results()
+        party_results = json.loads(response.content)['party_results']
+        self.assertEqual(sum(party['seats_won'] for party in party_results), 2)
+        self.assertEqual(sum(party['seats_leading'] for party in party_results), 0)
+
+
+class VoteRecordExportTest(TestCase):
+    """The vote record export must not link a receipt to a vote or reveal the order of votes"""
+
+    def setUp(self):
+        now = timezone.now()
+        state = State.objects.create(name="Test State", code="TS")
+        self.election = Election.objects.create(
+            name="General Election", election_type='LOK_SABHA', election_id="GE-EXPORT",
+            state=state, announcement_date=now, nomination_start_date=now,
+            nomination_end_date=now, voting_start_date=now, voting_end_date=now,
+            result_date=now + timedelta(days=1), status='VOTING_OPEN'
+        )
+        constituencies = [
+            Constituency.objects.create(name=f"Constituency {n}", code=f"C{n}",
+                                        constituency_type='LOK_SABHA', state=state)
+            for n in range(2)
+        ]
+        self.votes = [
+            VoteRecord.objects.create(
+                election=self.election, constituency=constituencies[n % 2],
+                transaction_hash=f"{n:064x}", voter_hash=f"voter-{n}", is_valid=n % 4 < 2
+            )
+            for n in range(40)
+        ]
+        staff = Voter.objects.create(
+            voter_id='ABC0000001', email='staff@example.com', date_of_birth='1980-01-01',
+            constituency=constituencies[0], state=state, address_line1='-', city='-',
+            pincode='000000', mobile_number='+911234567890', is_staff=True
+        )
+        self.client.force_login(staff)
+        self.url = f'/api/elections/{self.election.id}/votes/export/'
+
+    def fetch(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_columns_leave_out_receipt_fields(self):
+        _, body = self.fetch()
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(tuple(rows[0]), VOTE_RECORD_EXPORT_FIELDS)
+        self.assertEqual(len(rows), 41)
+        for vote in self.votes:
+            self.assertNotIn(vote.transaction_hash, body)
+            self.assertNotIn(str(vote.vote_id), body)
+
+    def test_rows_are_not_in_cast_order(self):
+        _, body = self.fetch(format='ndjson')
+        exported = [json.loads(line) for line in body.splitlines()]
+        codes = [row['constituency__code'] for row in exported]
+        self.assertEqual(codes, sorted(codes))
+
+        # Votes alternate valid/invalid in cast order within each constituency;
+        # in export order they must not
+        for code in ('C0', 'C1'):
+            cast_order = [vote.is_valid for vote in self.votes if vote.constituency.code == code]
+            export_order = [row['is_valid'] for row in exported if row['constituency__code'] == code]
+            self.assertCountEqual(export_order, cast_order)
+            self.assertNotEqual(export_order, cast_order)
+
+    def test_resumable_ranges_cover_every_row_once(self):
+        cursor = None
+        rows = []
+        while True:
+            params = {'format': 'ndjson', 'limit': 7}
+            if cursor:
+                params['cursor'] = cursor
+            response, body = self.fetch(**params)
+            rows.extend(json.loads(line) for line in body.splitlines())
+            cursor = response.get('X-Next-Cursor')
+            if not cursor:
+                break
+            decoded = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            for vote in self.votes:
+                self.assertNotIn(str(vote.vote_id), decoded)
+                self.assertNotIn(vote.transaction_hash, decoded)
+        self.assertEqual(len(rows), 40)
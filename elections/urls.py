@@ -27,6 +27,9 @@ urlpatterns = [
     path('api/vote/', views.CastVoteView.as_view(), name='api_vote'),
     path('api/leaderboard/', views.LeaderboardView.as_view(), name='api_leaderboard'),
     path('api/results/<int:election_id>/', views.ResultsView.as_view(), name='api_results'),
+    path('<int:election_id>/results/', api_views.election_results_api, name='api_election_results'),
+    path('<int:election_id>/results/export/', api_views.election_results_export, name='api_election_results_export'),
+    path('<int:election_id>/votes/export/', api_views.vote_records_export, name='api_vote_records_export'),
     path('api/verify-vote/<str:token>/', verification.VerifyVoteView.as_view(), name='api_verify_vote'),
     path('api/verify-vote/<str:token>/<str:hash_prefix>/', verification.VerifyVoteView.as_view(), name='api_verify_vote_with_hash'),
 ]
@@ -9,6 +9,7 @@ import logging
 
 from .models import VoteReceipt, VoteRecord
 from blockchain.models import Block, VoteTransaction
+from users import ratelimit
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,15 @@ class VerifyVoteView(APIView):
     """API endpoint for publicly verifying a vote without revealing voter identity"""
     
     def get(self, request, token, hash_prefix=None):
+        # Tokens are unguessable, but every lookup costs a proof check
+        try:
+            ratelimit.throttle('verify_vote', request)
+        except ratelimit.RateLimited as e:
+            return Response({
+                "verified": False,
+                "error": "Too many verification requests"
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
+        
         try:
             # Find the receipt by verification token
             receipt = get_object_or_404(VoteReceipt, verification_token=token)
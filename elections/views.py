@@ -231,13 +231,11 @@ def submit_vote(request, election_id):
             candidate.votes_received += 1
             candidate.save()
             
-        # Update constituency stats
-        constituency_election = ElectionConstituency.objects.get(
+        # Update constituency stats (atomic increment, so concurrent votes are not lost)
+        ElectionConstituency.objects.filter(
             election=election, 
             constituency=request.user.constituency
-        )
-        constituency_election.total_votes_cast += 1
-        constituency_election.save()
+        ).update(total_votes_cast=F('total_votes_cast') + 1)
         
         messages.success(request, "Your vote has been successfully recorded.")
         return redirect('elections:view_receipt', vote_id=vote_record.vote_id)
@@ -0,0 +1,57 @@
+"""
+Deferred imports for heavy libraries (NumPy, pandas, ReportLab, Pillow,
+OpenCV, face_recognition).
+
+Importing numpy alone takes ~80 ms and face_recognition loads the dlib models,
+yet most management commands and many requests never touch them. A module
+bound with lazy_import() is imported on first attribute access instead of
+when the module that uses it is imported:
+
+    np = lazy_import('numpy')
+    ...
+    np.asarray(values)  # numpy is imported here
+
+benchmarks/importtime.py keeps the startup import cost under a budget.
+"""
+import importlib
+import importlib.util
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = self.__dict__['_module'] = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        # Later lookups of this attribute skip __getattr__
+        self.__dict__[attr] = value
+        return value
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Module `name`, imported when first used"""
+    return LazyModule(name)
+
+
+def is_available(name):
+    """Whether a module can be found, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -60,6 +60,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'reports.middleware.PerformanceMiddleware',  # First, so its timing covers the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -97,6 +98,14 @@ WSGI_APPLICATION = 'india_blockchain_voting.wsgi.application'
 # Determine database backend based on environment variable
 USE_SQLITE = config('USE_SQLITE', default=True, cast=bool)
 
+# SQLite performance profile for single-node booths (WAL, mmap, busy timeout)
+SQLITE_PERFORMANCE_MODE = config('SQLITE_PERFORMANCE_MODE', default=False, cast=bool)
+SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=268435456, cast=int)  # 256 MB
+SQLITE_BUSY_TIMEOUT = config('SQLITE_BUSY_TIMEOUT', default=20, cast=int)  # in seconds
+SQLITE_CACHE_SIZE = config('SQLITE_CACHE_SIZE', default=-65536, cast=int)  # negative = KiB (64 MB)
+# NORMAL can lose the last committed votes on power loss or an OS crash; FULL keeps them
+SQLITE_SYNCHRONOUS = config('SQLITE_SYNCHRONOUS', default='NORMAL', cast=str.upper)
+
 if USE_SQLITE:
     DATABASES = {
         'default': {
@@ -104,6 +113,16 @@ if USE_SQLITE:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    if SQLITE_PERFORMANCE_MODE:
+        from india_blockchain_voting.db import sqlite_performance_options
+        DATABASES['default']['OPTIONS'] = sqlite_performance_options(
+            mmap_size=SQLITE_MMAP_SIZE,
+            busy_timeout=SQLITE_BUSY_TIMEOUT,
+            cache_size=SQLITE_CACHE_SIZE,
+            synchronous=SQLITE_SYNCHRONOUS,
+        )
+        # WAL needs a file-backed database; the default in-memory test database ignores it
+        DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_db.sqlite3'}
 else:
     DATABASES = {
         'default': {
@@ -153,13 +172,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
-# Use SHA-256 password hashing
+# Password hashing (see users.hashers). New passwords use PASSWORD_HASHER ('scrypt', or
+# 'argon2' with argon2-cffi installed); older hashes are upgraded at the voter's next login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='scrypt')
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)  # N, a power of 2
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=8, cast=int)  # r
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=1, cast=int)  # p
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int)
+
 PASSWORD_HASHERS = [
+    'users.hashers.TunableScryptPasswordHasher',
+    'users.hashers.TunableArgon2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
-    'django.contrib.auth.hashers.Argon2PasswordHasher',
     'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
 ]
+if PASSWORD_HASHER == 'argon2':
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
 
 
 # Internationalization
@@ -251,6 +282,32 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache: 'redis' shares it (and the rate limit counters) across workers and nodes.
+# 'locmem' keeps it per process, so it only suits a single worker process: with N
+# workers every rate limit is effectively N times higher.
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+if CACHE_BACKEND == 'redis':
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                          'LOCATION': config('REDIS_URL', default='redis://localhost:6379')}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Login, 2FA, face and vote verification limits (users.ratelimit); None uses its defaults
+RATE_LIMITS = None
+
+# Reverse proxies in front of the app that append to X-Forwarded-For. 0 trusts only
+# REMOTE_ADDR; otherwise clients could pick the IP their rate limits are counted under.
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
+
+# Seconds a sealed explorer/transaction page stays cached (blockchain.pagination)
+KEYSET_PAGE_CACHE_TTL = config('KEYSET_PAGE_CACHE_TTL', default=300, cast=int)
+
+# Seconds a computed election results payload is served (elections.api_views); saves bump its version sooner
+ELECTION_RESULTS_CACHE_TTL = config('ELECTION_RESULTS_CACHE_TTL', default=60, cast=int)
+
+# Seconds an admin dashboard stats snapshot is served before one request recomputes it (users.dashboard)
+ADMIN_DASHBOARD_CACHE_TTL = config('ADMIN_DASHBOARD_CACHE_TTL', default=30, cast=int)
+
 # Celery Configuration
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379')
@@ -292,9 +349,37 @@ BLOCKCHAIN_DIFFICULTY = config('BLOCKCHAIN_DIFFICULTY', default=4, cast=int)
 BLOCKCHAIN_MINING_REWARD = config('BLOCKCHAIN_MINING_REWARD', default=1, cast=int)
 BLOCKCHAIN_STORAGE_PATH = BASE_DIR / 'blockchain_data'
 
+# Audit Log Settings (entries are buffered and written with bulk_create)
+AUDIT_LOG_BUFFER_SIZE = config('AUDIT_LOG_BUFFER_SIZE', default=100, cast=int)  # 1 = write through
+AUDIT_LOG_FLUSH_INTERVAL = config('AUDIT_LOG_FLUSH_INTERVAL', default=5.0, cast=float)  # in seconds
+AUDIT_LOG_SPOOL_DIR = config('AUDIT_LOG_SPOOL_DIR', default=str(BLOCKCHAIN_STORAGE_PATH / 'audit_spool'))
+
+# Worker processes for full blockchain integrity scans (default: one per CPU)
+INTEGRITY_SCAN_WORKERS = config('INTEGRITY_SCAN_WORKERS', default=0, cast=int)
+
+# Report rendering (PDF/Excel artifacts are rendered by background workers)
+REPORT_RENDER_WORKERS = config('REPORT_RENDER_WORKERS', default=2, cast=int)
+# Let the web server send report files: 'X-Sendfile' (Apache) or 'X-Accel-Redirect' (nginx)
+REPORT_SENDFILE_HEADER = config('REPORT_SENDFILE_HEADER', default='')
+REPORT_SENDFILE_PREFIX = config('REPORT_SENDFILE_PREFIX', default='/protected-media/')  # internal nginx location
+REPORT_SCHEDULER_WORKERS = config('REPORT_SCHEDULER_WORKERS', default=4, cast=int)
+REPORT_SCHEDULER_SETTLE_SECONDS = config('REPORT_SCHEDULER_SETTLE_SECONDS', default=60, cast=int)  # skip rows younger than this
+
+# Request/DB/blockchain timings (see reports.instrumentation)
+PERFORMANCE_METRICS_ENABLED = config('PERFORMANCE_METRICS_ENABLED', default=True, cast=bool)
+PERFORMANCE_FLUSH_INTERVAL = config('PERFORMANCE_FLUSH_INTERVAL', default=60, cast=float)  # seconds per PerformanceReport bucket
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1', cast=lambda v: [s.strip() for s in v.split(',')])  # Prometheus scrapers
+
 # Face Recognition Settings
 FACE_RECOGNITION_TOLERANCE = config('FACE_RECOGNITION_TOLERANCE', default=0.6, cast=float)
 FACE_RECOGNITION_MODEL = config('FACE_RECOGNITION_MODEL', default='hog')
+FACE_WORKERS = config('FACE_WORKERS', default=2, cast=int)  # processes in the face worker pool (users.face_service)
+FACE_MAX_PENDING = config('FACE_MAX_PENDING', default=8, cast=int)  # images queued or in flight before requests wait
+FACE_QUEUE_TIMEOUT = config('FACE_QUEUE_TIMEOUT', default=2, cast=float)  # seconds to wait for a slot
+FACE_PROCESSING_TIMEOUT = config('FACE_PROCESSING_TIMEOUT', default=10, cast=float)
+FACE_MAX_IMAGE_DIMENSION = config('FACE_MAX_IMAGE_DIMENSION', default=800, cast=int)  # longest side before detection
+FACE_EMBEDDING_CACHE_SIZE = config('FACE_EMBEDDING_CACHE_SIZE', default=10000, cast=int)  # decrypted embeddings kept per process
+FACE_EMBEDDING_CACHE_TTL = config('FACE_EMBEDDING_CACHE_TTL', default=SESSION_COOKIE_AGE, cast=int)  # about one voting session
 
 # Logging Configuration
 LOGGING = {
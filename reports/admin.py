@@ -1,6 +1,6 @@
 from django.contrib import admin
-from django.http import HttpResponse
-import csv
+from django.http import StreamingHttpResponse
+from blockchain.exports import csv_lines
 from .models import VotingReport, AuditReport, PerformanceReport
 
 # Define admin classes but don't register with default admin site yet
@@ -12,21 +12,27 @@ class VotingReportAdmin(admin.ModelAdmin):
     actions = ['export_as_csv']
     
     def export_as_csv(self, request, queryset):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="voting_reports.csv"'
+        rows = queryset.values(
+            'election__name', 'constituency__name', 'report_type', 'created_at', 'report_data'
+        ).order_by('created_at').iterator(chunk_size=500)
+        report_types = dict(VotingReport.REPORT_TYPES)
         
-        writer = csv.writer(response)
-        writer.writerow(['Election', 'Constituency', 'Type', 'Created', 'Data'])
+        def rows_by_chunk():
+            for row in rows:
+                yield [{
+                    'Election': row['election__name'],
+                    'Constituency': row['constituency__name'] or 'All',
+                    'Type': report_types.get(row['report_type'], row['report_type']),
+                    'Created': row['created_at'],
+                    'Data': row['report_data'],
+                }]
         
-        for report in queryset:
-            writer.writerow([
-                report.election.name,
-                report.constituency.name if report.constituency else 'All',
-                report.get_report_type_display(),
-                report.created_at,
-                report.report_data
-            ])
-            
+        # Streamed row by row; report_data can be large
+        response = StreamingHttpResponse(
+            csv_lines(rows_by_chunk(), ['Election', 'Constituency', 'Type', 'Created', 'Data']),
+            content_type='text/csv'
+        )
+        response['Content-Disposition'] = 'attachment; filename="voting_reports.csv"'
         return response
     export_as_csv.short_description = "Export selected reports to CSV"
 
@@ -0,0 +1,196 @@
+"""
+Low-overhead request, database and blockchain timings.
+
+Timings are observed into in-process histograms with fixed bucket bounds, so
+an observation costs a bisect and a few increments, with no I/O. A daemon
+thread flushes what each histogram gathered since the previous flush every
+PERFORMANCE_FLUSH_INTERVAL seconds. Each metric and label set becomes one
+PerformanceReport row whose value is the mean, with count, sum, percentiles
+and bucket counts in its context.
+
+The cumulative histograms are also served in the Prometheus text format
+(reports.views.prometheus_metrics). Like all in-process state, those cover
+the serving process only; the flushed PerformanceReport rows cover every
+process.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; the last bucket catches everything slower
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed durations"""
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def percentile(counts, q):
+    """Estimate a percentile from bucket counts, interpolating inside the bucket"""
+    total = sum(counts)
+    if not total:
+        return 0.0
+
+    rank = q / 100 * total
+    seen = 0
+    for i, n in enumerate(counts):
+        if n and seen + n >= rank:
+            lower = BUCKETS[i - 1] if i else 0.0
+            upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return lower + (upper - lower) * (rank - seen) / n
+        seen += n
+    return BUCKETS[-1]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Registry of histograms keyed by metric name and labels"""
+
+    def __init__(self, flush_interval=60.0, enabled=True):
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._histograms = {}
+        # State of each histogram at the previous flush, to flush only the delta
+        self._flushed = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def observe(self, metric, seconds, **labels):
+        """Record one duration"""
+        self.observe_many(metric, (seconds,), **labels)
+
+    def observe_many(self, metric, values, **labels):
+        """Record several durations of the same series under one lock acquisition"""
+        if not self.enabled:
+            return
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            for value in values:
+                histogram.observe(value)
+            if not self._started:
+                self._start()
+
+    @contextmanager
+    def timer(self, metric, **labels):
+        """Time the enclosed block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(metric, time.perf_counter() - start, **labels)
+
+    def _start(self):
+        self._started = True
+        if self.flush_interval:
+            threading.Thread(target=self._run, name='performance-metrics-flusher', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Could not flush performance metrics: {str(e)}")
+            finally:
+                connection.close()
+
+    def snapshot(self):
+        """Copy of every histogram as {(metric, labels): (counts, sum, count)}"""
+        with self._lock:
+            return {
+                key: (list(histogram.counts), histogram.sum, histogram.count)
+                for key, histogram in self._histograms.items()
+            }
+
+    def flush(self):
+        """Write what was observed since the previous flush as PerformanceReport rows"""
+        from .models import PerformanceReport
+
+        with self._lock:
+            current = {
+                key: (list(histogram.counts), histogram.sum, histogram.count)
+                for key, histogram in self._histograms.items()
+            }
+            previous, self._flushed = self._flushed, current
+
+        rows = []
+        for (metric, labels), (counts, total, count) in current.items():
+            last_counts, last_total, last_count = previous.get((metric, labels), (None, 0.0, 0))
+            count -= last_count
+            if not count:
+                continue
+            if last_counts:
+                counts = [now - before for now, before in zip(counts, last_counts)]
+            total -= last_total
+
+            rows.append(PerformanceReport(
+                metric=metric,
+                value=total / count,
+                context={
+                    **dict(labels),
+                    'count': count,
+                    'sum': total,
+                    **{f'p{q}': percentile(counts, q) for q in PERCENTILES},
+                    'buckets': counts,
+                    'interval': self.flush_interval,
+                    'pid': os.getpid(),
+                }
+            ))
+
+        if rows:
+            PerformanceReport.objects.bulk_create(rows)
+        return len(rows)
+
+    def prometheus_text(self):
+        """Cumulative histograms in the Prometheus text exposition format"""
+        lines = []
+        series_by_metric = {}
+        for (metric, labels), state in sorted(self.snapshot().items()):
+            series_by_metric.setdefault(metric, []).append((labels, state))
+
+        for metric, series in series_by_metric.items():
+            name = f"voting_{metric.lower()}_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (counts, total, count) in series:
+                label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ('+Inf',), counts):
+                    cumulative += n
+                    bucket_labels = ','.join(filter(None, [label_text, f'le="{bound}"']))
+                    lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+                suffix = f"{{{label_text}}}" if label_text else ''
+                lines.append(f"{name}_sum{suffix} {total}")
+                lines.append(f"{name}_count{suffix} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics(
+    flush_interval=getattr(settings, 'PERFORMANCE_FLUSH_INTERVAL', 60.0),
+    enabled=getattr(settings, 'PERFORMANCE_METRICS_ENABLED', True)
+)
@@ -0,0 +1,31 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reports.scheduler import run_due_schedules
+
+class Command(BaseCommand):
+    help = 'Runs due report schedules, incrementally from each schedule\'s last watermark'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run due schedules once and exit')
+        parser.add_argument('--interval', type=int, default=30, help='Seconds between polls in daemon mode')
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'REPORT_SCHEDULER_WORKERS', 4),
+                            help='Schedules run in parallel by this process')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            ran = run_due_schedules(options['workers'])
+            self.stdout.write(self.style.SUCCESS(f'Ran {ran} report schedule(s)'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Report scheduler started (polling every {options["interval"]}s, {options["workers"]} workers)'
+        ))
+        try:
+            while True:
+                ran = run_due_schedules(options['workers'])
+                if ran:
+                    self.stdout.write(f'Ran {ran} report schedule(s)')
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Report scheduler stopped'))
@@ -0,0 +1,110 @@
+"""
+Set-based blockchain and voting metrics for performance reports.
+
+Timestamps are streamed once from the database into NumPy arrays, and
+intervals and percentiles are computed there. This avoids per-row queries and
+database-specific SQL, so it behaves the same on SQLite, MySQL and PostgreSQL.
+
+Turnout is shared by the on-demand and the scheduled voter turnout reports.
+"""
+from django.db.models import Count
+from django.db.models.functions import ExtractHour
+
+from blockchain.models import Block, VoteTransaction
+from elections.models import ElectionConstituency, VoteRecord
+from india_blockchain_voting.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+PERCENTILES = (50, 95, 99)
+CHUNK_SIZE = 5000
+
+
+def _epoch_seconds(datetimes):
+    """Stream datetimes into a float64 array of epoch seconds"""
+    return np.fromiter((value.timestamp() for value in datetimes), dtype=np.float64)
+
+
+def distribution(values):
+    """Count, mean, max and p50/p95/p99 of an array of seconds"""
+    if values.size == 0:
+        return {'count': 0, 'mean': 0, 'max': 0, **{f'p{p}': 0 for p in PERCENTILES}}
+
+    percentiles = np.percentile(values, PERCENTILES)
+    return {
+        'count': int(values.size),
+        'mean': round(float(values.mean()), 4),
+        'max': round(float(values.max()), 4),
+        **{f'p{p}': round(float(value), 4) for p, value in zip(PERCENTILES, percentiles)}
+    }
+
+
+def block_interval_stats(start_date, end_date):
+    """Distribution of seconds between consecutive blocks in the period"""
+    timestamps = Block.objects.filter(
+        timestamp__range=[start_date, end_date]
+    ).order_by('timestamp').values_list('timestamp', flat=True).iterator(chunk_size=CHUNK_SIZE)
+
+    return distribution(np.diff(_epoch_seconds(timestamps)))
+
+
+def confirmation_latency_stats(start_date, end_date):
+    """Distribution of seconds from a vote's block being created to its transaction being confirmed"""
+    rows = VoteTransaction.objects.filter(
+        timestamp__range=[start_date, end_date],
+        is_confirmed=True
+    ).values_list('timestamp', 'block__timestamp').iterator(chunk_size=CHUNK_SIZE)
+
+    latencies = np.fromiter(
+        ((confirmed - created).total_seconds() for confirmed, created in rows),
+        dtype=np.float64
+    )
+    return distribution(latencies)
+
+
+def peak_voting_hours(start_date, end_date, top=3):
+    """Busiest hours of the day by votes cast"""
+    votes_by_hour = VoteRecord.objects.filter(
+        timestamp__range=[start_date, end_date]
+    ).annotate(
+        hour=ExtractHour('timestamp')
+    ).values('hour').annotate(
+        vote_count=Count('id')
+    ).order_by('-vote_count')[:top]
+
+    return list(votes_by_hour)
+
+
+def turnout(election, votes_by_constituency=None):
+    """
+    Turnout by constituency and overall. The electorate is every constituency
+    contesting the election, including those with no votes yet.
+    votes_by_constituency maps constituency id to votes cast and defaults to
+    the live tallies.
+    """
+    rows = ElectionConstituency.objects.filter(election=election).order_by('constituency__name').values_list(
+        'constituency_id', 'constituency__name', 'constituency__total_voters', 'total_votes_cast'
+    )
+
+    turnout_data = []
+    for constituency_id, name, total_voters, votes_cast in rows:
+        if votes_by_constituency is not None:
+            votes_cast = votes_by_constituency.get(constituency_id, 0)
+        turnout_data.append({
+            'constituency': name,
+            'total_voters': total_voters,
+            'votes_cast': votes_cast,
+            'turnout_percentage': round(votes_cast / total_voters * 100, 2) if total_voters > 0 else 0
+        })
+
+    # Overall turnout is weighted by electorate, not an average of percentages
+    total_eligible_voters = sum(item['total_voters'] for item in turnout_data)
+    total_votes_cast = sum(item['votes_cast'] for item in turnout_data)
+    return {
+        'turnout_by_constituency': turnout_data,
+        'overall_turnout': {
+            'total_eligible_voters': total_eligible_voters,
+            'total_votes_cast': total_votes_cast,
+            'overall_percentage': round(total_votes_cast / total_eligible_voters * 100, 2) if total_eligible_voters > 0 else 0
+        }
+    }
@@ -0,0 +1,49 @@
+import time
+
+from django.db import connection
+
+from .instrumentation import metrics
+
+
+class QueryTimer:
+    """connection.execute_wrapper that collects the duration of every query"""
+
+    def __init__(self):
+        self.durations = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations.append(time.perf_counter() - start)
+
+
+class PerformanceMiddleware:
+    """
+    Time every request and the database queries it runs.
+    Must come first in MIDDLEWARE so the timing covers the other middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not metrics.enabled:
+            return self.get_response(request)
+
+        queries = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        # Label by URL pattern, not path, to keep the number of series bounded
+        route = request.resolver_match.route if request.resolver_match else 'unmatched'
+        metrics.observe(
+            'API_RESPONSE_TIME', elapsed,
+            route=route, method=request.method, status=f"{response.status_code // 100}xx"
+        )
+        if queries.durations:
+            metrics.observe_many('DATABASE_QUERY_TIME', queries.durations, route=route)
+        return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='votingreport',
+            name='render_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='votingreport',
+            name='render_status',
+            field=models.CharField(choices=[('NONE', 'Not Requested'), ('PENDING', 'Pending'), ('RENDERING', 'Rendering'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='NONE', max_length=20),
+        ),
+    ]
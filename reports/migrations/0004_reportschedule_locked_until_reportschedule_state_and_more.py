@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_votingreport_render_error_votingreport_render_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportschedule',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportschedule',
+            name='state',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='reportschedule',
+            name='watermark',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='performancereport',
+            name='metric',
+            field=models.CharField(choices=[('API_RESPONSE_TIME', 'API Response Time'), ('DATABASE_QUERY_TIME', 'Database Query Time'), ('VOTE_PROCESSING_TIME', 'Vote Processing Time'), ('BLOCKCHAIN_BLOCK_TIME', 'Blockchain Block Generation Time'), ('CONCURRENT_USERS', 'Concurrent Users'), ('MEMORY_USAGE', 'Memory Usage'), ('CPU_USAGE', 'CPU Usage'), ('REPORT_GENERATION_TIME', 'Report Generation Time')], max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='reportschedule',
+            index=models.Index(fields=['is_active', 'next_run'], name='reports_rep_is_acti_75ce04_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_reportschedule_locked_until_reportschedule_state_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='performancereport',
+            name='metric',
+            field=models.CharField(choices=[('API_RESPONSE_TIME', 'API Response Time'), ('DATABASE_QUERY_TIME', 'Database Query Time'), ('VOTE_PROCESSING_TIME', 'Vote Processing Time'), ('BLOCKCHAIN_BLOCK_TIME', 'Blockchain Block Generation Time'), ('CONCURRENT_USERS', 'Concurrent Users'), ('MEMORY_USAGE', 'Memory Usage'), ('CPU_USAGE', 'CPU Usage'), ('REPORT_GENERATION_TIME', 'Report Generation Time'), ('BLOCKCHAIN_VALIDATION_TIME', 'Blockchain Validation Time')], max_length=30),
+        ),
+    ]
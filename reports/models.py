@@ -28,6 +28,17 @@ class VotingReport(models.Model):
     pdf_file = models.FileField(upload_to='reports/pdf/', blank=True)
     excel_file = models.FileField(upload_to='reports/excel/', blank=True)
     
+    # Background rendering (see reports.rendering)
+    RENDER_STATUS = [
+        ('NONE', 'Not Requested'),
+        ('PENDING', 'Pending'),
+        ('RENDERING', 'Rendering'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+    render_status = models.CharField(max_length=20, choices=RENDER_STATUS, default='NONE')
+    render_error = models.TextField(blank=True)
+    
     # Metadata
     generated_by = models.ForeignKey(AdminUser, on_delete=models.SET_NULL, null=True)
     generated_at = models.DateTimeField(auto_now_add=True)
@@ -109,6 +120,8 @@ class PerformanceReport(models.Model):
         ('CONCURRENT_USERS', 'Concurrent Users'),
         ('MEMORY_USAGE', 'Memory Usage'),
         ('CPU_USAGE', 'CPU Usage'),
+        ('REPORT_GENERATION_TIME', 'Report Generation Time'),
+        ('BLOCKCHAIN_VALIDATION_TIME', 'Blockchain Validation Time'),
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -177,6 +190,11 @@ class ReportSchedule(models.Model):
     last_run = models.DateTimeField(blank=True, null=True)
     next_run = models.DateTimeField(blank=True, null=True)
     
+    # Incremental generation (see reports.scheduler)
+    watermark = models.DateTimeField(blank=True, null=True)  # End of the last processed window
+    state = models.JSONField(default=dict, blank=True)  # Running aggregates up to the watermark
+    locked_until = models.DateTimeField(blank=True, null=True)  # Lease held by the scheduler running it
+    
     # Recipients
     email_recipients = models.JSONField(default=list)
     
@@ -186,6 +204,9 @@ class ReportSchedule(models.Model):
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['is_active', 'next_run']),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.frequency})"
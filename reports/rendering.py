@@ -0,0 +1,247 @@
+"""
+Background rendering of report artifacts (PDF / Excel).
+
+Report generation only stores report_data and queues the artifact. Worker
+threads render it off the request path, and clients poll the report's
+render_status. Artifacts are content-addressed: the file name is a hash of
+everything that goes into the document. Re-rendering unchanged report data
+reuses the stored file instead of building it again.
+"""
+import hashlib
+import json
+import logging
+import queue
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from india_blockchain_voting.lazy import lazy_import
+
+# ReportLab is only needed by the render workers
+colors = lazy_import('reportlab.lib.colors')
+platypus = lazy_import('reportlab.platypus')
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout changes so old artifacts are not reused
+RENDERER_VERSION = 1
+
+FORMATS = {
+    'PDF': ('pdf_file', 'reports/pdf', 'pdf'),
+    'EXCEL': ('excel_file', 'reports/excel', 'xlsx'),
+}
+
+
+def table_style(*extra):
+    """Shared table style plus `extra` commands"""
+    return platypus.TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        *extra
+    ])
+
+
+def content_hash(report, report_format):
+    """Hash of everything that determines the rendered artifact"""
+    payload = json.dumps({
+        'renderer': RENDERER_VERSION,
+        'format': report_format,
+        'type': report.report_type,
+        'title': report.title,
+        'data': report.report_data,
+    }, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def build_pdf(report):
+    """Build the PDF document for a report"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    buffer = BytesIO()
+    doc = platypus.SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Title
+    story.append(platypus.Paragraph(report.title, styles['Title']))
+    story.append(platypus.Spacer(1, 12))
+
+    # Report content based on type
+    data = report.report_data
+    if report.report_type == 'CONSTITUENCY_RESULTS':
+        add_constituency_results_to_pdf(story, data, styles)
+    elif report.report_type == 'PARTY_PERFORMANCE':
+        add_party_performance_to_pdf(story, data, styles)
+    elif report.report_type == 'VOTER_TURNOUT':
+        add_voter_turnout_to_pdf(story, data, styles)
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def add_constituency_results_to_pdf(story, data, styles):
+    """Add constituency results to PDF"""
+    # Election info
+    election_info = data['election_info']
+    story.append(platypus.Paragraph(f"Election: {election_info['name']}", styles['Heading2']))
+    story.append(platypus.Paragraph(f"Type: {election_info['type']}", styles['Normal']))
+    story.append(platypus.Paragraph(f"Period: {election_info['voting_period']}", styles['Normal']))
+    story.append(platypus.Spacer(1, 12))
+
+    # Summary
+    summary = data['summary']
+    summary_data = [
+        ['Metric', 'Count'],
+        ['Total Votes', summary['total_votes']],
+        ['Valid Votes', summary['valid_votes']],
+        ['NOTA Votes', summary['nota_votes']],
+        ['Invalid Votes', summary['invalid_votes']]
+    ]
+
+    summary_table = platypus.Table(summary_data)
+    summary_table.setStyle(table_style(('FONTSIZE', (0, 0), (-1, 0), 14)))
+
+    story.append(summary_table)
+    story.append(platypus.Spacer(1, 12))
+
+
+def add_party_performance_to_pdf(story, data, styles):
+    """Add party performance to PDF"""
+    story.append(platypus.Paragraph("Party Performance Analysis", styles['Heading2']))
+
+    # Party data table
+    table_data = [['Party', 'Abbreviation', 'Total Votes', 'Candidates', 'Won', 'Success Rate']]
+    for party in data['party_performance']:
+        table_data.append([
+            party['name'],
+            party['abbreviation'],
+            party['total_votes'],
+            party['total_candidates'],
+            party['winning_candidates'],
+            f"{party['success_rate']:.1f}%"
+        ])
+
+    table = platypus.Table(table_data)
+    table.setStyle(table_style(('FONTSIZE', (0, 0), (-1, 0), 10)))
+    story.append(table)
+
+
+def add_voter_turnout_to_pdf(story, data, styles):
+    """Add voter turnout to PDF"""
+    story.append(platypus.Paragraph("Voter Turnout Analysis", styles['Heading2']))
+
+    # Overall turnout
+    overall = data['overall_turnout']
+    story.append(platypus.Paragraph(f"Overall Turnout: {overall['overall_percentage']:.1f}%", styles['Normal']))
+    story.append(platypus.Paragraph(f"Total Eligible Voters: {overall['total_eligible_voters']:,}", styles['Normal']))
+    story.append(platypus.Paragraph(f"Total Votes Cast: {overall['total_votes_cast']:,}", styles['Normal']))
+    story.append(platypus.Spacer(1, 12))
+
+
+def build_excel(report):
+    """Build an Excel workbook: one sheet per list of rows, scalars on a summary sheet"""
+    import pandas as pd
+
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        summary = {}
+        for key, value in report.report_data.items():
+            if isinstance(value, list) and value and isinstance(value[0], dict):
+                pd.DataFrame(value).to_excel(writer, sheet_name=key[:31], index=False)
+            elif isinstance(value, dict):
+                summary.update({f"{key}.{k}": v for k, v in value.items() if not isinstance(v, (dict, list))})
+            else:
+                summary[key] = value
+        pd.DataFrame(list(summary.items()), columns=['Metric', 'Value']).to_excel(
+            writer, sheet_name='summary', index=False
+        )
+    return buffer.getvalue()
+
+
+BUILDERS = {'PDF': build_pdf, 'EXCEL': build_excel}
+
+
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+def _path_lock(path):
+    with _path_locks_guard:
+        return _path_locks.setdefault(path, threading.Lock())
+
+
+def render_report(report_id, report_format):
+    """Render one artifact, reusing a stored file with the same content hash"""
+    from .models import VotingReport
+
+    report = VotingReport.objects.get(id=report_id)
+    field_name, directory, extension = FORMATS[report_format]
+    path = f"{directory}/{content_hash(report, report_format)}.{extension}"
+
+    VotingReport.objects.filter(id=report_id).update(render_status='RENDERING')
+    try:
+        # Two jobs for identical content must not both build (and save) the artifact
+        with _path_lock(path):
+            if not default_storage.exists(path):
+                path = default_storage.save(path, ContentFile(BUILDERS[report_format](report)))
+    except Exception as e:
+        logger.error(f"Error rendering {report_format} for report {report_id}: {str(e)}")
+        VotingReport.objects.filter(id=report_id).update(render_status='FAILED', render_error=f"{report_format}: {str(e)}")
+        return
+
+    VotingReport.objects.filter(id=report_id).update(
+        render_status='READY', render_error='', **{field_name: path}
+    )
+
+
+class RenderQueue:
+    """In-process job queue drained by a few daemon worker threads"""
+
+    def __init__(self, workers=2):
+        self.workers = max(1, int(workers))
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def submit(self, report, report_format):
+        """Queue rendering of a report; returns immediately"""
+        from .models import VotingReport
+
+        VotingReport.objects.filter(id=report.id).update(render_status='PENDING', render_error='')
+        report.render_status = 'PENDING'
+        self._start()
+        # Workers must not pick the job up before the report row is committed
+        transaction.on_commit(lambda: self._jobs.put((report.id, report_format)))
+
+    def _start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for n in range(self.workers):
+                threading.Thread(target=self._run, name=f'report-render-{n}', daemon=True).start()
+
+    def _run(self):
+        while True:
+            report_id, report_format = self._jobs.get()
+            try:
+                render_report(report_id, report_format)
+            except Exception as e:
+                logger.error(f"Render job for report {report_id} failed: {str(e)}")
+            finally:
+                connection.close()
+                self._jobs.task_done()
+
+
+render_queue = RenderQueue(workers=getattr(settings, 'REPORT_RENDER_WORKERS', 2))
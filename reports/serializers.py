@@ -11,8 +11,8 @@ class VotingReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = VotingReport
         fields = ['id', 'election', 'constituency', 'report_type', 'report_data',
-                 'pdf_file', 'excel_file', 'generated_by', 'generated_at',
-                 'is_public', 'download_count']
+                 'pdf_file', 'excel_file', 'render_status', 'render_error',
+                 'generated_by', 'generated_at', 'is_public', 'download_count']
 
 
 class AuditReportSerializer(serializers.ModelSerializer):
@@ -46,3 +46,5 @@ class ReportRequestSerializer(serializers.Serializer):
     format = serializers.ChoiceField(choices=['PDF', 'EXCEL', 'JSON'], default='PDF')
     include_charts = serializers.BooleanField(default=True)
     is_public = serializers.BooleanField(default=False)
+    bucket = serializers.ChoiceField(choices=['hour', 'day'], required=False)  # Turnout time breakdown
+    full_integrity_scan = serializers.BooleanField(default=False)  # Re-hash every block in the background
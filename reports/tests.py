@@ -1,3 +1,183 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from elections.models import Election, ElectionConstituency, Party, Candidate, VoteRecord
+from users.models import State, Constituency, Voter, AdminUser
+from . import rendering
+from .models import ReportSchedule, VotingReport
+from .scheduler import run_schedule
+
+
+def create_election(state, **fields):
+    now = timezone.now()
+    return Election.objects.create(
+        name="General Election", election_type='LOK_SABHA', election_id="GE-TEST",
+        state=state, announcement_date=now, nomination_start_date=now,
+        nomination_end_date=now, voting_start_date=now, voting_end_date=now + timedelta(hours=8),
+        result_date=now + timedelta(days=1), **{'status': 'VOTING', **fields}
+    )
+
+
+def create_admin(state, constituency):
+    voter = Voter.objects.create(
+        voter_id='ADM0000001', email='admin@example.com', date_of_birth='1980-01-01',
+        constituency=constituency, state=state, address_line1='-', city='-',
+        pincode='000000', mobile_number='+911234567890', is_staff=True
+    )
+    AdminUser.objects.create(user=voter, role='ELECTION_COMMISSIONER', public_key='-', private_key_encrypted='-')
+    return voter
+
+
+class ConstituencyResultsReportTest(TestCase):
+    """The CONSTITUENCY_RESULTS generator is reachable from the generation endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.state = State.objects.create(name="Test State", code="TS")
+        self.constituency = Constituency.objects.create(
+            name="Constituency 1", code="C1", constituency_type='LOK_SABHA',
+            state=self.state, total_voters=100
+        )
+        self.election = create_election(self.state)
+        party = Party.objects.create(name="Party", abbreviation="P", symbol="symbol", recognition_status='NATIONAL')
+        candidate = Candidate.objects.create(
+            name="Candidate", father_name="Father", date_of_birth="1970-01-01", gender='M',
+            party=party, election=self.election, constituency=self.constituency,
+            candidate_number=1, nomination_id="NOM-1", nomination_date=timezone.now(), address="Address"
+        )
+        for n, vote_type in enumerate(['CANDIDATE', 'CANDIDATE', 'NOTA']):
+            VoteRecord.objects.create(
+                election=self.election, constituency=self.constituency,
+                candidate=candidate if vote_type == 'CANDIDATE' else None,
+                vote_type=vote_type, voter_hash=f"voter-{n}"
+            )
+        self.admin = create_admin(self.state, self.constituency)
+
+    def test_generates_constituency_results(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('reports:generate_report'), {
+            'report_type': 'CONSTITUENCY_RESULTS', 'election_id': self.election.id,
+            'constituency_id': self.constituency.id, 'format': 'JSON'
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        report = VotingReport.objects.get(report_type='CONSTITUENCY_RESULTS')
+        self.assertEqual(report.generated_by.user, self.admin)
+        self.assertEqual(report.report_data['summary'], {
+            'total_votes': 3, 'valid_votes': 2, 'nota_votes': 1, 'invalid_votes': 0
+        })
+        self.assertEqual(
+            report.report_data['constituency_results']['Constituency 1']['candidates']['Candidate']['votes'], 2
+        )
+
+
+@override_settings(REPORT_SCHEDULER_SETTLE_SECONDS=0)
+class VoterTurnoutScheduleTest(TransactionTestCase):
+    """Scheduled turnout counts each vote once and uses the election's whole electorate"""
+
+    def setUp(self):
+        self.state = State.objects.create(name="Test State", code="TS")
+        self.election = create_election(self.state)
+        self.constituencies = []
+        for n in range(2):
+            constituency = Constituency.objects.create(
+                name=f"Constituency {n}", code=f"C{n}", constituency_type='LOK_SABHA',
+                state=self.state, total_voters=100
+            )
+            ElectionConstituency.objects.create(election=self.election, constituency=constituency)
+            self.constituencies.append(constituency)
+        self.schedule = ReportSchedule.objects.create(
+            name="Turnout", report_type='VOTER_TURNOUT', frequency='DAILY',
+            schedule_config={'election_id': self.election.id}
+        )
+        self.votes = 0
+
+    def cast(self, count):
+        for _ in range(count):
+            VoteRecord.objects.create(
+                election=self.election, constituency=self.constituencies[0], voter_hash=f"voter-{self.votes}"
+            )
+            self.votes += 1
+
+    def run_turnout(self):
+        self.assertTrue(run_schedule(self.schedule.id))
+        self.schedule.refresh_from_db()
+        return VotingReport.objects.filter(report_type='VOTER_TURNOUT').order_by('generated_at').last().report_data
+
+    def test_runs_fold_new_votes_into_running_totals(self):
+        self.cast(3)
+        first = self.run_turnout()
+        watermark = self.schedule.watermark
+        self.assertIsNotNone(watermark)
+        self.assertEqual(first['overall_turnout']['total_votes_cast'], 3)
+
+        self.cast(2)
+        second = self.run_turnout()
+        self.assertGreater(self.schedule.watermark, watermark)
+        self.assertEqual(self.schedule.state['votes_by_constituency'], {str(self.constituencies[0].id): 5})
+        self.assertEqual(second['overall_turnout'], {
+            'total_eligible_voters': 200, 'total_votes_cast': 5, 'overall_percentage': 2.5
+        })
+        self.assertEqual([row['votes_cast'] for row in second['turnout_by_constituency']], [5, 0])
+
+    def test_electorate_includes_constituencies_without_votes(self):
+        report = self.run_turnout()
+        self.assertEqual(report['overall_turnout']['total_eligible_voters'], 200)
+        self.assertEqual(len(report['turnout_by_constituency']), 2)
+
+
+class ReportRenderingTest(TestCase):
+    """Artifacts are rendered off the request and reused for identical content"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        state = State.objects.create(name="Test State", code="TS")
+        self.election = create_election(state)
+
+    def create_report(self, votes=10):
+        return VotingReport.objects.create(
+            election=self.election, report_type='VOTER_TURNOUT', title="Turnout",
+            report_data={'overall_turnout': {
+                'total_eligible_voters': 100, 'total_votes_cast': votes, 'overall_percentage': float(votes)
+            }}
+        )
+
+    def test_identical_content_reuses_the_artifact(self):
+        first, second = self.create_report(), self.create_report()
+        build_pdf = mock.Mock(wraps=rendering.build_pdf)
+        with mock.patch.dict(rendering.BUILDERS, {'PDF': build_pdf}):
+            rendering.render_report(first.id, 'PDF')
+            rendering.render_report(second.id, 'PDF')
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.render_status, second.render_status), ('READY', 'READY'))
+        self.assertEqual(first.pdf_file.name, second.pdf_file.name)
+        self.assertTrue(first.pdf_file.read().startswith(b'%PDF'))
+        self.assertEqual(build_pdf.call_count, 1)
+
+    def test_changed_content_renders_a_new_artifact(self):
+        first, second = self.create_report(10), self.create_report(20)
+        for report in (first, second):
+            rendering.render_report(report.id, 'PDF')
+            report.refresh_from_db()
+        self.assertNotEqual(first.pdf_file.name, second.pdf_file.name)
+
+    def test_failure_is_recorded(self):
+        report = self.create_report()
+        with mock.patch.dict(rendering.BUILDERS, {'PDF': mock.Mock(side_effect=ValueError('boom'))}):
+            rendering.render_report(report.id, 'PDF')
+        report.refresh_from_db()
+        self.assertEqual(report.render_status, 'FAILED')
+        self.assertEqual(report.render_error, 'PDF: boom')
@@ -13,4 +13,8 @@ urlpatterns = [
     # API endpoints
     path('api/receipt/<str:vote_id>/', views.VoteReceiptAPI.as_view(), name='api_vote_receipt'),
     path('api/election-stats/<int:election_id>/', views.ElectionStatsAPI.as_view(), name='api_election_stats'),
+    path('api/generate/', views.ReportGenerationView.as_view(), name='generate_report'),
+    path('api/<uuid:report_id>/status/', views.report_status, name='report_status'),
+    path('api/<uuid:report_id>/download/', views.download_report, name='download_report'),
+    path('metrics/', views.prometheus_metrics, name='prometheus_metrics'),
 ]
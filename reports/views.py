@@ -1,7 +1,10 @@
 from django.shortcuts import render
-from django.http import HttpResponse, JsonResponse
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.urls import reverse
 from django.utils import timezone
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, Sum, Q, F
+from django.db.models.functions import TruncDate, TruncHour
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -10,22 +13,19 @@ from drf_yasg.utils import swagger_auto_schema
 import logging
 import json
 from datetime import datetime, timedelta
-from io import BytesIO
-import matplotlib.pyplot as plt
-import pandas as pd
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 
 from .models import VotingReport, AuditReport, PerformanceReport
+from . import metrics
+from .instrumentation import metrics as metrics_registry
+from .rendering import FORMATS, render_queue
 from .serializers import (
     VotingReportSerializer, AuditReportSerializer, PerformanceReportSerializer,
     ReportRequestSerializer
 )
 from elections.models import Election, VoteRecord, Party, Candidate
-from blockchain.models import Block, VoteTransaction, BlockchainAuditLog
+from blockchain.models import Block, Blockchain, VoteTransaction, BlockchainAuditLog
+from blockchain.integrity import stored_integrity, start_full_scan
+from blockchain.utils import AuditUtils
 from users.utils import get_client_ip
 
 logger = logging.getLogger(__name__)
@@ -77,21 +77,29 @@ class ReportGenerationView(APIView):
         try:
             # Generate report based on type
             if report_type == 'CONSTITUENCY_RESULTS':
-                report = self.generate_constituency_results(report_data)
+                report = self.generate_constituency_results(report_data, request)
             elif report_type == 'PARTY_PERFORMANCE':
-                report = self.generate_party_performance(report_data)
+                report = self.generate_party_performance(report_data, request)
             elif report_type == 'VOTER_TURNOUT':
-                report = self.generate_voter_turnout(report_data)
+                report = self.generate_voter_turnout(report_data, request)
             elif report_type == 'BLOCKCHAIN_AUDIT':
-                report = self.generate_blockchain_audit(report_data)
+                report = self.generate_blockchain_audit(report_data, request)
             elif report_type == 'SYSTEM_PERFORMANCE':
-                report = self.generate_system_performance(report_data)
+                report = self.generate_system_performance(report_data, request)
             else:
                 return Response(
                     {'error': 'Invalid report type'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            # Render PDF/Excel in the background; clients poll the report status
+            if isinstance(report, VotingReport) and report_data.get('format') in FORMATS:
+                render_queue.submit(report, report_data['format'])
+                return Response(
+                    VotingReportSerializer(report).data,
+                    status=status.HTTP_202_ACCEPTED
+                )
+            
             return Response(
                 VotingReportSerializer(report).data,
                 status=status.HTTP_201_CREATED            )
@@ -103,7 +111,7 @@ class ReportGenerationView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def generate_constituency_results(self, report_data):
+    def generate_constituency_results(self, report_data, request):
         """Generate constituency results report"""
         election_id = report_data.get('election_id')
         constituency_id = report_data.get('constituency_id')
@@ -142,12 +150,6 @@ class ReportGenerationView(APIView):
             is_public=report_data.get('is_public', False)
         )
         
-        # Generate PDF if requested
-        if report_data.get('format') == 'PDF':
-            pdf_file = self.generate_pdf_report(report, results_data)
-            report.pdf_file = pdf_file
-            report.save()
-        
         return report
     
     def generate_party_performance(self, report_data, request):
@@ -199,36 +201,28 @@ class ReportGenerationView(APIView):
         election_id = report_data.get('election_id')
         election = Election.objects.get(id=election_id)
         
-        # Calculate turnout by constituency
-        turnout_data = []
-        for constituency in election.constituencies.all():
-            total_voters = constituency.constituency.total_voters
-            votes_cast = VoteRecord.objects.filter(
-                election=election,
-                constituency=constituency.constituency
-            ).count()
-            
-            turnout_percentage = (votes_cast / total_voters * 100) if total_voters > 0 else 0
-            
-            turnout_data.append({
-                'constituency': constituency.constituency.name,
-                'total_voters': total_voters,
-                'votes_cast': votes_cast,
-                'turnout_percentage': round(turnout_percentage, 2)
-            })
-        
+        # Turnout by constituency from the live tallies, in one query
         report_data_obj = {
             'election_info': {
                 'name': election.name,
                 'type': election.election_type
             },
-            'turnout_by_constituency': turnout_data,
-            'overall_turnout': {
-                'total_eligible_voters': sum(item['total_voters'] for item in turnout_data),
-                'total_votes_cast': sum(item['votes_cast'] for item in turnout_data),
-                'overall_percentage': sum(item['turnout_percentage'] for item in turnout_data) / len(turnout_data) if turnout_data else 0
-            }
+            **metrics.turnout(election)
         }
+        total_eligible_voters = report_data_obj['overall_turnout']['total_eligible_voters']
+        
+        # Optional time breakdown: one grouped query over this election's votes
+        bucket = report_data.get('bucket')
+        if bucket:
+            trunc = TruncHour if bucket == 'hour' else TruncDate
+            votes_by_bucket = VoteRecord.objects.filter(election=election).annotate(
+                bucket=trunc('timestamp')
+            ).order_by('bucket').values('bucket').annotate(votes=Count('id'))
+            report_data_obj['turnout_by_' + bucket] = [{
+                'bucket': row['bucket'].isoformat(),
+                'votes_cast': row['votes'],
+                'turnout_percentage': round(row['votes'] / total_eligible_voters * 100, 2) if total_eligible_voters > 0 else 0
+            } for row in votes_by_bucket]
         
         # Create report
         report = VotingReport.objects.create(
@@ -254,22 +248,12 @@ class ReportGenerationView(APIView):
         if end_date:
             audit_logs = audit_logs.filter(timestamp__lte=end_date)
         
-        # Analyze audit data
-        audit_summary = {
-            'total_operations': audit_logs.count(),
-            'successful_operations': audit_logs.filter(success=True).count(),
-            'failed_operations': audit_logs.filter(success=False).count(),
-            'operations_by_type': {},
-            'blockchain_integrity': self.check_blockchain_integrity(),
+        # Analyze audit data (counts come from the hourly rollup, not per-action queries)
+        audit_summary = AuditUtils.generate_audit_report(None, start_date, end_date)
+        audit_summary.update({
+            'blockchain_integrity': self.check_blockchain_integrity(report_data.get('full_integrity_scan', False)),
             'security_events': self.analyze_security_events(audit_logs)
-        }
-        
-        # Count operations by type
-        for action_choice in BlockchainAuditLog.ACTION_CHOICES:
-            action = action_choice[0]
-            count = audit_logs.filter(action=action).count()
-            if count > 0:
-                audit_summary['operations_by_type'][action] = count
+        })
         
         # Create audit report
         report = AuditReport.objects.create(
@@ -289,6 +273,7 @@ class ReportGenerationView(APIView):
         end_date = report_data.get('end_date', timezone.now())
         
         # Collect performance metrics
+        block_intervals = metrics.block_interval_stats(start_date, end_date)
         performance_metrics = {
             'time_period': {
                 'start': start_date.isoformat(),
@@ -296,7 +281,7 @@ class ReportGenerationView(APIView):
             },
             'voting_metrics': {
                 'total_votes_cast': VoteRecord.objects.filter(
-                    voting_timestamp__range=[start_date, end_date]
+                    timestamp__range=[start_date, end_date]
                 ).count(),
                 'average_daily_votes': self.calculate_average_daily_votes(start_date, end_date),
                 'peak_voting_hours': self.analyze_peak_voting_hours(start_date, end_date)
@@ -305,14 +290,12 @@ class ReportGenerationView(APIView):
                 'blocks_created': Block.objects.filter(
                     timestamp__range=[start_date, end_date]
                 ).count(),
-                'average_block_time': self.calculate_average_block_time(start_date, end_date),
+                'average_block_time': block_intervals['mean'],
+                'block_interval_seconds': block_intervals,
+                'confirmation_latency_seconds': metrics.confirmation_latency_stats(start_date, end_date),
                 'transaction_throughput': self.calculate_transaction_throughput(start_date, end_date)
             },
-            'system_health': {
-                'uptime_percentage': 99.9,  # Mock data
-                'error_rate': 0.1,  # Mock data
-                'response_time_avg': 250  # Mock data in milliseconds
-            }
+            'system_health': self.calculate_system_health(start_date, end_date)
         }
         
         # Create performance report
@@ -357,32 +340,28 @@ class ReportGenerationView(APIView):
         
         return results
     
-    def check_blockchain_integrity(self):
-        """Check blockchain integrity"""
-        # Simplified integrity check
-        total_blocks = Block.objects.count()
-        valid_blocks = 0
-        
-        for block in Block.objects.all():
-            if block.is_hash_valid():
-                valid_blocks += 1
-        
-        integrity_percentage = (valid_blocks / total_blocks * 100) if total_blocks > 0 else 100
+    def check_blockchain_integrity(self, full_scan=False):
+        """Check blockchain integrity from stored block validity; optionally start full re-hash scans"""
+        integrity = stored_integrity()
+        
+        if full_scan:
+            integrity['full_scans'] = {
+                blockchain.name: start_full_scan(blockchain)
+                for blockchain in Blockchain.objects.filter(is_active=True)
+            }
         
-        return {
-            'total_blocks': total_blocks,
-            'valid_blocks': valid_blocks,
-            'integrity_percentage': round(integrity_percentage, 2),
-            'status': 'HEALTHY' if integrity_percentage > 99 else 'WARNING'
-        }
+        return integrity
     
     def analyze_security_events(self, audit_logs):
         """Analyze security events from audit logs"""
-        security_events = audit_logs.filter(success=False)
+        failed_by_action = dict(
+            audit_logs.filter(success=False).order_by().values('action')
+            .annotate(count=Count('id')).values_list('action', 'count')
+        )
         
         return {
-            'total_security_events': security_events.count(),
-            'failed_operations': list(security_events.values_list('action', flat=True)),
+            'total_security_events': sum(failed_by_action.values()),
+            'failed_operations': failed_by_action,
             'suspicious_activities': 0  # Implement proper analysis
         }
     
@@ -390,39 +369,46 @@ class ReportGenerationView(APIView):
         """Calculate average daily votes"""
         total_days = (end_date - start_date).days + 1
         total_votes = VoteRecord.objects.filter(
-            voting_timestamp__range=[start_date, end_date]
+            timestamp__range=[start_date, end_date]
         ).count()
         
         return total_votes / total_days if total_days > 0 else 0
     
     def analyze_peak_voting_hours(self, start_date, end_date):
         """Analyze peak voting hours"""
-        # Simplified analysis
-        votes_by_hour = VoteRecord.objects.filter(
-            voting_timestamp__range=[start_date, end_date]
-        ).extra(
-            select={'hour': 'EXTRACT(hour from voting_timestamp)'}
-        ).values('hour').annotate(
-            vote_count=Count('id')
-        ).order_by('-vote_count')[:3]
-        
-        return list(votes_by_hour)
+        return metrics.peak_voting_hours(start_date, end_date)
     
-    def calculate_average_block_time(self, start_date, end_date):
-        """Calculate average block creation time"""
-        blocks = Block.objects.filter(
+    def calculate_system_health(self, start_date, end_date):
+        """
+        Response time and error rate from the request timings flushed by
+        reports.instrumentation. active_interval_percentage is the share of
+        flush intervals in the period in which requests were served; an idle
+        but healthy deployment scores low, so it is not an uptime figure
+        """
+        flushed = PerformanceReport.objects.filter(
+            metric='API_RESPONSE_TIME',
             timestamp__range=[start_date, end_date]
-        ).order_by('timestamp')
-        
-        if blocks.count() < 2:
-            return 0
-        
-        total_time = 0
-        for i in range(1, blocks.count()):
-            time_diff = (blocks[i].timestamp - blocks[i-1].timestamp).total_seconds()
-            total_time += time_diff
-        
-        return total_time / (blocks.count() - 1)
+        ).values_list('timestamp', 'context')
+        
+        requests_served = 0
+        errors = 0
+        total_time = 0.0
+        intervals = set()
+        interval = getattr(settings, 'PERFORMANCE_FLUSH_INTERVAL', 60.0)
+        for timestamp, context in flushed.iterator(chunk_size=1000):
+            requests_served += context.get('count', 0)
+            total_time += context.get('sum', 0.0)
+            if context.get('status') == '5xx':
+                errors += context.get('count', 0)
+            intervals.add(int(timestamp.timestamp() // interval))
+        
+        period_intervals = max(1, int((end_date - start_date).total_seconds() // interval))
+        return {
+            'active_interval_percentage': round(min(100.0, len(intervals) / period_intervals * 100), 2),
+            'error_rate': round(errors / requests_served * 100, 2) if requests_served else 0,
+            'response_time_avg': round(total_time / requests_served * 1000, 2) if requests_served else 0,  # milliseconds
+            'requests_served': requests_served
+        }
     
     def calculate_transaction_throughput(self, start_date, end_date):
         """Calculate transaction throughput"""
@@ -433,109 +419,6 @@ class ReportGenerationView(APIView):
         total_hours = (end_date - start_date).total_seconds() / 3600
         
         return total_transactions / total_hours if total_hours > 0 else 0
-    
-    def generate_pdf_report(self, report, data):
-        """Generate PDF report"""
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title
-        title = Paragraph(report.title, styles['Title'])
-        story.append(title)
-        story.append(Spacer(1, 12))
-        
-        # Report content based on type
-        if report.report_type == 'CONSTITUENCY_RESULTS':
-            self.add_constituency_results_to_pdf(story, data, styles)
-        elif report.report_type == 'PARTY_PERFORMANCE':
-            self.add_party_performance_to_pdf(story, data, styles)
-        elif report.report_type == 'VOTER_TURNOUT':
-            self.add_voter_turnout_to_pdf(story, data, styles)
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        
-        return buffer
-    
-    def add_constituency_results_to_pdf(self, story, data, styles):
-        """Add constituency results to PDF"""
-        # Election info
-        election_info = data['election_info']
-        story.append(Paragraph(f"Election: {election_info['name']}", styles['Heading2']))
-        story.append(Paragraph(f"Type: {election_info['type']}", styles['Normal']))
-        story.append(Paragraph(f"Period: {election_info['voting_period']}", styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Summary
-        summary = data['summary']
-        summary_data = [
-            ['Metric', 'Count'],
-            ['Total Votes', summary['total_votes']],
-            ['Valid Votes', summary['valid_votes']],
-            ['NOTA Votes', summary['nota_votes']],
-            ['Invalid Votes', summary['invalid_votes']]
-        ]
-        
-        summary_table = Table(summary_data)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(summary_table)
-        story.append(Spacer(1, 12))
-    
-    def add_party_performance_to_pdf(self, story, data, styles):
-        """Add party performance to PDF"""
-        story.append(Paragraph("Party Performance Analysis", styles['Heading2']))
-        
-        # Party data table
-        party_data = data['party_performance']
-        table_data = [['Party', 'Abbreviation', 'Total Votes', 'Candidates', 'Won', 'Success Rate']]
-        
-        for party in party_data:
-            table_data.append([
-                party['name'],
-                party['abbreviation'],
-                party['total_votes'],
-                party['total_candidates'],
-                party['winning_candidates'],
-                f"{party['success_rate']:.1f}%"
-            ])
-        
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(table)
-    
-    def add_voter_turnout_to_pdf(self, story, data, styles):
-        """Add voter turnout to PDF"""
-        story.append(Paragraph("Voter Turnout Analysis", styles['Heading2']))
-        
-        # Overall turnout
-        overall = data['overall_turnout']
-        story.append(Paragraph(f"Overall Turnout: {overall['overall_percentage']:.1f}%", styles['Normal']))
-        story.append(Paragraph(f"Total Eligible Voters: {overall['total_eligible_voters']:,}", styles['Normal']))
-        story.append(Paragraph(f"Total Votes Cast: {overall['total_votes_cast']:,}", styles['Normal']))
-        story.append(Spacer(1, 12))
 
 
 @api_view(['GET'])
@@ -553,18 +436,15 @@ def download_report(request, report_id):
             )
         
         # Increment download count
-        report.download_count += 1
-        report.save()
+        VotingReport.objects.filter(id=report.id).update(download_count=F('download_count') + 1)
         
-        # Return file response
+        # Stream the file instead of reading it into memory
         if report.pdf_file:
-            response = HttpResponse(report.pdf_file.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{report.title}.pdf"'
-            return response
+            return _file_response(report.pdf_file, f"{report.title}.pdf", 'application/pdf')
         elif report.excel_file:
-            response = HttpResponse(report.excel_file.read(), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            response['Content-Disposition'] = f'attachment; filename="{report.title}.xlsx"'
-            return response
+            return _file_response(report.excel_file, f"{report.title}.xlsx", 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        elif report.render_status in ('PENDING', 'RENDERING'):
+            return Response({'status': report.render_status}, status=status.HTTP_202_ACCEPTED)
         else:
             return JsonResponse(report.report_data)
             
@@ -575,6 +455,46 @@ def download_report(request, report_id):
         )
 
 
+def _file_response(field_file, filename, content_type):
+    """
+    Hand the download to the web server when REPORT_SENDFILE_HEADER is set
+    (X-Sendfile / X-Accel-Redirect), otherwise stream it with FileResponse
+    """
+    sendfile_header = getattr(settings, 'REPORT_SENDFILE_HEADER', '')
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header == 'X-Accel-Redirect':
+            response[sendfile_header] = f"{settings.REPORT_SENDFILE_PREFIX}{field_file.name}"
+        else:
+            response[sendfile_header] = field_file.path
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    return FileResponse(field_file.open('rb'), as_attachment=True, filename=filename, content_type=content_type)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def report_status(request, report_id):
+    """Poll background rendering of a report"""
+    try:
+        report = VotingReport.objects.only(
+            'id', 'is_public', 'render_status', 'render_error', 'pdf_file', 'excel_file'
+        ).get(id=report_id)
+    except VotingReport.DoesNotExist:
+        return Response({'error': 'Report not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if not report.is_public and not request.user.is_authenticated:
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    return Response({
+        'id': str(report.id),
+        'status': report.render_status,
+        'error': report.render_error,
+        'download_url': reverse('reports:download_report', args=[report.id]) if report.render_status == 'READY' else None
+    })
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def public_reports(request):
@@ -583,12 +503,20 @@ def public_reports(request):
     serializer = VotingReportSerializer(reports, many=True)
     return Response(serializer.data)
 
+
+def prometheus_metrics(request):
+    """Request, database and blockchain timings of this process, for Prometheus to scrape"""
+    # The scraper's IP is checked first: only other callers load the session to check for staff
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1'])
+    if get_client_ip(request) not in allowed_ips and not request.user.is_staff:
+        return HttpResponse(status=403)
+    
+    return HttpResponse(metrics_registry.prometheus_text(), content_type='text/plain; version=0.0.4')
+
 from django.shortcuts import render
 from django.http import JsonResponse, HttpResponse
 from django.utils import timezone
 from django.views import View
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
 # import qrcode  # Commented out until installed
 import io
 import base64
@@ -611,6 +539,9 @@ def download_receipt(request, receipt_id):
     response['Content-Disposition'] = f'attachment; filename="receipt_{receipt_id}.pdf"'
     
     # Create PDF using reportlab (placeholder)
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    
     p = canvas.Canvas(response, pagesize=letter)
     p.drawString(100, 750, f"Vote Receipt: {receipt_id}")
     p.showPage()
@@ -22,35 +22,25 @@ class CustomAdminSite(AdminSite):
     
     def index(self, request, extra_context=None):
         """Custom index that adds dashboard data"""
-        from blockchain.models import Block, Blockchain, VoteTransaction
-        from elections.models import Party
+        from blockchain.models import VoteTransaction
+        from .dashboard import dashboard_stats
         
-        # Get election statistics
-        elections = Election.objects.all().order_by('-created_at')
-        active_elections = elections.filter(status='VOTING_OPEN').count()
-        total_elections = elections.count()
-        
-        # Get voter statistics
-        total_voters = Voter.objects.filter(is_active=True).count()
-        
-        # Get blockchain vote statistics
-        votes_cast = VoteTransaction.objects.count()
-        blockchain_count = Blockchain.objects.count()
-        block_count = Block.objects.count()
-        recent_transactions = VoteTransaction.objects.order_by('-timestamp')[:5]
-        party_count = Party.objects.count() if 'Party' in globals() else 0
+        # Counts come from a snapshot refreshed at most every ADMIN_DASHBOARD_CACHE_TTL seconds
+        stats = dashboard_stats()
         
         # Base context
         context = {
-            'elections': elections[:5],  # Get latest 5 elections
-            'total_elections': total_elections,
-            'active_elections': active_elections,
-            'total_voters': total_voters,
-            'vote_count': votes_cast,
-            'blockchain_count': blockchain_count,
-            'block_count': block_count,
-            'recent_transactions': recent_transactions,
-            'party_count': party_count,
+            'elections': Election.objects.order_by('-created_at')[:5],  # Get latest 5 elections
+            'total_elections': stats['election_count'],
+            'active_elections': stats['voting_open_count'],
+            'total_voters': stats['voter_count'],
+            'vote_count': stats['transaction_count'],
+            'blockchain_count': stats['blockchain_count'],
+            'block_count': stats['block_count'],
+            'recent_transactions': VoteTransaction.objects.select_related('block').order_by('-timestamp')[:5],
+            'party_count': stats['party_count'],
+            'system_health': stats['system_health'],
+            'stats_computed_at': stats['computed_at'],
         }
         
         # Update with any extra context
@@ -1,4 +1,5 @@
 from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
 from .models import Voter
 
 class VoterAuthBackend(ModelBackend):
@@ -8,13 +9,20 @@ class VoterAuthBackend(ModelBackend):
     """
     
     def authenticate(self, request, voter_id=None, password=None, **kwargs):
+        if voter_id is None or password is None:
+            return None
         try:
             user = Voter.objects.get(voter_id=voter_id)
-            if user.check_password(password):
-                return user
         except Voter.DoesNotExist:
-            # No user was found
-            return None
+            # Hash anyway so unknown voter IDs take as long as wrong passwords
+            Voter().set_password(password)
+            raise PermissionDenied
+        # check_password re-hashes with the current PASSWORD_HASHERS settings if needed
+        # and saves only the password column
+        if user.check_password(password):
+            return user
+        # Stop here: ModelBackend would look the voter up and hash the password again
+        raise PermissionDenied
         
     def get_user(self, user_id):
         try:
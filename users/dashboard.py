@@ -0,0 +1,182 @@
+"""
+Admin dashboard statistics.
+
+The dashboard counts scan whole tables (votes, blocks, transactions), which
+gets slow on large MySQL/PostgreSQL tables. So they are materialized into the
+cache at most once every ADMIN_DASHBOARD_CACHE_TTL seconds, whatever the
+number of admins and page loads. Once the snapshot is older than that, the
+first request to see it takes a short lock and recomputes it. Other requests
+keep getting the previous snapshot in the meantime, so at most one page load
+per TTL waits for the queries. With CACHE_BACKEND='redis' every worker shares
+one snapshot.
+
+System health comes from data the project already keeps:
+    blockchain_health  share of blocks whose stored validity flag is set;
+                       0 if the cached full scan of an active chain found
+                       tampering (blockchain.integrity)
+    request_p95_ms,    p95 response time and share of 5xx responses over
+    error_rate_pct     HEALTH_WINDOW, from the flushed PerformanceReport rows
+    locked_voters,     voters locked out now and lockouts in HEALTH_WINDOW
+    recent_lockouts
+    server_load        1-minute load average per CPU, read live on every
+                       call rather than cached (None where the OS has none)
+"""
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = 'admin_dashboard:stats'
+REFRESH_LOCK_KEY = 'admin_dashboard:refreshing'
+# How long a recompute may hold the lock if its worker dies
+REFRESH_LOCK_TIMEOUT = 60
+HEALTH_WINDOW = timedelta(minutes=15)
+
+ACTIVE_ELECTION_STATUSES = ['ANNOUNCED', 'NOMINATION_OPEN', 'NOMINATION_CLOSED', 'VOTING_OPEN', 'VOTING_CLOSED', 'COUNTING']
+
+
+def _ttl():
+    return getattr(settings, 'ADMIN_DASHBOARD_CACHE_TTL', 30)
+
+
+def _blockchain_health():
+    from blockchain.integrity import scan_result, stored_integrity
+    from blockchain.models import Blockchain
+
+    integrity = stored_integrity()
+    compromised = [
+        blockchain.name for blockchain in Blockchain.objects.filter(is_active=True).only('id', 'name', 'latest_hash')
+        if (scan_result(blockchain) or {}).get('status') == 'COMPROMISED'
+    ]
+    return {
+        'total_blocks': integrity['total_blocks'],
+        'blockchain_health': 0 if compromised else integrity['integrity_percentage'],
+        'compromised_chains': compromised,
+    }
+
+
+def _request_health(since):
+    from reports.instrumentation import BUCKETS, percentile
+    from reports.models import PerformanceReport
+
+    buckets = [0] * (len(BUCKETS) + 1)
+    requests = errors = 0
+    rows = PerformanceReport.objects.filter(
+        metric='API_RESPONSE_TIME', timestamp__gte=since
+    ).values_list('context', flat=True)
+    for context in rows.iterator():
+        count = context.get('count', 0)
+        requests += count
+        if context.get('status') == '5xx':
+            errors += count
+        for n, bucket_count in enumerate(context.get('buckets', ())[:len(buckets)]):
+            buckets[n] += bucket_count
+    return {
+        'requests': requests,
+        'request_p95_ms': round(percentile(buckets, 95) * 1000, 1) if requests else None,
+        'error_rate_pct': round(errors / requests * 100, 2) if requests else None,
+    }
+
+
+def server_load():
+    """1-minute load average as a percentage of the CPUs, or None"""
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+    return round(min(load / (os.cpu_count() or 1) * 100, 100), 1)
+
+
+def compute_stats():
+    """Every dashboard count and health figure, as plain cacheable values"""
+    from blockchain.models import Blockchain, VoteTransaction
+    from elections.models import Candidate, Election, Party, VoteRecord
+    from .models import Constituency, LoginAttempt, State, Voter
+
+    start = time.perf_counter()
+    now = timezone.now()
+    since = now - HEALTH_WINDOW
+
+    voters = Voter.objects.filter(is_active=True).aggregate(
+        total=Count('id'), locked=Count('id', filter=Q(is_locked=True, locked_until__gt=now))
+    )
+    elections = Election.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status__in=ACTIVE_ELECTION_STATUSES)),
+        voting_open=Count('id', filter=Q(status='VOTING_OPEN')),
+    )
+    blockchains = Blockchain.objects.aggregate(total=Count('id'), active=Count('id', filter=Q(is_active=True)))
+    parties = Party.objects.aggregate(total=Count('id'), active=Count('id', filter=Q(is_active=True)))
+    vote_count = VoteRecord.objects.count()
+    chain = _blockchain_health()
+
+    stats = {
+        'voter_count': voters['total'],
+        'election_count': elections['total'],
+        'active_election_count': elections['active'],
+        'voting_open_count': elections['voting_open'],
+        'vote_count': vote_count,
+        'transaction_count': VoteTransaction.objects.count(),
+        'block_count': chain['total_blocks'],
+        'blockchain_count': blockchains['total'],
+        'active_blockchain_count': blockchains['active'],
+        'party_count': parties['total'],
+        'active_party_count': parties['active'],
+        'parties_by_recognition': list(
+            Party.objects.values('recognition_status').annotate(count=Count('id')).order_by('recognition_status')
+        ),
+        'candidate_count': Candidate.objects.count(),
+        'candidates_by_party': list(
+            Candidate.objects.values('party__name').annotate(count=Count('id')).order_by('-count')[:5]
+        ),
+        'states_count': State.objects.count(),
+        'constituencies_count': Constituency.objects.count(),
+        'voter_turnout_pct': round(vote_count / voters['total'] * 100, 1) if voters['total'] else 0,
+        'system_health': {
+            'blockchain_health': chain['blockchain_health'],
+            'compromised_chains': chain['compromised_chains'],
+            **_request_health(since),
+            'locked_voters': voters['locked'],
+            'recent_lockouts': LoginAttempt.objects.filter(
+                failure_reason='LOCKED_OUT', timestamp__gte=since
+            ).count(),
+        },
+        'computed_at': now,
+    }
+    logger.info(f"Admin dashboard stats computed in {time.perf_counter() - start:.3f}s")
+    return stats
+
+
+def refresh_stats():
+    """Recompute the snapshot and store it"""
+    stats = compute_stats()
+    # Kept well past the TTL so a slow recompute never leaves the cache empty
+    cache.set(STATS_KEY, stats, max(_ttl() * 20, 600))
+    return stats
+
+
+def dashboard_stats():
+    """
+    The cached snapshot, recomputed first if it is missing or, for the one
+    request that wins the refresh lock, if it is older than the TTL.
+    Includes the live server_load in system_health.
+    """
+    stats = cache.get(STATS_KEY)
+    if stats is None:
+        stats = refresh_stats()
+    elif (timezone.now() - stats['computed_at']).total_seconds() > _ttl() \
+            and cache.add(REFRESH_LOCK_KEY, 1, REFRESH_LOCK_TIMEOUT):
+        try:
+            stats = refresh_stats()
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+
+    stats['system_health'] = {**stats['system_health'], 'server_load': server_load()}
+    return stats
@@ -0,0 +1,86 @@
+"""
+Face embedding storage format and the in-memory cache of decrypted embeddings.
+
+Embeddings are stored as 128 little-endian float32 values (512 bytes) behind a
+one-byte format marker, then Fernet-encrypted with the voter's key. Values
+written before that are JSON lists and are still read.
+
+Decrypted embeddings are cached per voter for about a voting session. Each
+entry also records the ciphertext it came from, so an entry goes stale as
+soon as the voter re-enrolls, including when that happens in another process.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from india_blockchain_voting.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+EMBEDDING_DTYPE = '<f4'  # little-endian float32
+PACKED_FORMAT = b'\x01'
+
+
+def pack_embedding(encoding):
+    """Embedding as format marker + packed float32 bytes"""
+    return PACKED_FORMAT + np.asarray(encoding, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def unpack_embedding(data):
+    """Read-only float32 array from packed bytes or a legacy JSON list"""
+    if data[:1] == PACKED_FORMAT:
+        return np.frombuffer(data, dtype=EMBEDDING_DTYPE, offset=1)
+    encoding = np.asarray(json.loads(data), dtype=EMBEDDING_DTYPE)
+    encoding.flags.writeable = False
+    return encoding
+
+
+class EmbeddingCache:
+    """Bounded LRU of decrypted embeddings keyed by voter pk, expiring after ttl seconds"""
+
+    def __init__(self, max_entries=10000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, voter_pk, ciphertext):
+        with self._lock:
+            entry = self._entries.get(voter_pk)
+            if entry is None:
+                return None
+            cached_ciphertext, encoding, expires_at = entry
+            if cached_ciphertext != ciphertext or expires_at < time.monotonic():
+                del self._entries[voter_pk]
+                return None
+            self._entries.move_to_end(voter_pk)
+            return encoding
+
+    def put(self, voter_pk, ciphertext, encoding):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[voter_pk] = (ciphertext, encoding, time.monotonic() + self.ttl)
+            self._entries.move_to_end(voter_pk)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, voter_pk):
+        with self._lock:
+            self._entries.pop(voter_pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+embedding_cache = EmbeddingCache(
+    max_entries=getattr(settings, 'FACE_EMBEDDING_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'FACE_EMBEDDING_CACHE_TTL', 3600)
+)
@@ -3,24 +3,25 @@ Face recognition utilities for the blockchain voting system.
 This module provides face recognition functionality with fallback support.
 """
 import logging
-import numpy as np
 import base64
 import tempfile
 import os
 from io import BytesIO
-from PIL import Image
 from django.conf import settings
 
+from india_blockchain_voting.lazy import lazy_import, is_available
+from .face_service import face_service, FaceServiceBusy
+
 logger = logging.getLogger(__name__)
 
-# Try to import face recognition libraries
-try:
-    import face_recognition
-    import cv2
-    FACE_RECOGNITION_AVAILABLE = True
-    logger.info("Face recognition libraries loaded successfully")
-except ImportError:
-    FACE_RECOGNITION_AVAILABLE = False
+# Heavy libraries are imported on first use (dlib models load with face_recognition)
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+face_recognition = lazy_import('face_recognition')
+cv2 = lazy_import('cv2')
+
+FACE_RECOGNITION_AVAILABLE = is_available('face_recognition') and is_available('cv2')
+if not FACE_RECOGNITION_AVAILABLE:
     logger.warning("Face recognition libraries not available. Face verification will be disabled.")
 
 
@@ -29,8 +30,13 @@ def is_face_recognition_available():
     return FACE_RECOGNITION_AVAILABLE
 
 
-def extract_face_encoding(image_path_or_array):
-    """Extract face encoding from image"""
+def detect_faces(image, model='hog'):
+    """Face locations (top, right, bottom, left) in an RGB image array"""
+    return face_recognition.face_locations(image, model=model)
+
+
+def extract_face_encoding(image_path_or_array, face_locations=None):
+    """Extract face encoding from image, reusing face_locations when already detected"""
     if not FACE_RECOGNITION_AVAILABLE:
         logger.warning("Face recognition not available")
         return None
@@ -43,7 +49,7 @@ def extract_face_encoding(image_path_or_array):
             image = image_path_or_array
         
         # Find face encodings
-        face_encodings = face_recognition.face_encodings(image)
+        face_encodings = face_recognition.face_encodings(image, known_face_locations=face_locations)
         
         if len(face_encodings) == 0:
             return None
@@ -66,14 +72,12 @@ def compare_faces(known_encoding, unknown_encoding, tolerance=0.6):
         return False, 0.0
     
     try:
-        # Convert to numpy arrays if needed
-        if not isinstance(known_encoding, np.ndarray):
-            known_encoding = np.array(known_encoding)
-        if not isinstance(unknown_encoding, np.ndarray):
-            unknown_encoding = np.array(unknown_encoding)
+        # Stored encodings are already float32 arrays; asarray does not copy them
+        known_encoding = np.asarray(known_encoding, dtype=np.float32)
+        unknown_encoding = np.asarray(unknown_encoding, dtype=np.float32)
         
-        # Calculate face distance
-        face_distance = face_recognition.face_distance([known_encoding], unknown_encoding)[0]
+        # Calculate face distance (what face_recognition.face_distance computes)
+        face_distance = float(np.linalg.norm(known_encoding - unknown_encoding))
         
         # Determine if faces match
         is_match = face_distance <= tolerance
@@ -86,8 +90,12 @@ def compare_faces(known_encoding, unknown_encoding, tolerance=0.6):
         return False, 0.0
 
 
-def validate_face_image_quality(image_path_or_array):
-    """Validate if image has good quality for face recognition"""
+def validate_face_image_quality(image_path_or_array, face_locations=None, scale=1.0, image_size=None):
+    """
+    Validate if image has good quality for face recognition.
+    face_locations may come from a copy downscaled by `scale`, in which case
+    image_size is the (width, height) of the original image.
+    """
     if not FACE_RECOGNITION_AVAILABLE:
         return True, "Face recognition not available, skipping quality check"
     
@@ -102,12 +110,16 @@ def validate_face_image_quality(image_path_or_array):
             return False, "Could not load image"
         
         # Check image dimensions
-        height, width = image.shape[:2]
+        if image_size:
+            width, height = image_size
+        else:
+            height, width = image.shape[:2]
         if width < 200 or height < 200:
             return False, "Image resolution too low (minimum 200x200 pixels)"
         
         # Check if face is detectable
-        face_locations = face_recognition.face_locations(image)
+        if face_locations is None:
+            face_locations = face_recognition.face_locations(image)
         if len(face_locations) == 0:
             return False, "No face detected in image"
         
@@ -116,8 +128,8 @@ def validate_face_image_quality(image_path_or_array):
         
         # Check face size relative to image
         top, right, bottom, left = face_locations[0]
-        face_width = right - left
-        face_height = bottom - top
+        face_width = (right - left) / scale
+        face_height = (bottom - top) / scale
         
         if face_width < 100 or face_height < 100:
             return False, "Face too small in image"
@@ -140,41 +152,62 @@ def validate_face_image_quality(image_path_or_array):
         return False, f"Error validating image: {str(e)}"
 
 
+def load_image_for_detection(image_data, max_dimension=None):
+    """
+    Decode image bytes to an RGB array no larger than max_dimension on its
+    longest side. JPEGs are reduced while decoding. Returns the array, the
+    scale applied and the original (width, height).
+    """
+    pil_image = Image.open(BytesIO(image_data))
+    image_size = pil_image.size
+    
+    scale = 1.0
+    if max_dimension and max(image_size) > max_dimension:
+        scale = max_dimension / max(image_size)
+        target = (max(1, round(image_size[0] * scale)), max(1, round(image_size[1] * scale)))
+        pil_image.draft('RGB', target)
+        if pil_image.mode != 'RGB':
+            pil_image = pil_image.convert('RGB')
+        pil_image = pil_image.resize(target, Image.BILINEAR)
+    elif pil_image.mode != 'RGB':
+        pil_image = pil_image.convert('RGB')
+    
+    return np.array(pil_image), scale, image_size
+
+
+def analyze_face_image(image, scale=1.0, image_size=None, model='hog'):
+    """
+    Detect faces once and reuse the locations for the quality checks and the
+    encoding. Returns (encoding or None, message).
+    """
+    face_locations = detect_faces(image, model)
+    
+    is_valid, message = validate_face_image_quality(image, face_locations, scale, image_size)
+    if not is_valid:
+        return None, message
+    
+    encoding = extract_face_encoding(image, face_locations)
+    if encoding is None:
+        return None, "Could not extract face features from image"
+    
+    return encoding, "Face encoding extracted successfully"
+
+
 def process_face_image_for_encoding(image_file):
-    """Process uploaded image file for face encoding"""
+    """Process uploaded image file for face encoding (in the face worker pool)"""
     if not FACE_RECOGNITION_AVAILABLE:
         return None, "Face recognition not available"
     
     try:
-        from PIL import Image
-        import io
-        
         # Read image file
         image_data = image_file.read()
         image_file.seek(0)  # Reset file pointer
         
-        # Convert to PIL Image
-        pil_image = Image.open(io.BytesIO(image_data))
-        
-        # Convert to RGB if needed
-        if pil_image.mode != 'RGB':
-            pil_image = pil_image.convert('RGB')
-        
-        # Convert to numpy array
-        image_array = np.array(pil_image)
-        
-        # Validate image quality
-        is_valid, message = validate_face_image_quality(image_array)
-        if not is_valid:
-            return None, message
-        
-        # Extract face encoding
-        encoding = extract_face_encoding(image_array)
-        if encoding is None:
-            return None, "Could not extract face features from image"
-        
-        return encoding.tolist(), "Face encoding extracted successfully"
+        return face_service.analyze(image_data)
     
+    except FaceServiceBusy as e:
+        logger.warning(f"Face processing rejected under load: {e}")
+        return None, "Face verification is busy, please try again"
     except Exception as e:
         logger.error(f"Error processing face image: {e}")
         return None, f"Error processing image: {str(e)}"
@@ -196,7 +229,7 @@ def verify_voter_face(voter, uploaded_image_file):
     try:
         # Get stored face encoding
         stored_encoding = voter.get_face_encoding()
-        if not stored_encoding:
+        if stored_encoding is None:
             return False, 0.0, "No face encoding stored for voter"
         
         # Process uploaded image
@@ -205,7 +238,8 @@ def verify_voter_face(voter, uploaded_image_file):
             return False, 0.0, message
         
         # Compare faces
-        is_match, confidence = compare_faces(stored_encoding, uploaded_encoding)
+        tolerance = getattr(settings, 'FACE_RECOGNITION_TOLERANCE', 0.6)
+        is_match, confidence = compare_faces(stored_encoding, uploaded_encoding, tolerance)
         
         status_message = "Face verification successful" if is_match else "Face verification failed"
         return is_match, confidence, status_message
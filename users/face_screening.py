@@ -0,0 +1,170 @@
+"""
+1:N screening for voters enrolled more than once under different voter IDs.
+
+All embeddings in scope are loaded into one float32 matrix. Pairwise
+distances are computed block by block as |a|^2 + |b|^2 - 2ab, one matrix
+product per block, so memory stays at a few block_size x block_size arrays
+whatever the number of voters. Row blocks are spread over worker processes
+that share the matrix through shared memory. Only pairs closer than the
+tolerance leave a worker.
+"""
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from cryptography.fernet import Fernet, InvalidToken
+
+from .face_embeddings import unpack_embedding
+
+EMBEDDING_SIZE = 128
+BLOCK_SIZE = 2048
+DECRYPT_CHUNK_SIZE = 5000
+
+# Per-process screening state, set by _init_worker
+_state = {}
+
+
+def _decrypt_chunk(rows):
+    """(encryption_key, ciphertext) rows to a matrix; undecryptable rows become NaN"""
+    matrix = np.full((len(rows), EMBEDDING_SIZE), np.nan, dtype=np.float32)
+    for n, (key, ciphertext) in enumerate(rows):
+        try:
+            matrix[n] = unpack_embedding(Fernet(key.encode()).decrypt(ciphertext.encode()))
+        except (InvalidToken, ValueError):
+            continue
+    return matrix
+
+
+def _chunks(rows, voter_ids):
+    """Stream (key, ciphertext) chunks from the rows, recording each voter id in order"""
+    chunk = []
+    for voter_id, key, ciphertext in rows.iterator(chunk_size=DECRYPT_CHUNK_SIZE):
+        voter_ids.append(voter_id)
+        chunk.append((key, ciphertext))
+        if len(chunk) == DECRYPT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_embeddings(voters, pool=None, in_flight=4):
+    """
+    Voter ids and embedding matrix of every voter in the queryset with a
+    stored face encoding. Rows are streamed chunk by chunk into a
+    preallocated matrix; with a `pool`, at most `in_flight` chunks are
+    being decrypted at a time.
+    """
+    rows = voters.exclude(encrypted_face_encoding='').order_by('pk').values_list(
+        'voter_id', 'encryption_key', 'encrypted_face_encoding'
+    )
+    count = rows.count()
+    matrix = np.full((count, EMBEDDING_SIZE), np.nan, dtype=np.float32)
+    voter_ids = []
+    filled = 0
+
+    def fill(part):
+        nonlocal filled
+        matrix[filled:filled + len(part)] = part
+        filled += len(part)
+
+    # apply_async rather than imap: imap would run the database iterator in the pool's feeder thread
+    pending = deque()
+    for chunk in _chunks(rows[:count], voter_ids):
+        if pool is None:
+            fill(_decrypt_chunk(chunk))
+            continue
+        pending.append(pool.apply_async(_decrypt_chunk, (chunk,)))
+        if len(pending) >= in_flight:
+            fill(pending.popleft().get())
+    while pending:
+        fill(pending.popleft().get())
+
+    # Only copy the matrix when rows were deleted since counting or failed to decrypt
+    matrix = matrix[:filled]
+    valid = ~np.isnan(matrix).any(axis=1)
+    if not valid.all():
+        matrix = matrix[valid]
+    return np.array(voter_ids)[valid], matrix
+
+
+def _init_worker(shm_name, shape, tolerance):
+    shm = SharedMemory(name=shm_name) if shm_name else None
+    matrix = np.ndarray(shape, dtype=np.float32, buffer=shm.buf) if shm else _state['matrix']
+    _state.update(
+        shm=shm,
+        matrix=matrix,
+        norms=np.einsum('ij,ij->i', matrix, matrix),
+        limit=tolerance * tolerance,
+    )
+
+
+def _screen_rows(task):
+    """Pairs (i, j > i) within tolerance for rows [start, stop) against every later row"""
+    start, stop, block_size = task
+    matrix, norms, limit = _state['matrix'], _state['norms'], _state['limit']
+
+    rows = matrix[start:stop]
+    row_norms = norms[start:stop, None]
+    found_i, found_j, found_d = [], [], []
+    for col in range(start, len(matrix), block_size):
+        cols = matrix[col:col + block_size]
+        squared = row_norms + norms[None, col:col + block_size] - 2.0 * (rows @ cols.T)
+        i, j = np.nonzero(squared <= limit)
+        i += start
+        j += col
+        upper = j > i
+        found_i.append(i[upper])
+        found_j.append(j[upper])
+        found_d.append(np.sqrt(np.maximum(squared[i[upper] - start, j[upper] - col], 0.0)))
+
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+
+
+def screen_embeddings(matrix, tolerance, block_size=BLOCK_SIZE, workers=1):
+    """
+    Index pairs (i, j, distance) with distance <= tolerance, sorted by
+    distance, and timing stats of the run.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    count = len(matrix)
+    tasks = [(start, min(start + block_size, count), block_size) for start in range(0, count, block_size)]
+
+    started = time.perf_counter()
+    if workers > 1 and len(tasks) > 1:
+        shm = SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        try:
+            np.ndarray(matrix.shape, dtype=np.float32, buffer=shm.buf)[:] = matrix
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(workers, initializer=_init_worker, initargs=(shm.name, matrix.shape, tolerance)) as pool:
+                results = list(pool.imap_unordered(_screen_rows, tasks))
+        finally:
+            shm.close()
+            shm.unlink()
+    else:
+        _state['matrix'] = matrix
+        _init_worker(None, matrix.shape, tolerance)
+        results = [_screen_rows(task) for task in tasks]
+        _state.clear()
+    elapsed = time.perf_counter() - started
+
+    if results:
+        i, j, distances = (np.concatenate(parts) for parts in zip(*results))
+    else:
+        i = j = np.empty(0, dtype=np.int64)
+        distances = np.empty(0, dtype=np.float32)
+    order = np.argsort(distances, kind='stable')
+
+    pairs_compared = count * (count - 1) // 2
+    stats = {
+        'embeddings': count,
+        'pairs_compared': pairs_compared,
+        'pairs_flagged': len(order),
+        'seconds': round(elapsed, 3),
+        'pairs_per_second': round(pairs_compared / elapsed) if elapsed else 0,
+        'block_size': block_size,
+        'workers': workers,
+    }
+    return [(int(i[n]), int(j[n]), float(distances[n])) for n in order], stats
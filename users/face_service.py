@@ -0,0 +1,122 @@
+"""
+Face processing outside the web workers.
+
+Detection and encoding run in a pool of worker processes. Each worker imports
+face_recognition once, so the dlib detector and encoder models stay loaded
+between requests. A bounded number of images may be queued or in flight at a
+time. A request that cannot get a slot within FACE_QUEUE_TIMEOUT seconds, or
+whose result takes longer than FACE_PROCESSING_TIMEOUT, gets FaceServiceBusy
+rather than tying up its Django worker.
+"""
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FaceServiceBusy(Exception):
+    """Face processing is saturated or too slow to answer in time"""
+    pass
+
+
+def _init_worker():
+    # The module binds face_recognition and cv2 lazily; touching them imports
+    # the libraries, and with them the dlib models, once for the life of the worker
+    from . import face_recognition as face_module
+
+    if face_module.FACE_RECOGNITION_AVAILABLE:
+        face_module.face_recognition.face_locations
+        face_module.cv2.resize
+        face_module.np.asarray
+
+
+def _analyze(image_data, max_dimension, model):
+    """Runs in a worker: decode, downscale, detect once, check quality and encode"""
+    from .face_recognition import load_image_for_detection, analyze_face_image
+
+    image, scale, image_size = load_image_for_detection(image_data, max_dimension)
+    encoding, message = analyze_face_image(image, scale, image_size, model)
+    return (encoding.tolist() if encoding is not None else None), message
+
+
+class FaceProcessingService:
+    """Process pool for face detection and encoding with backpressure"""
+
+    def __init__(self, workers=2, max_pending=None, queue_timeout=2.0, timeout=10.0,
+                 max_dimension=800, model='hog'):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.max_dimension = max_dimension
+        self.model = model
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 4)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a threaded web worker is not safe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+            return self._pool
+
+    def _reset_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args):
+        """Run fn(*args) in the pool and wait for its result"""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise FaceServiceBusy(f"No face worker free within {self.queue_timeout}s")
+
+        pool = self._get_pool()
+        try:
+            future = pool.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the worker is done, even if the caller gave up on it
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise FaceServiceBusy(f"Face processing took longer than {self.timeout}s")
+        except BrokenProcessPool:
+            logger.error("Face worker pool broke, restarting it")
+            self._reset_pool(pool)
+            raise
+
+    def analyze(self, image_data):
+        """Encoding (list) of the single face in image_data and a status message"""
+        return self.submit(_analyze, image_data, self.max_dimension, self.model)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+face_service = FaceProcessingService(
+    workers=getattr(settings, 'FACE_WORKERS', 2),
+    max_pending=getattr(settings, 'FACE_MAX_PENDING', None),
+    queue_timeout=getattr(settings, 'FACE_QUEUE_TIMEOUT', 2.0),
+    timeout=getattr(settings, 'FACE_PROCESSING_TIMEOUT', 10.0),
+    max_dimension=getattr(settings, 'FACE_MAX_IMAGE_DIMENSION', 800),
+    model=getattr(settings, 'FACE_RECOGNITION_MODEL', 'hog'),
+)
+atexit.register(face_service.shutdown)
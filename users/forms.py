@@ -125,7 +125,7 @@ class VoterRegistrationForm(forms.ModelForm):
             if is_face_recognition_available() and face_image:
                 encoding = extract_face_encoding(face_image)
                 if encoding is not None:
-                    user.face_encoding = encoding.tolist()
+                    user.set_face_encoding(encoding)
                     
             # Save changes
             user.save()
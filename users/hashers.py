@@ -0,0 +1,51 @@
+"""
+Password hashers whose cost is set from settings.
+
+The first entry of PASSWORD_HASHERS hashes new passwords. When a voter logs
+in with a hash made by another hasher, or by this one with different cost
+parameters, Django re-hashes the password with the current settings and saves
+only the password column. Lowering the cost before a polling day therefore
+takes effect as voters log in, and raising it again later works the same way.
+
+benchmarks/bench_login.py measures logins per second at different costs.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+class TunableScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with PASSWORD_SCRYPT_WORK_FACTOR (N), _BLOCK_SIZE (r) and _PARALLELISM (p)"""
+
+    @property
+    def work_factor(self):
+        return getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14)
+
+    @property
+    def block_size(self):
+        return getattr(settings, 'PASSWORD_SCRYPT_BLOCK_SIZE', 8)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_SCRYPT_PARALLELISM', 1)
+
+    @property
+    def maxmem(self):
+        # scrypt needs ~128 * N * r bytes and OpenSSL refuses more than 32 MiB by default.
+        # Leave room for verifying older hashes made with a higher cost.
+        return max(2 * 128 * self.work_factor * self.block_size, 128 * 1024 * 1024)
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with PASSWORD_ARGON2_TIME_COST, _MEMORY_COST (KiB) and _PARALLELISM; needs argon2-cffi"""
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_TIME_COST', 2)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST', 102400)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_ARGON2_PARALLELISM', 8)
@@ -0,0 +1,84 @@
+"""
+Re-encryption of voter PII under fresh per-voter keys.
+
+Every voter has their own Fernet key. Rotating it means decrypting each of
+the voter's encrypted fields with the old key and encrypting it with a new
+one, which MultiFernet([new, old]).rotate() does per token. The crypto runs
+in worker processes on plain tuples, so workers never touch the database.
+
+Rows are written back in one bulk_update per chunk. Before writing, the chunk
+is re-read under select_for_update and any voter whose key or ciphertexts
+changed since it was read (e.g. a face re-enrolment) is skipped rather than
+overwritten; rotate_voter_keys --retry picks it up later. Cached face embeddings need no
+invalidation: users.face_embeddings keys them by ciphertext.
+"""
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
+KEY_FIELD = 'encryption_key'
+ENCRYPTED_FIELDS = (
+    'encrypted_voter_card_number',
+    'encrypted_aadhaar_number',
+    'encrypted_face_encoding',
+    'encrypted_fingerprint_data',
+)
+FIELDS = (KEY_FIELD,) + ENCRYPTED_FIELDS
+CHUNK_SIZE = 2000
+
+
+def rotate_rows(rows):
+    """
+    Rotate (pk, key, *ciphertexts) rows to fresh keys. Returns the rotated
+    rows in the same layout and the pks that could not be decrypted.
+    """
+    rotated = []
+    failed = []
+    for pk, key, *ciphertexts in rows:
+        new_key = Fernet.generate_key()
+        try:
+            fernet = MultiFernet([Fernet(new_key), Fernet(key.encode())])
+            values = [fernet.rotate(value.encode()).decode() if value else value for value in ciphertexts]
+        except (InvalidToken, ValueError):
+            failed.append(pk)
+            continue
+        rotated.append((pk, new_key.decode(), *values))
+    return rotated, failed
+
+
+def rotate_chunk(rows, pool=None, workers=1):
+    """rotate_rows() over a chunk, split across `pool` if given"""
+    if pool is None or workers < 2 or len(rows) < 2 * workers:
+        return rotate_rows(rows)
+
+    size = -(-len(rows) // workers)
+    rotated = []
+    failed = []
+    for part_rotated, part_failed in pool.map(rotate_rows, [rows[n:n + size] for n in range(0, len(rows), size)]):
+        rotated.extend(part_rotated)
+        failed.extend(part_failed)
+    return rotated, failed
+
+
+def write_chunk(rows, rotated):
+    """
+    bulk_update the rotated rows whose stored values still match `rows` (as
+    read); returns the number written and the pks skipped.
+    """
+    from django.db import transaction
+    from .models import Voter
+
+    read = {row[0]: tuple(row[1:]) for row in rows}
+    with transaction.atomic():
+        current = {
+            row[0]: tuple(row[1:])
+            for row in Voter.objects.select_for_update().filter(pk__in=[row[0] for row in rotated])
+            .values_list('pk', *FIELDS)
+        }
+        voters = []
+        skipped = []
+        for pk, *values in rotated:
+            if current.get(pk) == read[pk]:
+                voters.append(Voter(pk=pk, **dict(zip(FIELDS, values))))
+            else:
+                skipped.append(pk)
+        Voter.objects.bulk_update(voters, fields=list(FIELDS))
+    return len(voters), skipped
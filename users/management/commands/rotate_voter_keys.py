@@ -0,0 +1,131 @@
+import json
+import multiprocessing
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.key_rotation import CHUNK_SIZE, FIELDS, rotate_chunk, write_chunk
+from users.models import Voter
+
+
+class Command(BaseCommand):
+    help = 'Give voters fresh encryption keys and re-encrypt their PII, resumable from a checkpoint'
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--constituency', type=str, help='Constituency code to rotate')
+        scope.add_argument('--state', type=str, help='State code to rotate')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Voters read and written per chunk')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--checkpoint', type=str, default='rotate_voter_keys.checkpoint.json',
+                            help='File recording progress; an interrupted run resumes from it')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+        parser.add_argument('--retry', action='store_true',
+                            help='Rotate only the voters an earlier run skipped or could not decrypt')
+
+    def handle(self, *args, **options):
+        scope = {'constituency': options['constituency'], 'state': options['state']}
+        checkpoint_path = options['checkpoint']
+        if options['retry'] and (options['restart'] or not os.path.exists(checkpoint_path)):
+            raise CommandError(f"--retry needs the checkpoint {checkpoint_path} of an earlier run")
+        progress = self._load_checkpoint(checkpoint_path, scope, options['restart'])
+        if progress['last_pk'] and not options['retry']:
+            self.stderr.write(f"Resuming after voter pk {progress['last_pk']} ({progress['written']} already rotated)")
+
+        voters = Voter.objects.all()
+        if options['constituency']:
+            voters = voters.filter(constituency__code=options['constituency'])
+        elif options['state']:
+            voters = voters.filter(state__code=options['state'])
+        voters = voters.order_by('pk').values_list('pk', *FIELDS)
+
+        workers = max(1, options['workers'])
+        chunk_size = max(1, options['chunk_size'])
+        pool = multiprocessing.get_context('spawn').Pool(workers) if workers > 1 else None
+        started = time.perf_counter()
+        rows_done = 0
+        try:
+            if options['retry']:
+                # Only the voters still outstanding; each chunk drops them from the lists before re-adding misses
+                outstanding = sorted(set(progress['skipped']) | set(progress['failed']))
+                for start in range(0, len(outstanding), chunk_size):
+                    pks = outstanding[start:start + chunk_size]
+                    rows = list(voters.filter(pk__in=pks))
+                    self._rotate(rows, pks, progress, pool, workers, checkpoint_path)
+                    rows_done += len(rows)
+                    self._report(f"Retried {start + len(pks)} of {len(outstanding)}", rows_done, started)
+            else:
+                while True:
+                    rows = list(voters.filter(pk__gt=progress['last_pk'])[:chunk_size])
+                    if not rows:
+                        break
+
+                    progress['last_pk'] = rows[-1][0]
+                    self._rotate(rows, [row[0] for row in rows], progress, pool, workers, checkpoint_path)
+                    rows_done += len(rows)
+                    self._report(f"Up to pk {progress['last_pk']}", rows_done, started)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        elapsed = time.perf_counter() - started
+        skipped, failed = len(progress['skipped']), len(progress['failed'])
+        # The checkpoint keeps the voters still to rotate for --retry
+        if not (skipped or failed) and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(json.dumps({
+            'written': progress['written'],
+            'skipped': skipped,
+            'failed': failed,
+            'rows_this_run': rows_done,
+            'seconds': round(elapsed, 2),
+            'rows_per_s': round(rows_done / elapsed) if elapsed else None,
+        }, indent=2))
+
+        if skipped or failed:
+            self.stdout.write(self.style.WARNING(
+                f"Rotated {progress['written']} voters; {skipped} changed during the run and {failed} could "
+                f"not be decrypted. Run again with --retry to rotate only those."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rotated keys for {progress['written']} voters"))
+
+    def _rotate(self, rows, pks, progress, pool, workers, checkpoint_path):
+        """Rotate and write one chunk, recording in progress which of `pks` are still to rotate"""
+        rotated, failed = rotate_chunk(rows, pool, workers)
+        written, skipped = write_chunk(rows, rotated)
+
+        done = set(pks)
+        progress['written'] += written
+        progress['skipped'] = [pk for pk in progress['skipped'] if pk not in done] + skipped
+        progress['failed'] = [pk for pk in progress['failed'] if pk not in done] + failed
+        self._save_checkpoint(checkpoint_path, progress)
+        for pk in failed:
+            self.stderr.write(self.style.WARNING(f"Voter pk {pk}: could not decrypt with the current key"))
+
+    def _report(self, position, rows_done, started):
+        elapsed = time.perf_counter() - started
+        self.stderr.write(f"{position}: {rows_done} voters this run, {rows_done / elapsed:.0f} rows/s")
+
+    def _load_checkpoint(self, path, scope, restart):
+        progress = {'scope': scope, 'last_pk': 0, 'written': 0, 'skipped': [], 'failed': []}
+        if restart or not os.path.exists(path):
+            return progress
+
+        with open(path) as f:
+            saved = json.load(f)
+        if saved.get('scope') != scope:
+            raise CommandError(
+                f"Checkpoint {path} is for {saved.get('scope')}, not {scope}. "
+                f"Use the same scope, another --checkpoint or --restart."
+            )
+        progress.update(saved)
+        return progress
+
+    def _save_checkpoint(self, path, progress):
+        # Written to a temporary file and renamed, so an interrupted write never leaves a torn checkpoint
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(progress, f)
+        os.replace(f'{path}.tmp', path)
@@ -0,0 +1,71 @@
+import csv
+import json
+import multiprocessing
+import os
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.face_screening import BLOCK_SIZE, load_embeddings, screen_embeddings
+from users.models import Voter
+
+
+class Command(BaseCommand):
+    help = 'Flag pairs of voters whose enrolled faces match, i.e. possible duplicate registrations'
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--constituency', type=str, help='Constituency code to screen')
+        scope.add_argument('--state', type=str, help='State code to screen')
+        scope.add_argument('--synthetic', type=int, help='Screen N random embeddings instead, to measure throughput')
+        parser.add_argument('--tolerance', type=float, default=None,
+                            help='Match distance (default: FACE_RECOGNITION_TOLERANCE)')
+        parser.add_argument('--block-size', type=int, default=BLOCK_SIZE, help='Rows per distance block')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--output', type=str, help='Write flagged pairs to this CSV file')
+
+    def handle(self, *args, **options):
+        tolerance = options['tolerance'] or getattr(settings, 'FACE_RECOGNITION_TOLERANCE', 0.6)
+        workers = max(1, options['workers'])
+
+        if options['synthetic']:
+            rng = np.random.default_rng(0)
+            matrix = rng.normal(scale=0.1, size=(options['synthetic'], 128)).astype(np.float32)
+            voter_ids = np.array([f'SYN{n:07d}' for n in range(len(matrix))])
+        else:
+            voters = Voter.objects.all()
+            if options['constituency']:
+                voters = voters.filter(constituency__code=options['constituency'])
+            elif options['state']:
+                voters = voters.filter(state__code=options['state'])
+
+            self.stderr.write("Decrypting embeddings...")
+            if workers > 1:
+                with multiprocessing.get_context('spawn').Pool(workers) as pool:
+                    voter_ids, matrix = load_embeddings(voters, pool, in_flight=2 * workers)
+            else:
+                voter_ids, matrix = load_embeddings(voters)
+
+        if len(matrix) < 2:
+            raise CommandError(f"Need at least two enrolled faces to screen, found {len(matrix)}")
+
+        self.stderr.write(f"Screening {len(matrix)} embeddings with {workers} workers...")
+        pairs, stats = screen_embeddings(matrix, tolerance, options['block_size'], workers)
+        stats['tolerance'] = tolerance
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['voter_id', 'other_voter_id', 'distance'])
+                for i, j, distance in pairs:
+                    writer.writerow([voter_ids[i], voter_ids[j], f'{distance:.4f}'])
+        else:
+            for i, j, distance in pairs[:50]:
+                self.stdout.write(f"{voter_ids[i]}  {voter_ids[j]}  {distance:.4f}")
+            if len(pairs) > 50:
+                self.stdout.write(f"... {len(pairs) - 50} more (use --output)")
+
+        self.stdout.write(json.dumps(stats, indent=2))
+        style = self.style.WARNING if pairs else self.style.SUCCESS
+        self.stdout.write(style(f"{len(pairs)} possible duplicate registrations"))
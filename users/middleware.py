@@ -1,22 +1,78 @@
+"""
+Login enforcement and the paths that skip per-user work.
+
+The paths are resolved with reverse() once, when the middleware is created,
+into a frozenset of exact paths and a tuple of prefixes. Matching a request is
+then a set lookup and one str.startswith(), whatever the number of paths.
+
+Sessionless paths (static and media files, metrics and the peer-to-peer
+blockchain API) need not know who the user is. Middleware lets them through
+without reading request.user, so their session is not loaded unless the view
+asks: metrics only does so for callers outside METRICS_ALLOWED_IPS.
+"""
+from functools import lru_cache
+
+from django.conf import settings
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.deprecation import MiddlewareMixin
 
+# Blockchain URL names that other nodes call
+PEER_URL_NAMES = ('receive_block', 'register_node', 'nodes_list', 'consensus', 'node_status')
+
+
+class PathSet:
+    """Exact paths and path prefixes"""
+
+    def __init__(self, exact=(), prefixes=()):
+        self.exact = frozenset(exact)
+        self.prefixes = tuple(dict.fromkeys(prefixes))
+
+    def __contains__(self, path):
+        return path in self.exact or path.startswith(self.prefixes)
+
+    def __or__(self, other):
+        return PathSet(self.exact | other.exact, self.prefixes + other.prefixes)
+
+
+def _url_prefix(url):
+    # STATIC_URL may be set without the leading slash
+    return url if url.startswith('/') else f'/{url}'
+
+
+@lru_cache(maxsize=None)
+def sessionless_paths():
+    """Paths whose requests must not load the session"""
+    prefixes = [_url_prefix(settings.STATIC_URL), _url_prefix(settings.MEDIA_URL)]
+    # Chains are fetched as <prefix>/<blockchain id>/
+    prefixes.append(reverse('blockchain:get_chain', args=[0])[:-len('0/')])
+    exact = [reverse(f'blockchain:{name}') for name in PEER_URL_NAMES]
+    exact.append(reverse('reports:prometheus_metrics'))
+    return PathSet(exact, prefixes)
+
+
+@lru_cache(maxsize=None)
+def login_exempt_paths():
+    """Paths reachable without logging in: the auth pages, admin (own login), APIs (own auth) and sessionless paths"""
+    exact = [reverse('users:login'), reverse('users:register'), reverse('users:logout')]
+    return PathSet(exact, ['/admin/', '/api/']) | sessionless_paths()
+
+
 class LoginRequiredMiddleware(MiddlewareMixin):
     """
     Middleware to check if a user is logged in and redirect to login page if not.
     """
-    
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.exempt_paths = login_exempt_paths()
+
     def process_request(self, request):
-        # Paths that don't require login
-        open_paths = [
-            reverse('users:login'),
-            reverse('users:register'),
-            reverse('users:logout'),
-        ]
-        
-        # Check if the user is authenticated
-        if not request.user.is_authenticated and request.path not in open_paths and not request.path.startswith('/admin/'):
+        # Checked before request.user so exempt paths never load the session
+        if request.path_info in self.exempt_paths:
+            return None
+
+        if not request.user.is_authenticated:
             return redirect('users:login')
-        
+
         return None
@@ -0,0 +1,48 @@
+import json
+import struct
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.db import migrations
+
+# Frozen copy of the users.face_embeddings format as of this migration
+PACKED_FORMAT = b'\x01'
+
+
+def pack_legacy_encoding(data):
+    """JSON list of floats to format marker + little-endian float32 bytes"""
+    values = json.loads(data)
+    return PACKED_FORMAT + struct.pack(f'<{len(values)}f', *values)
+
+
+def pack_face_encodings(apps, schema_editor):
+    """Re-encrypt face encodings stored as JSON lists as packed float32"""
+    Voter = apps.get_model('users', 'Voter')
+    batch = []
+    voters = Voter.objects.exclude(encrypted_face_encoding='').only('pk', 'encryption_key', 'encrypted_face_encoding')
+    for voter in voters.iterator(chunk_size=500):
+        f = Fernet(voter.encryption_key.encode())
+        try:
+            data = f.decrypt(voter.encrypted_face_encoding.encode())
+        except InvalidToken:
+            continue
+        if data[:1] == PACKED_FORMAT:
+            continue
+        voter.encrypted_face_encoding = f.encrypt(pack_legacy_encoding(data)).decode()
+        batch.append(voter)
+        if len(batch) >= 500:
+            Voter.objects.bulk_update(batch, ['encrypted_face_encoding'])
+            batch = []
+    if batch:
+        Voter.objects.bulk_update(batch, ['encrypted_face_encoding'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_ensure_voter_biometric_fields'),
+    ]
+
+    operations = [
+        # Legacy JSON values are still readable, so reversing is a no-op
+        migrations.RunPython(pack_face_encodings, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,12 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import RegexValidator
 from cryptography.fernet import Fernet
+from blockchain.utils import fernet_for
 import json
 import base64
 
+from .face_embeddings import pack_embedding, unpack_embedding, embedding_cache
+
 
 class State(models.Model):
     """Indian states"""
@@ -138,14 +141,12 @@ class Voter(AbstractUser):
     
     def encrypt_field(self, data):
         """Encrypt sensitive data"""
-        key = self.encryption_key.encode()
-        f = Fernet(key)
+        f = fernet_for(self.encryption_key)
         return f.encrypt(json.dumps(data).encode()).decode()
     
     def decrypt_field(self, encrypted_data):
         """Decrypt sensitive data"""
-        key = self.encryption_key.encode()
-        f = Fernet(key)
+        f = fernet_for(self.encryption_key)
         return json.loads(f.decrypt(encrypted_data.encode()).decode())
     
     def set_voter_card_number(self, voter_card_number):
@@ -169,18 +170,24 @@ class Voter(AbstractUser):
         return None
     
     def set_face_encoding(self, face_encoding):
-        """Set encrypted face encoding"""
+        """Set encrypted face encoding (packed float32, see users.face_embeddings)"""
         if face_encoding is not None:
-            # Convert numpy array to list for JSON serialization
-            if hasattr(face_encoding, 'tolist'):
-                face_encoding = face_encoding.tolist()
-            self.encrypted_face_encoding = self.encrypt_field(face_encoding)
+            f = fernet_for(self.encryption_key)
+            self.encrypted_face_encoding = f.encrypt(pack_embedding(face_encoding)).decode()
+            embedding_cache.invalidate(self.pk)
     
     def get_face_encoding(self):
-        """Get decrypted face encoding"""
-        if self.encrypted_face_encoding:
-            return self.decrypt_field(self.encrypted_face_encoding)
-        return None
+        """Get decrypted face encoding as a float32 array, cached per voter"""
+        if not self.encrypted_face_encoding:
+            return None
+        
+        encoding = embedding_cache.get(self.pk, self.encrypted_face_encoding)
+        if encoding is None:
+            f = fernet_for(self.encryption_key)
+            encoding = unpack_embedding(f.decrypt(self.encrypted_face_encoding.encode()))
+            if self.pk:
+                embedding_cache.put(self.pk, self.encrypted_face_encoding, encoding)
+        return encoding
     
     def can_vote(self):
         """Check if voter can vote"""
@@ -0,0 +1,212 @@
+"""
+Sliding-window rate limits kept in the Django cache.
+
+Each scope (login, 2fa, face, verify_vote) limits attempts per voter ID and/or
+per client IP. Counts live in the cache: Redis when CACHE_BACKEND='redis', so
+all workers share them, or local memory on a single node. Nothing is written
+to the database per attempt. A failed login only touches the database when it
+locks the voter out: the lock and a LoginAttempt row are persisted then, so
+the lockout survives a cache restart.
+
+Logins reserve their attempt before the password is checked: reserve() counts
+it first and only then compares the count with the limit, so a burst of
+concurrent logins cannot all pass a check made before any of them counted.
+A login that succeeds gives its attempt back.
+
+The window slides approximately: the count is the current fixed window plus
+the previous one weighted by how much of it still overlaps. That needs only
+cache.add/incr/get_many, which every backend supports atomically enough.
+"""
+import hashlib
+import logging
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .utils import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+# scope -> {'voter' | 'ip': (attempts, window seconds)}
+DEFAULT_RATE_LIMITS = {
+    'login': {'voter': (5, 900), 'ip': (50, 300)},
+    '2fa': {'voter': (5, 600), 'ip': (30, 600)},
+    'face': {'voter': (10, 600), 'ip': (60, 600)},
+    'verify_vote': {'ip': (60, 60)},
+}
+
+LOCKOUT = timedelta(minutes=30)
+
+
+class RateLimited(Exception):
+    """Too many attempts; retry_after is in seconds"""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"Too many {scope} attempts, retry in {retry_after}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+def _cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+def _rules(scope):
+    return (getattr(settings, 'RATE_LIMITS', None) or DEFAULT_RATE_LIMITS).get(scope, {})
+
+
+def _identities(scope, request, voter_id):
+    """(kind, value, limit, window) for every limit of the scope that applies"""
+    for kind, (limit, window) in _rules(scope).items():
+        value = voter_id if kind == 'voter' else get_client_ip(request) if request is not None else None
+        if value:
+            yield kind, str(value), limit, window
+
+
+def _key(scope, kind, value, index):
+    # Hashed so any voter ID or IP makes a valid memcached key
+    digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+    return f"ratelimit:{scope}:{kind}:{digest}:{index}"
+
+
+def _windows(scope, kind, value, window, now):
+    index, offset = divmod(now, window)
+    index = int(index)
+    return _key(scope, kind, value, index), _key(scope, kind, value, index - 1), offset / window
+
+
+def _count(cache, current_key, previous_key, elapsed):
+    counts = cache.get_many([current_key, previous_key])
+    return counts.get(current_key, 0) + counts.get(previous_key, 0) * (1 - elapsed)
+
+
+def check(scope, request, voter_id=None):
+    """Raise RateLimited if any limit of the scope is already used up"""
+    cache = _cache()
+    now = time.time()
+    for kind, value, limit, window in _identities(scope, request, voter_id):
+        current_key, previous_key, elapsed = _windows(scope, kind, value, window, now)
+        if _count(cache, current_key, previous_key, elapsed) >= limit:
+            raise RateLimited(scope, math.ceil(window * (1 - elapsed)))
+
+
+def _incr(cache, key, window):
+    # The key must outlive the next window, which still weighs it
+    cache.add(key, 0, window * 2)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Expired between add and incr
+        cache.add(key, 1, window * 2)
+
+
+def hit(scope, request, voter_id=None):
+    """Count one attempt against every limit of the scope; returns {kind: count}"""
+    cache = _cache()
+    now = time.time()
+    counts = {}
+    for kind, value, limit, window in _identities(scope, request, voter_id):
+        current_key, previous_key, elapsed = _windows(scope, kind, value, window, now)
+        _incr(cache, current_key, window)
+        counts[kind] = _count(cache, current_key, previous_key, elapsed)
+    return counts
+
+
+def reserve(scope, request, voter_id=None):
+    """
+    Count an attempt before making it and raise RateLimited if that takes any
+    limit of the scope past its allowance; returns {kind: count}. The count is
+    taken by the same incr, so concurrent attempts each see the others.
+    """
+    cache = _cache()
+    now = time.time()
+    counts = {}
+    retry_after = 0
+    for kind, value, limit, window in _identities(scope, request, voter_id):
+        current_key, previous_key, elapsed = _windows(scope, kind, value, window, now)
+        _incr(cache, current_key, window)
+        counts[kind] = _count(cache, current_key, previous_key, elapsed)
+        if counts[kind] > limit:
+            retry_after = max(retry_after, math.ceil(window * (1 - elapsed)))
+    if retry_after:
+        raise RateLimited(scope, retry_after)
+    return counts
+
+
+def release(scope, request, voter_id=None):
+    """Give back an attempt counted by reserve(), e.g. a login that succeeded"""
+    cache = _cache()
+    now = time.time()
+    for kind, value, limit, window in _identities(scope, request, voter_id):
+        current_key, _, _ = _windows(scope, kind, value, window, now)
+        try:
+            if cache.decr(current_key) < 0:
+                cache.delete(current_key)
+        except ValueError:
+            # The window rolled over since the attempt was counted
+            pass
+
+
+def throttle(scope, request, voter_id=None):
+    """check() and count the attempt, for scopes where every attempt counts"""
+    check(scope, request, voter_id)
+    hit(scope, request, voter_id)
+
+
+def reset(scope, voter_id):
+    """Forget a voter's attempts, e.g. after a successful login"""
+    cache = _cache()
+    now = time.time()
+    for kind, value, limit, window in _identities(scope, None, voter_id):
+        current_key, previous_key, _ = _windows(scope, kind, value, window, now)
+        cache.delete_many([current_key, previous_key])
+
+
+def record_failed_login(request, voter_id, counts):
+    """
+    Handle a failed login whose attempt reserve() already counted. When the
+    voter's count reaches the limit, lock the voter in the database and log
+    the attempt; returns True in that case.
+    """
+    from .models import Voter, LoginAttempt
+
+    limit = _rules('login').get('voter', (None, None))[0]
+    if not limit or counts.get('voter', 0) < limit:
+        return False
+
+    voter = Voter.objects.filter(voter_id=voter_id).first()
+    if voter is None:
+        return False
+
+    voter.login_attempts = math.ceil(counts['voter'])
+    voter.is_locked = True
+    voter.locked_until = timezone.now() + LOCKOUT
+    voter.save(update_fields=['login_attempts', 'is_locked', 'locked_until'])
+
+    LoginAttempt.objects.create(
+        voter=voter,
+        ip_address=get_client_ip(request) if request is not None else '0.0.0.0',
+        user_agent=request.META.get('HTTP_USER_AGENT', '') if request is not None else '',
+        success=False,
+        failure_reason='LOCKED_OUT'
+    )
+    logger.warning(f"Voter {voter_id} locked out after {voter.login_attempts} failed logins")
+    return True
+
+
+def locked_until(voter_id):
+    """
+    End of the lockout persisted by record_failed_login if it is still in
+    force, else None. Checked before authenticate(), so a locked account gets
+    the same answer whatever the password and no password is hashed.
+    """
+    from .models import Voter
+
+    lock = Voter.objects.filter(voter_id=voter_id).values_list('is_locked', 'locked_until').first()
+    if lock and lock[0] and lock[1] and lock[1] > timezone.now():
+        return lock[1]
+    return None
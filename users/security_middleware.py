@@ -1,14 +1,21 @@
 from django.utils.deprecation import MiddlewareMixin
 
+from .middleware import sessionless_paths
+
 class SecurityHeadersMiddleware(MiddlewareMixin):
     """
     Middleware to add security headers to all responses.
     Prevents browser back button after logout and other security issues.
     """
     
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sessionless_paths = sessionless_paths()
+    
     def process_response(self, request, response):
-        # Prevent caching for authenticated pages to stop back button from showing content
-        if request.user.is_authenticated:
+        # Prevent caching for authenticated pages to stop back button from showing content.
+        # Sessionless paths serve no per-user pages, and asking would load their session.
+        if request.path_info not in self.sessionless_paths and request.user.is_authenticated:
             response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
             response['Pragma'] = 'no-cache'
             response['Expires'] = '0'
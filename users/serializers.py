@@ -1,8 +1,8 @@
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
-from django.utils import timezone
 from .models import Voter, AdminUser, VoterVerification, State, Constituency
+from . import ratelimit
 import re
 
 
@@ -107,42 +107,43 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         super().__init__(*args, **kwargs)
         self.fields['voter_id'] = serializers.CharField()
         self.fields['password'] = serializers.CharField()
-        del self.fields['username']
+        self.fields.pop('username', None)
     
     def validate(self, attrs):
         voter_id = attrs.get('voter_id')
         password = attrs.get('password')
         
-        # Check if voter exists and is active
-        try:
-            voter = Voter.objects.get(voter_id=voter_id)
-        except Voter.DoesNotExist:
-            raise serializers.ValidationError('Invalid voter ID or password')
+        request = self.context.get('request')
         
-        # Check if voter is locked
-        if voter.is_locked and voter.locked_until and voter.locked_until > timezone.now():
+        # The attempt is counted in the cache (users.ratelimit) before the
+        # password is checked, so concurrent attempts cannot overrun the limit
+        try:
+            counts = ratelimit.reserve('login', request, voter_id)
+        except ratelimit.RateLimited as e:
             raise serializers.ValidationError(
-                f'Account is locked until {voter.locked_until}'
+                f'Too many login attempts, try again in {e.retry_after} seconds'
             )
         
+        # Check if voter is locked, before the password is checked
+        lock_end = ratelimit.locked_until(voter_id)
+        if lock_end:
+            raise serializers.ValidationError(f'Account is locked until {lock_end}')
+        
         # Authenticate voter
-        user = authenticate(request=self.context.get('request'),
-                          voter_id=voter_id, password=password)
+        user = authenticate(request=request, voter_id=voter_id, password=password)
         
         if user is None:
-            # Increment failed login attempts
-            voter.login_attempts += 1
-            if voter.login_attempts >= 5:
-                voter.is_locked = True
-                voter.locked_until = timezone.now() + timezone.timedelta(minutes=30)
-            voter.save()
+            ratelimit.record_failed_login(request, voter_id, counts)
             raise serializers.ValidationError('Invalid voter ID or password')
         
-        # Reset failed attempts on successful login
-        voter.login_attempts = 0
-        voter.is_locked = False
-        voter.locked_until = None
-        voter.save()
+        # Clear the lockout persisted by an earlier run of failures; most logins have nothing to reset
+        ratelimit.release('login', request)
+        ratelimit.reset('login', voter_id)
+        if user.login_attempts or user.is_locked or user.locked_until:
+            user.login_attempts = 0
+            user.is_locked = False
+            user.locked_until = None
+            user.save(update_fields=['login_attempts', 'is_locked', 'locked_until'])
         
         # Generate token
         refresh = self.get_token(user)
@@ -1,3 +1,391 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from multiprocessing.pool import ThreadPool
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from cryptography.fernet import Fernet
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import serializers
+
+from . import dashboard, face_screening, key_rotation, ratelimit
+from .admin_views import admin_transactions
+from .models import Voter, State, Constituency
+from .hashers import TunableScryptPasswordHasher
+from .middleware import LoginRequiredMiddleware
+from .security_middleware import SecurityHeadersMiddleware
+from .serializers import CustomTokenObtainPairSerializer
+from .utils import get_client_ip
+
+PASSWORD = 'correct-horse-battery'
+
+
+def create_voter(voter_id='ABC0000001', password=PASSWORD, **fields):
+    state, _ = State.objects.get_or_create(name='Test State', code='TS')
+    constituency, _ = Constituency.objects.get_or_create(
+        name='Test Constituency', code='TC1', constituency_type='LOK_SABHA', state=state
+    )
+    voter = Voter(
+        voter_id=voter_id, email=f'{voter_id.lower()}@example.com', date_of_birth='1990-01-01',
+        constituency=constituency, state=state, address_line1='-', city='-',
+        pincode='000000', mobile_number='+911234567890', **fields
+    )
+    voter.set_password(password)
+    voter.save()
+    return voter
+
+
+class LoginLockoutTest(TestCase):
+    """Failed logins lock the voter; the lock is checked before the password"""
+
+    def setUp(self):
+        cache.clear()
+        self.voter = create_voter()
+        self.factory = RequestFactory()
+        self.limit = ratelimit.DEFAULT_RATE_LIMITS['login']['voter'][0]
+
+    def token(self, password):
+        serializer = CustomTokenObtainPairSerializer(
+            data={'voter_id': self.voter.voter_id, 'password': password},
+            context={'request': self.factory.post('/api/token/')}
+        )
+        try:
+            serializer.is_valid(raise_exception=True)
+        except serializers.ValidationError as e:
+            return str(e.detail)
+        return serializer.validated_data
+
+    def test_lockout_answers_the_same_whatever_the_password(self):
+        for _ in range(self.limit):
+            self.assertIn('Invalid voter ID or password', self.token('wrong'))
+        self.voter.refresh_from_db()
+        self.assertTrue(self.voter.is_locked)
+
+        # The cache counter is gone (expired, restarted or another worker): the database lock still holds
+        cache.clear()
+        self.assertIn('Account is locked until', self.token(PASSWORD))
+        self.assertIn('Account is locked until', self.token('wrong'))
+
+    def test_lockout_applies_to_the_login_page(self):
+        for _ in range(self.limit):
+            self.client.post('/users/login/', {'voter_id': self.voter.voter_id, 'password': 'wrong'})
+        cache.clear()
+        for password in (PASSWORD, 'wrong'):
+            response = self.client.post('/users/login/', {'voter_id': self.voter.voter_id, 'password': password})
+            self.assertContains(response, 'Account is locked until')
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_successful_login_resets_the_counter(self):
+        for _ in range(self.limit - 1):
+            self.token('wrong')
+        self.assertIn('access', self.token(PASSWORD))
+        for _ in range(self.limit - 1):
+            self.token('wrong')
+        self.voter.refresh_from_db()
+        self.assertFalse(self.voter.is_locked)
+        self.assertIn('access', self.token(PASSWORD))
+
+    def test_attempts_in_flight_count_against_the_limit(self):
+        # A burst whose attempts are all counted but none has failed yet
+        request = self.factory.post('/api/token/')
+        for _ in range(self.limit):
+            ratelimit.reserve('login', request, self.voter.voter_id)
+        with mock.patch('users.serializers.authenticate') as authenticate_voter:
+            self.assertIn('Too many login attempts', self.token(PASSWORD))
+        authenticate_voter.assert_not_called()
+
+    def test_successful_login_gives_back_its_attempt(self):
+        request = self.factory.post('/api/token/')
+        for _ in range(3):
+            self.assertIn('access', self.token(PASSWORD))
+        self.assertEqual(ratelimit.reserve('login', request), {'ip': 1})
+
+
+class ClientIPTest(TestCase):
+    """Per-IP limits must not be escapable by setting X-Forwarded-For"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, forwarded_for):
+        return self.factory.get('/', HTTP_X_FORWARDED_FOR=forwarded_for, REMOTE_ADDR='10.0.0.1')
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        self.assertEqual(get_client_ip(self.request('1.2.3.4')), '10.0.0.1')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_trusted_proxy_hop_is_used(self):
+        self.assertEqual(get_client_ip(self.request('6.6.6.6, 1.2.3.4')), '1.2.3.4')
+
+    def test_rotating_the_header_does_not_reset_the_ip_limit(self):
+        limit = ratelimit.DEFAULT_RATE_LIMITS['verify_vote']['ip'][0]
+        for n in range(limit):
+            ratelimit.throttle('verify_vote', self.request(f'192.0.2.{n % 250}'))
+        with self.assertRaises(ratelimit.RateLimited):
+            ratelimit.throttle('verify_vote', self.request('198.51.100.1'))
+
+
+class AdminTransactionsLimitTest(TestCase):
+    """A malformed ?limit= is a bad request, not a server error"""
+
+    def test_non_integer_limit_is_rejected(self):
+        request = RequestFactory().get('/', {'limit': 'abc'})
+        request.user = create_voter(is_staff=True)
+        self.assertEqual(admin_transactions(request).status_code, 400)
+
+
+@mock.patch.object(face_screening, 'DECRYPT_CHUNK_SIZE', 2)
+class LoadEmbeddingsTest(TestCase):
+    """Embeddings stream into one matrix in voter order, skipping what cannot be decrypted"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.encodings = {}
+        for n in range(7):
+            voter = create_voter(f'ABC{n:07d}')
+            encoding = rng.normal(size=128).astype(np.float32)
+            voter.set_face_encoding(encoding)
+            voter.save()
+            self.encodings[voter.voter_id] = encoding
+        create_voter('ABC0000010')  # not enrolled
+        broken = create_voter('ABC0000011')
+        broken.encrypted_face_encoding = Fernet(Fernet.generate_key()).encrypt(b'x').decode()
+        broken.save()
+
+    def check(self, voter_ids, matrix):
+        self.assertEqual(list(voter_ids), sorted(self.encodings))
+        self.assertEqual(matrix.dtype, np.float32)
+        np.testing.assert_array_equal(matrix, np.stack([self.encodings[voter_id] for voter_id in voter_ids]))
+
+    def test_without_pool(self):
+        self.check(*face_screening.load_embeddings(Voter.objects.all()))
+
+    def test_with_pool(self):
+        with ThreadPool(2) as pool:
+            self.check(*face_screening.load_embeddings(Voter.objects.all(), pool, in_flight=2))
+
+
+class PasswordRehashTest(TestCase):
+    """Logging in upgrades the stored hash to the current hasher and cost"""
+
+    def setUp(self):
+        self.voter = create_voter()
+
+    def login(self, password=PASSWORD):
+        return authenticate(voter_id=self.voter.voter_id, password=password)
+
+    def stored_hash(self):
+        self.voter.refresh_from_db(fields=['password'])
+        return self.voter.password
+
+    def test_new_passwords_use_scrypt(self):
+        self.assertIsInstance(identify_hasher(self.stored_hash()), TunableScryptPasswordHasher)
+
+    def test_pbkdf2_hash_is_upgraded_on_login(self):
+        Voter.objects.filter(pk=self.voter.pk).update(password=make_password(PASSWORD, hasher='pbkdf2_sha256'))
+        self.assertEqual(self.login(), self.voter)
+        self.assertIsInstance(identify_hasher(self.stored_hash()), TunableScryptPasswordHasher)
+
+    def test_changed_cost_is_applied_on_login(self):
+        with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2 ** 12):
+            self.assertEqual(self.login(), self.voter)
+            encoded = self.stored_hash()
+        self.assertEqual(TunableScryptPasswordHasher().decode(encoded)['work_factor'], 2 ** 12)
+
+    def test_wrong_password_leaves_the_hash_alone(self):
+        Voter.objects.filter(pk=self.voter.pk).update(password=make_password(PASSWORD, hasher='pbkdf2_sha256'))
+        encoded = self.stored_hash()
+        self.assertIsNone(self.login('wrong'))
+        self.assertIsNone(authenticate(voter_id='ZZZ9999999', password=PASSWORD))
+        self.assertEqual(self.stored_hash(), encoded)
+
+
+class RotateVoterKeysTest(TestCase):
+    """Keys rotate in resumable chunks without overwriting voters changed mid-run"""
+
+    def setUp(self):
+        self.encodings = np.random.default_rng(0).normal(size=(6, 128)).astype(np.float32)
+        for n in range(6):
+            voter = create_voter(f'ABC{n:07d}')
+            voter.set_voter_card_number(f'CARD{n}')
+            voter.set_aadhaar_number(f'{n:012d}')
+            if n % 2:
+                voter.set_face_encoding(self.encodings[n])
+            voter.save()
+        self.keys = dict(Voter.objects.values_list('pk', 'encryption_key'))
+        self.pks = sorted(self.keys)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, 'rotate.json')
+
+    def rotate(self, **options):
+        call_command('rotate_voter_keys', checkpoint=self.checkpoint, stdout=io.StringIO(), stderr=io.StringIO(), **options)
+
+    def assert_rotated(self, voter):
+        n = int(voter.voter_id[3:])
+        self.assertNotEqual(voter.encryption_key, self.keys[voter.pk])
+        self.assertEqual(voter.get_voter_card_number(), f'CARD{n}')
+        self.assertEqual(voter.get_aadhaar_number(), f'{n:012d}')
+        if n % 2:
+            np.testing.assert_array_equal(voter.get_face_encoding(), self.encodings[n])
+        else:
+            self.assertEqual(voter.encrypted_face_encoding, '')
+
+    def test_rotates_every_voter_across_workers(self):
+        self.rotate(workers=2, chunk_size=4)
+        for voter in Voter.objects.all():
+            self.assert_rotated(voter)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_after_the_checkpoint(self):
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'scope': {'constituency': None, 'state': None}, 'last_pk': self.pks[2],
+                       'written': 3, 'skipped': [], 'failed': []}, f)
+        self.rotate(workers=1, chunk_size=2)
+
+        for pk in self.pks[:3]:
+            self.assertEqual(Voter.objects.get(pk=pk).encryption_key, self.keys[pk])
+        for voter in Voter.objects.filter(pk__in=self.pks[3:]):
+            self.assert_rotated(voter)
+
+    def test_checkpoint_from_another_scope_is_refused(self):
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'scope': {'constituency': 'C9', 'state': None}, 'last_pk': 0}, f)
+        with self.assertRaises(CommandError):
+            self.rotate(workers=1)
+
+    def test_voter_changed_during_the_run_is_skipped(self):
+        rows = list(Voter.objects.filter(pk__in=self.pks[:2]).order_by('pk').values_list('pk', *key_rotation.FIELDS))
+        rotated, failed = key_rotation.rotate_rows(rows)
+        self.assertEqual(failed, [])
+
+        changed = Voter.objects.get(pk=self.pks[0])
+        changed.set_aadhaar_number('999999999999')
+        changed.save()
+        self.assertEqual(key_rotation.write_chunk(rows, rotated), (1, [self.pks[0]]))
+
+        changed.refresh_from_db()
+        self.assertEqual(changed.encryption_key, self.keys[changed.pk])
+        self.assertEqual(changed.get_aadhaar_number(), '999999999999')
+        self.assert_rotated(Voter.objects.get(pk=self.pks[1]))
+
+    def test_retry_rotates_only_the_voters_left_behind(self):
+        def change_first_voter(rows, rotated):
+            if rows[0][0] == self.pks[0]:
+                changed = Voter.objects.get(pk=self.pks[0])
+                changed.set_aadhaar_number('000000000000')
+                changed.save()
+            return key_rotation.write_chunk(rows, rotated)
+
+        with mock.patch('users.management.commands.rotate_voter_keys.write_chunk', change_first_voter):
+            self.rotate(workers=1, chunk_size=2)
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)['skipped'], [self.pks[0]])
+        self.assertEqual(Voter.objects.get(pk=self.pks[0]).encryption_key, self.keys[self.pks[0]])
+
+        rotated_keys = dict(Voter.objects.filter(pk__in=self.pks[1:]).values_list('pk', 'encryption_key'))
+        self.rotate(workers=1, retry=True)
+        self.assertNotEqual(Voter.objects.get(pk=self.pks[0]).encryption_key, self.keys[self.pks[0]])
+        self.assertEqual(dict(Voter.objects.filter(pk__in=self.pks[1:]).values_list('pk', 'encryption_key')), rotated_keys)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+
+class SessionlessPathTest(TestCase):
+    """Static files, metrics and peer blockchain calls never load the session"""
+
+    def setUp(self):
+        stack = SecurityHeadersMiddleware(lambda request: HttpResponse())
+        self.handler = SessionMiddleware(AuthenticationMiddleware(LoginRequiredMiddleware(stack)))
+        self.factory = RequestFactory()
+        self.factory.cookies['sessionid'] = 'x' * 32
+
+    def get(self, path):
+        request = self.factory.get(path)
+        return request, self.handler(request)
+
+    def test_sessionless_paths_skip_the_session(self):
+        for path in (
+            '/static/css/site.css',
+            reverse('blockchain:receive_block'),
+            reverse('blockchain:get_chain', args=[3]),
+        ):
+            request, response = self.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertFalse(request.session.accessed, path)
+
+    def test_other_paths_still_require_login(self):
+        request, response = self.get(reverse('users:profile'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(request.session.accessed)
+
+    def test_peer_call_with_a_session_cookie_does_not_query_sessions(self):
+        self.client.cookies['sessionid'] = 'y' * 32
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('blockchain:receive_block'), {}, content_type='application/json')
+        self.assertFalse(any('django_session' in query['sql'] for query in queries.captured_queries))
+
+    @override_settings(METRICS_ALLOWED_IPS=['192.0.2.10'])
+    def test_metrics_scrape_does_not_query_sessions(self):
+        self.client.cookies['sessionid'] = 'y' * 32
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('reports:prometheus_metrics'), REMOTE_ADDR='192.0.2.10')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('django_session' in query['sql'] for query in queries.captured_queries))
+
+        # Anyone else must be staff, which takes the session
+        response = self.client.get(reverse('reports:prometheus_metrics'), REMOTE_ADDR='198.51.100.7')
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(ADMIN_DASHBOARD_CACHE_TTL=30)
+class DashboardSnapshotTest(TestCase):
+    """Admin dashboard counts come from a snapshot refreshed once per TTL"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = create_voter(is_staff=True, is_superuser=True)
+
+    def age_snapshot(self, seconds):
+        stats = cache.get(dashboard.STATS_KEY)
+        stats['computed_at'] -= timedelta(seconds=seconds)
+        cache.set(dashboard.STATS_KEY, stats)
+
+    def test_counts_are_served_from_the_snapshot_within_the_ttl(self):
+        self.assertEqual(dashboard.dashboard_stats()['voter_count'], 1)
+        create_voter('ABC0000002')
+        self.age_snapshot(10)
+        self.assertEqual(dashboard.dashboard_stats()['voter_count'], 1)
+
+    def test_stale_snapshot_is_refreshed_by_one_request(self):
+        dashboard.dashboard_stats()
+        create_voter('ABC0000002')
+        self.age_snapshot(31)
+
+        # Another request holds the refresh lock: the stale snapshot is served meanwhile
+        cache.add(dashboard.REFRESH_LOCK_KEY, 1)
+        self.assertEqual(dashboard.dashboard_stats()['voter_count'], 1)
+
+        cache.delete(dashboard.REFRESH_LOCK_KEY)
+        self.assertEqual(dashboard.dashboard_stats()['voter_count'], 2)
+        self.assertIsNone(cache.get(dashboard.REFRESH_LOCK_KEY))
+
+    def test_warm_admin_index_does_not_recount(self):
+        self.client.force_login(self.admin)
+        self.assertContains(self.client.get('/admin/'), 'System Health')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/admin/')
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
@@ -4,7 +4,6 @@ import string
 import logging
 from django.core.mail import send_mail
 from django.conf import settings
-import requests
 
 logger = logging.getLogger(__name__)
 
@@ -83,13 +82,19 @@ def hash_voter_data(voter_id, constituency_code, salt=None):
 
 
 def get_client_ip(request):
-    """Get client IP address from request"""
+    """
+    Get client IP address from request.
+    X-Forwarded-For is only used behind TRUSTED_PROXY_COUNT proxies: each one
+    appends the address it got the request from, so the client is that many
+    entries from the right. Entries further left come from the client itself.
+    """
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    if proxies and x_forwarded_for:
+        hops = [hop.strip() for hop in x_forwarded_for.split(',')]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get('REMOTE_ADDR')
 
 
 def generate_device_fingerprint(request):
@@ -184,19 +189,19 @@ def create_audit_log(action, actor_type, actor_id, details, ip_address, success=
 
 def encrypt_sensitive_data(data, key):
     """Encrypt sensitive data"""
-    from cryptography.fernet import Fernet
+    from blockchain.utils import fernet_for
     import json
     
-    f = Fernet(key)
+    f = fernet_for(key)
     return f.encrypt(json.dumps(data).encode()).decode()
 
 
 def decrypt_sensitive_data(encrypted_data, key):
     """Decrypt sensitive data"""
-    from cryptography.fernet import Fernet
+    from blockchain.utils import fernet_for
     import json
     
-    f = Fernet(key)
+    f = fernet_for(key)
     decrypted_bytes = f.decrypt(encrypted_data.encode())
     return json.loads(decrypted_bytes.decode())
 
@@ -5,6 +5,7 @@ from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from .forms import VoterRegistrationForm
 from .models import Voter, Constituency
+from . import ratelimit
 
 def register_view(request):
     if request.method == 'POST':
@@ -19,6 +20,12 @@ def register_view(request):
                 face_image = request.FILES.get('face_image')
                 
                 if voter_id_card and face_image:
+                    try:
+                        ratelimit.throttle('face', request, form.cleaned_data.get('voter_id'))
+                    except ratelimit.RateLimited as e:
+                        messages.error(request, f"Too many face verification attempts. Please try again in {e.retry_after // 60 + 1} minutes.")
+                        return render(request, 'users/register.html', {'form': form}, status=429)
+                    
                     try:
                         # Process voter ID card and face image
                         success = verify_voter_face(None, face_image) # simplified check
@@ -45,13 +52,27 @@ def login_view(request):
     if request.method == 'POST':
         voter_id = request.POST.get('voter_id')
         password = request.POST.get('password')
+        try:
+            counts = ratelimit.reserve('login', request, voter_id)
+        except ratelimit.RateLimited as e:
+            messages.error(request, f'Too many login attempts. Please try again in {e.retry_after // 60 + 1} minutes.')
+            return render(request, 'users/login.html', status=429)
+        
+        lock_end = ratelimit.locked_until(voter_id)
+        if lock_end:
+            messages.error(request, f'Account is locked until {lock_end}.')
+            return render(request, 'users/login.html')
+        
         # We need to authenticate using the voter_id field
         user = authenticate(request, voter_id=voter_id, password=password)
         if user is not None:
+            ratelimit.release('login', request)
+            ratelimit.reset('login', voter_id)
             login(request, user)
             messages.success(request, 'You have successfully logged in.')
             return redirect('users:profile')
         else:
+            ratelimit.record_failed_login(request, voter_id, counts)
             messages.error(request, 'Invalid voter ID or password.')
     return render(request, 'users/login.html')
 
@@ -48,6 +48,7 @@ from .face_recognition import (
     is_face_recognition_available, verify_voter_face, 
     process_face_image_for_encoding
 )
+from .face_service import face_service, FaceServiceBusy
 from io import BytesIO
 from PIL import Image
 
@@ -274,28 +275,14 @@ class FaceVerificationView(APIView):
     def verify_face(self, face_image, voter):
         """Verify face using face_recognition library"""
         try:
-            # Convert uploaded image to numpy array
-            image = Image.open(face_image)
-            image_np = np.array(image)
-            
-            # Convert RGB to BGR for OpenCV
-            if len(image_np.shape) == 3:
-                image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-            
-            # Find face encodings in uploaded image
-            face_locations = face_recognition.face_locations(image_np)
-            if not face_locations:
-                return {'verified': False, 'confidence': 0.0, 'error': 'No face found in image'}
-            
-            face_encodings = face_recognition.face_encodings(image_np, face_locations)
-            if not face_encodings:
-                return {'verified': False, 'confidence': 0.0, 'error': 'Could not encode face'}
-            
-            uploaded_encoding = face_encodings[0]
+            # Detection and encoding run in the face worker pool
+            uploaded_encoding, message = face_service.analyze(face_image.read())
+            if uploaded_encoding is None:
+                return {'verified': False, 'confidence': 0.0, 'error': message}
             
             # Get stored face encoding
             stored_encoding = voter.get_face_encoding()
-            if not stored_encoding:
+            if stored_encoding is None:
                 return {'verified': False, 'confidence': 0.0, 'error': 'No stored face encoding'}
             
             # Compare faces
@@ -314,6 +301,9 @@ class FaceVerificationView(APIView):
                 'tolerance_used': tolerance
             }
             
+        except FaceServiceBusy as e:
+            logger.warning(f"Face verification rejected under load: {str(e)}")
+            return {'verified': False, 'confidence': 0.0, 'error': 'Face verification is busy, please try again'}
         except Exception as e:
             logger.error(f"Face verification error: {str(e)}")
             return {'verified': False, 'confidence': 0.0, 'error': str(e)}
@@ -494,33 +484,27 @@ def upload_face_image(request):
     voter = request.user
     
     try:
-        # Process and store face encoding
-        image = Image.open(face_image)
-        image_np = np.array(image)
-        
-        # Find face encoding
-        face_locations = face_recognition.face_locations(image_np)
-        if not face_locations:
+        # Detection, quality checks and encoding run in the face worker pool
+        encoding, message = face_service.analyze(face_image.read())
+        if encoding is None:
             return Response(
-                {'error': 'No face found in image'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        face_encodings = face_recognition.face_encodings(image_np, face_locations)
-        if not face_encodings:
-            return Response(
-                {'error': 'Could not encode face'}, 
+                {'error': message}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Store face encoding
-        voter.set_face_encoding(face_encodings[0])
+        voter.set_face_encoding(encoding)
         voter.save()
         
         logger.info(f"Face image uploaded for voter: {voter.voter_id}")
         
         return Response({'message': 'Face image uploaded successfully'})
     
+    except FaceServiceBusy:
+        return Response(
+            {'error': 'Face processing is busy, please try again'}, 
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
     except Exception as e:
         logger.error(f"Face image upload error: {str(e)}")
         return Response(